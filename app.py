@@ -9,15 +9,17 @@ Supports multi-turn function calling for complete 2-step visualization workflow.
 """
 
 import dash
-from dash import html, callback, Input, Output, State
+from dash import dcc, html, callback, Input, Output, State, Patch
 from dash.exceptions import PreventUpdate
 import dash_mantine_components as dmc
 from dash_chat import ChatComponent
-import os
+import platform
+import re
+import sys
 from dotenv import load_dotenv
+import time
 import uuid
 from datetime import datetime
-import traceback
 from typing import Union, Dict, Any
 
 # Load environment variables FIRST (before any other imports that might use them)
@@ -28,13 +30,26 @@ from logger_config import (
     get_logger,
     get_function_call_logger,
     get_api_logger,
-    LoggedOperation
+    LoggedOperation,
+    CORRELATION_ID
 )
 
 # Import application modules
 from app_helpers import generate_chat_response
 from app_llm import MODELS
 
+# Host details for startup diagnostics, resolved once at import
+SYSTEM_INFO = f"{platform.system()} {platform.release()}"
+PYTHON_VERSION = sys.version.split()[0]
+
+# Model ids accepted by the model selector, for O(1) validation
+VALID_MODELS = frozenset(model['value'] for model in MODELS)
+
+# Keyword patterns for request analysis, matched against lowercased text
+CHART_REQUEST_RE = re.compile(r"chart|graph|plot|visualize|show")
+COMPLEX_REQUEST_RE = re.compile(r"compare|analysis|dashboard|multiple")
+WORKFLOW_ISSUE_RE = re.compile(r"incomplete|data generated|need to create")
+
 # Initialize specialized loggers
 app_logger = get_logger('gemini_chatbot.app')
 function_logger = get_function_call_logger()
@@ -42,25 +57,17 @@ api_logger = get_api_logger()
 
 # Log application startup
 app_logger.info("🚀 Starting Gemini Agent application with Multi-Turn Function Calling")
-app_logger.info(f"Available models: {[model['value'] for model in MODELS]}")
+app_logger.info("Available models: %s", sorted(VALID_MODELS))
 app_logger.info("✨ Enhanced with 2-step visualization workflow support")
 
-# Initialize Dash app with enhanced logging
-try:
-    app = dash.Dash(
-        __name__,
-        external_stylesheets=[
-            "https://fonts.googleapis.com/css2?family=Inter:wght@100;200;300;400;500;600;700;800;900&display=swap"
-        ],
-        meta_tags=[{"name": "viewport", "content": "width=device-width, initial-scale=1"}],
-    )
-    
-    app_logger.info("✅ Dash app initialized successfully")
-    app_logger.debug("External stylesheets and meta tags configured")
-    
-except Exception as e:
-    app_logger.critical(f"❌ Failed to initialize Dash app: {str(e)}", exc_info=True)
-    raise
+# Initialize Dash app
+app = dash.Dash(
+    __name__,
+    external_stylesheets=[
+        "https://fonts.googleapis.com/css2?family=Inter:wght@100;200;300;400;500;600;700;800;900&display=swap"
+    ],
+    meta_tags=[{"name": "viewport", "content": "width=device-width, initial-scale=1"}],
+)
 
 app.title = "Gemini Agent - Multi-Turn"
 server = app.server
@@ -68,110 +75,136 @@ server = app.server
 app_logger.info("📱 App title and server configured")
 
 # Generate a unique session ID for this app instance
-SESSION_ID = str(uuid.uuid4())[:8]
-app_logger.info(f"🔑 Session ID generated: {SESSION_ID}")
+SESSION_ID = uuid.uuid4().hex[:8]
+app_logger.info("🔑 Session ID generated: %s", SESSION_ID)
 
-# Enhanced layout with logging
-app_logger.debug("🎨 Building application layout")
+# Logging context shared by every span in this process
+BASE_LOG_CONTEXT = {"session_id": SESSION_ID, "multiturn_enabled": True}
 
-try:
-    app.layout = dmc.MantineProvider(
-        theme={
-            "colorScheme": "light",
-            "fontFamily": "'Inter', sans-serif",
-            "primaryColor": "indigo",
-        },
-        children=[
-            dmc.Container(
-                fluid=True,
-                px=0,
-                style={"height": "100vh", "display": "flex", "flexDirection": "column"},
-                children=[
-                    # Header with enhanced logging context
-                    dmc.Paper(
-                        h=70,
-                        p="md",
-                        style={"borderBottom": "1px solid #e9ecef"},
-                        children=[
-                            dmc.Group(
-                                align="apart",
-                                children=[
-                                    dmc.Title("Gemini Agent - Multi-Turn", order=3, c="indigo"),
-                                    dmc.Select(
-                                        id="model-select",
-                                        data=MODELS,
-                                        value="gemini-2.5-flash",
-                                        placeholder="Select a model",
-                                        style={"width": 300},
-                                        searchable=True,
-                                    ),
-                                ],
-                            ),
-                        ],
-                    ),
-                    # Chat Component (Main Content) - Enhanced for debugging
-                    dmc.Box(
-                        style={
-                            "flexGrow": 1,
-                            "display": "flex",
-                            "flexDirection": "column",
-                            "overflow": "auto",
-                        },
-                        children=[
-                            ChatComponent(
-                                id="chat-component",
-                                messages=[],
-                                persistence=True,
-                                persistence_type="local",
-                                input_placeholder="Ask Gemini for visualizations (e.g., 'Show quarterly sales trends')...",
-                                theme="light",
-                                fill_height=True,
-                                user_bubble_style={
-                                    "backgroundColor": "#6741d9",
-                                    "color": "white",
-                                    "marginLeft": "auto",
-                                    "textAlign": "right",
-                                    "borderRadius": "1rem 0 1rem 1rem",
-                                    "padding": "0.75rem 1rem",
-                                    "maxWidth": "80%",
-                                },
-                                assistant_bubble_style={
-                                    "backgroundColor": "#f1f3f5",
-                                    "color": "#1a1b1e",
-                                    "marginRight": "auto",
-                                    "textAlign": "left",
-                                    "borderRadius": "0 1rem 1rem 1rem",
-                                    "padding": "0.75rem 1rem",
-                                    "maxWidth": "80%",
-                                },
-                                container_style={
-                                    "padding": "1rem",
-                                    "backgroundColor": "#ffffff",
-                                },
-                            ),
-                        ],
-                    ),
-                    # Footer with multi-turn indicator
-                    dmc.Paper(
-                        h=40,
-                        p="xs",
-                        style={"borderTop": "1px solid #e9ecef", "textAlign": "center"},
-                        children=[
-                            dmc.Text("Gemini Agent - Multi-Turn Function Calling for Complete Visualizations", 
-                                   size="sm", c="dimmed"),
-                        ],
-                    ),
-                ],
-            ),
-        ],
-    )
-    
-    app_logger.info("✅ Application layout created successfully")
-    app_logger.debug("UI components: Header, ChatComponent, Footer configured")
+# Only the most recent messages are sent to the model each turn, so the
+# per-request cost stays bounded as the conversation grows
+HISTORY_LIMIT = 20
+
+# Chat bubble/container styles, shared by every render of the layout
+USER_BUBBLE_STYLE = {
+    "backgroundColor": "#6741d9",
+    "color": "white",
+    "marginLeft": "auto",
+    "textAlign": "right",
+    "borderRadius": "1rem 0 1rem 1rem",
+    "padding": "0.75rem 1rem",
+    "maxWidth": "80%",
+}
+ASSISTANT_BUBBLE_STYLE = {
+    "backgroundColor": "#f1f3f5",
+    "color": "#1a1b1e",
+    "marginRight": "auto",
+    "textAlign": "left",
+    "borderRadius": "0 1rem 1rem 1rem",
+    "padding": "0.75rem 1rem",
+    "maxWidth": "80%",
+}
+CHAT_CONTAINER_STYLE = {
+    "padding": "1rem",
+    "backgroundColor": "#ffffff",
+}
+
+# Application layout - pure component construction, built once at import
+APP_LAYOUT = dmc.MantineProvider(
+    theme={
+        "colorScheme": "light",
+        "fontFamily": "'Inter', sans-serif",
+        "primaryColor": "indigo",
+    },
+    children=[
+        dmc.Container(
+            fluid=True,
+            px=0,
+            style={"height": "100vh", "display": "flex", "flexDirection": "column"},
+            children=[
+                # Header with enhanced logging context
+                dmc.Paper(
+                    h=70,
+                    p="md",
+                    style={"borderBottom": "1px solid #e9ecef"},
+                    children=[
+                        dmc.Group(
+                            align="apart",
+                            children=[
+                                dmc.Title("Gemini Agent - Multi-Turn", order=3, c="indigo"),
+                                dmc.Select(
+                                    id="model-select",
+                                    data=MODELS,
+                                    value="gemini-2.5-flash",
+                                    placeholder="Select a model",
+                                    style={"width": 300},
+                                    searchable=True,
+                                ),
+                            ],
+                        ),
+                    ],
+                ),
+                # Chat Component (Main Content) - Enhanced for debugging
+                dmc.Box(
+                    style={
+                        "flexGrow": 1,
+                        "display": "flex",
+                        "flexDirection": "column",
+                        "overflow": "auto",
+                    },
+                    children=[
+                        ChatComponent(
+                            id="chat-component",
+                            messages=[],
+                            persistence=True,
+                            persistence_type="session",  # per-tab sessionStorage, bounded to the tab lifetime
+                            input_placeholder="Ask Gemini for visualizations (e.g., 'Show quarterly sales trends')...",
+                            theme="light",
+                            fill_height=True,
+                            user_bubble_style=USER_BUBBLE_STYLE,
+                            assistant_bubble_style=ASSISTANT_BUBBLE_STYLE,
+                            container_style=CHAT_CONTAINER_STYLE,
+                        ),
+                    ],
+                ),
+                # Footer with multi-turn indicator
+                dmc.Paper(
+                    h=40,
+                    p="xs",
+                    style={"borderTop": "1px solid #e9ecef", "textAlign": "center"},
+                    children=[
+                        dmc.Text("Gemini Agent - Multi-Turn Function Calling for Complete Visualizations", 
+                               size="sm", c="dimmed"),
+                    ],
+                ),
+            ],
+        ),
+    ],
+)
+
+
+def serve_layout():
+    """Shared layout plus a fresh client id per page load (scopes in-flight request coalescing)."""
+    return html.Div([APP_LAYOUT, dcc.Store(id="client-id", data=uuid.uuid4().hex)])
+
+
+app.layout = serve_layout
+app_logger.info("✅ Application layout created successfully")
+
+
+def trim_history(messages: list) -> list:
+    """
+    Keep the last HISTORY_LIMIT messages, dropping any leading non-user
+    messages so the window still opens with a user turn.
+    """
+    if len(messages) <= HISTORY_LIMIT:
+        return messages
     
-except Exception as e:
-    app_logger.critical(f"❌ Failed to create application layout: {str(e)}", exc_info=True)
-    raise
+    window = messages[-HISTORY_LIMIT:]
+    start = 0
+    while start < len(window) - 1 and window[start].get("role") != "user":
+        start += 1
+    return window[start:]
 
 
 # Enhanced callback for model selection tracking
@@ -186,19 +219,17 @@ def track_model_selection(selected_model):
     """
     
     with LoggedOperation(app_logger, "model_selection_change", 
-                        session_id=SESSION_ID,
-                        selected_model=selected_model,
-                        supports_multiturn=True):
+                        base_extra=BASE_LOG_CONTEXT,
+                        selected_model=selected_model):
         
-        app_logger.info(f"🔄 User changed model to: {selected_model}")
-        api_logger.info(f"Model selection updated: {selected_model}")
+        app_logger.info("🔄 User changed model to: %s", selected_model)
+        api_logger.info("Model selection updated: %s", selected_model)
         
         # Validate model selection
-        valid_models = [model['value'] for model in MODELS]
-        if selected_model not in valid_models:
-            app_logger.warning(f"⚠️ Invalid model selected: {selected_model}, valid options: {valid_models}")
+        if selected_model not in VALID_MODELS:
+            app_logger.warning("⚠️ Invalid model selected: %s, valid options: %s", selected_model, sorted(VALID_MODELS))
         else:
-            app_logger.debug(f"✅ Model selection validated: {selected_model}")
+            app_logger.debug("✅ Model selection validated: %s", selected_model)
         
         return selected_model
 
@@ -207,10 +238,10 @@ def track_model_selection(selected_model):
 @callback(
     Output("chat-component", "messages"),
     Input("chat-component", "new_message"),
-    [State("chat-component", "messages"), State("model-select", "value")],
+    [State("chat-component", "messages"), State("model-select", "value"), State("client-id", "data")],
     prevent_initial_call=True,
 )
-def handle_chat_with_multiturn(new_message, messages, model):
+def handle_chat_with_multiturn(new_message, messages, model, client_id):
     """
     Handle chat messages with integrated Gemini multi-turn function calling and comprehensive logging.
     ENHANCED: Now supports 2-step workflow (data generation → visualization) through multi-turn API calls.
@@ -224,207 +255,179 @@ def handle_chat_with_multiturn(new_message, messages, model):
     - Performance metrics
     """
     
+    # Only user messages trigger a model turn; skip everything else before
+    # any span, logging or list work happens
+    if not new_message:
+        raise PreventUpdate
+    
+    # Unpack the message once; only locals are used from here on
+    message_role = new_message.get("role")
+    if message_role != "user":
+        raise PreventUpdate
+    message_content = new_message.get("content", "")
+    
+    if not model:
+        app_logger.error("❌ No model selected, using default")
+        model = "gemini-2.5-flash"
+    
     # Create unique operation ID for this chat interaction
-    operation_id = str(uuid.uuid4())[:8]
+    operation_id = uuid.uuid4().hex[:8]
     
-    with LoggedOperation(app_logger, "handle_chat_multiturn", 
-                        session_id=SESSION_ID,
-                        operation_id=operation_id, 
-                        model_name=model,
-                        current_message_count=len(messages) if messages else 0,
-                        multiturn_enabled=True):
+    # Every record emitted while handling this turn (helpers and tool threads
+    # included) carries the operation id as correlation_id
+    correlation_token = CORRELATION_ID.set(operation_id)
+    try:
+        with LoggedOperation(app_logger, "handle_chat_multiturn", 
+                            base_extra=BASE_LOG_CONTEXT,
+                            operation_id=operation_id, 
+                            model_name=model,
+                            current_message_count=len(messages) if messages else 0):
         
-        # Log the incoming request details
-        app_logger.info(f"💬 Processing multi-turn chat interaction {operation_id}")
+            message_lower = message_content.lower()  # shared by all keyword scans
         
-        # Validate inputs with detailed logging
-        if not new_message:
-            app_logger.debug("❌ No new message received, returning existing messages")
-            return messages or []
+            # Ensure messages list exists
+            if messages is None:
+                messages = []
         
-        if not model:
-            app_logger.error("❌ No model selected, using default")
-            model = "gemini-2.5-flash"
+            # Add user message to conversation with logging
+            try:
+                # Full history for the model; the browser only receives the new
+                # user/assistant pair as a Patch
+                updated_messages = [*messages, new_message]
+            
+            except Exception as e:
+                app_logger.error("❌ Failed to add user message to conversation: %s", e, exc_info=True)
+                return messages  # Return original messages on error
         
-        # Log message details (truncated for security)
-        message_content = new_message.get("content", "")
-        message_role = new_message.get("role", "unknown")
+            # Pre-processing analysis with specialized loggers
+            phase_start = time.perf_counter()
         
-        app_logger.info(f"📝 New {message_role} message: '{message_content[:100]}{'...' if len(message_content) > 100 else ''}'")
-        app_logger.debug(f"Message length: {len(message_content)} characters")
+            # Analyze request type for better logging context
+            is_chart_request = CHART_REQUEST_RE.search(message_lower) is not None
+            is_complex_request = COMPLEX_REQUEST_RE.search(message_lower) is not None
         
-        # Ensure messages list exists
-        if messages is None:
-            messages = []
-            app_logger.debug("🔧 Initialized empty messages list")
+            # One structured record describes the whole incoming turn
+            app_logger.info(
+                "💬 Turn %s: %s message (%d chars, %d in history) via %s - Chart: %s, Complex: %s",
+                operation_id, message_role, len(message_content), len(updated_messages), model,
+                is_chart_request, is_complex_request,
+                extra={
+                    "operation_id": operation_id,
+                    "message_role": message_role,
+                    "message_length": len(message_content),
+                    "input_message_count": len(updated_messages),
+                    "is_chart_request": is_chart_request,
+                    "is_complex_request": is_complex_request,
+                },
+            )
+            # Message preview (truncated for security)
+            app_logger.debug("📝 Message preview: '%.100s%s'", message_content,
+                             '...' if len(message_content) > 100 else '')
         
-        # Add user message to conversation with logging
-        try:
-            updated_messages = messages + [new_message]
-            app_logger.info(f"✅ Added user message to conversation (total: {len(updated_messages)} messages)")
-            
-        except Exception as e:
-            app_logger.error(f"❌ Failed to add user message to conversation: {str(e)}", exc_info=True)
-            return messages  # Return original messages on error
+            if is_chart_request or is_complex_request:
+                function_logger.info("🎨 Operation %s - Chart request: %s, Complex analysis: %s",
+                                     operation_id, is_chart_request, is_complex_request)
+        
+            app_logger.debug("⏱️ analyze_user_request took %.3fs", time.perf_counter() - phase_start)
         
-        # Process user messages with enhanced multi-turn error handling and logging
-        if new_message["role"] == "user":
+            # Generate response with comprehensive multi-turn error handling
+            try:
+                phase_start = time.perf_counter()
             
-            # Pre-processing analysis with specialized loggers
-            with LoggedOperation(app_logger, "analyze_user_request", 
-                               operation_id=operation_id,
-                               message_length=len(message_content)):
-                
-                # Analyze request type for better logging context
-                is_chart_request = any(keyword in message_content.lower() 
-                                     for keyword in ["chart", "graph", "plot", "visualize", "show"])
-                is_complex_request = any(keyword in message_content.lower() 
-                                       for keyword in ["compare", "analysis", "dashboard", "multiple"])
-                
-                app_logger.info(f"📊 Request analysis - Chart: {is_chart_request}, Complex: {is_complex_request}")
+                # Call the ENHANCED multi-turn response generation function
+                response = generate_chat_response(trim_history(updated_messages), model, client_id)
+                app_logger.debug("⏱️ generate_multiturn_response took %.3fs", time.perf_counter() - phase_start)
+            
+                # Response is always an assistant message tagged with its kind;
+                # the tag is stripped so the browser only gets role/content
+                response_type = response.pop("type")
+            
+                if response_type == "mixed":
+                    # Mixed content response (text + charts) - SUCCESS!
+                    app_logger.info("✅ Multi-turn workflow SUCCESS - Complete visualization created!")
+                    api_logger.info("Multi-turn visualization response received for operation %s", operation_id)
+                    function_logger.info("🎉 2-step workflow completed: Data generation → Chart creation")
                 
-                if is_chart_request:
-                    function_logger.info(f"🎨 Chart/visualization request detected - Multi-turn workflow enabled")
-                    app_logger.info(f"🔄 Preparing for potential 2-step visualization workflow")
+                else:
+                    # Text-only response - could be single-step or error
+                    response_text = response["content"]
+                    response_length = len(response_text)
+                    app_logger.info("✅ Text response generated - Length: %d chars", response_length)
+                    api_logger.info("Text API response received for operation %s", operation_id)
                 
-                if is_complex_request:
-                    function_logger.info(f"🔍 Complex analysis request detected in operation {operation_id}")
+                    # Check if this indicates a workflow issue
+                    response_lower = response_text.lower()
+                    if WORKFLOW_ISSUE_RE.search(response_lower):
+                        app_logger.warning("⚠️ Multi-turn workflow may have failed for operation %s", operation_id)
+                        function_logger.warning("Possible multi-turn workflow failure detected")
             
-            # Generate response with comprehensive multi-turn error handling
-            try:
-                with LoggedOperation(app_logger, "generate_multiturn_response", 
-                                   operation_id=operation_id,
-                                   model_name=model,
-                                   input_message_count=len(updated_messages)):
-                    
-                    app_logger.info(f"🤖 Generating response using {model} with multi-turn support")
-                    api_logger.info(f"Multi-turn API request initiated for operation {operation_id}")
-                    
-                    # Call the ENHANCED multi-turn response generation function
-                    response = generate_chat_response(updated_messages, model)
-                    
-                    # Enhanced response handling for multi-turn results
-                    if isinstance(response, dict):
-                        # Mixed content response (text + charts) - SUCCESS!
-                        app_logger.info(f"✅ Multi-turn workflow SUCCESS - Complete visualization created!")
-                        api_logger.info(f"Multi-turn visualization response received for operation {operation_id}")
-                        function_logger.info(f"🎉 2-step workflow completed: Data generation → Chart creation")
-                        
-                        # Response is already a complete message dictionary
-                        final_messages = updated_messages + [response]
-                        
-                    elif isinstance(response, str):
-                        # Text-only response - could be single-step or error
-                        response_length = len(response)
-                        app_logger.info(f"✅ Text response generated - Length: {response_length} chars")
-                        api_logger.info(f"Text API response received for operation {operation_id}")
-                        
-                        # Check if this indicates a workflow issue
-                        if any(indicator in response.lower() for indicator in 
-                               ["incomplete", "data generated", "need to create"]):
-                            app_logger.warning(f"⚠️ Multi-turn workflow may have failed for operation {operation_id}")
-                            function_logger.warning(f"Possible multi-turn workflow failure detected")
-                        
-                        # Create standard text message
-                        bot_response = {
-                            "role": "assistant", 
-                            "content": response,
-                            "_metadata": {
-                                "operation_id": operation_id,
-                                "model_used": model,
-                                "timestamp": datetime.now().isoformat(),
-                                "response_length": response_length,
-                                "response_type": "text",
-                                "multiturn_workflow": "completed_or_single_step"
-                            }
-                        }
-                    
-                        # Final message list assembly
-                        final_messages = updated_messages + [bot_response]
-                        
-                    else:
-                        # Unexpected response type
-                        app_logger.error(f"Unexpected response type from multi-turn workflow: {type(response)}")
-                        function_logger.error(f"Multi-turn workflow returned unexpected type: {type(response)}")
-                        error_response = {
-                            "role": "assistant",
-                            "content": "I encountered an unexpected error in the multi-turn processing workflow."
-                        }
-                        final_messages = updated_messages + [error_response]                        
-                    
-                    app_logger.info(f"🎉 Multi-turn chat interaction {operation_id} completed successfully")
-                    app_logger.info(f"📊 Final conversation length: {len(final_messages)} messages")
-                    
-                    # Success metrics logging for multi-turn
-                    app_logger.debug(f"✅ Multi-turn operation {operation_id} metrics logged")
-                    
-                    return final_messages
+                # Append only the new turn instead of re-sending the whole history
+                final_messages = Patch()
+                final_messages.append(new_message)
+                final_messages.append(response)
             
+                app_logger.info("🎉 Multi-turn chat interaction %s completed successfully", operation_id)
+                app_logger.info("📊 Final conversation length: %d messages", len(updated_messages) + 1)
+            
+                # Success metrics logging for multi-turn
+                app_logger.debug("✅ Multi-turn operation %s metrics logged", operation_id)
+            
+                return final_messages
+    
             except Exception as e:
                 # Comprehensive error handling with detailed multi-turn logging
-                error_id = str(uuid.uuid4())[:8]
-                
-                app_logger.error(f"❌ Error in multi-turn response generation (Error ID: {error_id}): {str(e)}")
-                app_logger.error(f"🔍 Multi-turn error occurred in operation {operation_id}")
-                api_logger.error(f"Multi-turn API workflow failed for operation {operation_id}: {str(e)}")
-                function_logger.error(f"Multi-turn function calling workflow failed in operation {operation_id}")
-                
-                # Log full stack trace for debugging
-                app_logger.debug(f"📋 Full multi-turn stack trace for error {error_id}:")
-                app_logger.debug(traceback.format_exc())
-                
+                error_id = uuid.uuid4().hex[:8]
+            
+                app_logger.error("❌ Error in multi-turn response generation (Error ID: %s): %s", error_id, e)
+                app_logger.error("🔍 Multi-turn error occurred in operation %s", operation_id)
+                api_logger.error("Multi-turn API workflow failed for operation %s: %s", operation_id, e)
+                function_logger.error("Multi-turn function calling workflow failed in operation %s", operation_id)
+            
+                # Log full stack trace for debugging - formatted only if emitted
+                app_logger.debug("📋 Full multi-turn stack trace for error %s", error_id, exc_info=True)
+            
                 # Create error response for user with multi-turn context
                 error_message = (
                     f"I apologize, but I encountered an error while processing your visualization request "
                     f"using the multi-turn workflow. Please try again or rephrase your question.\n\n"
                     f"Error ID: {error_id} (for support reference)"
                 )
-                
-                app_logger.info(f"🔧 Created user-friendly multi-turn error message for operation {operation_id}")
-                
+            
+                app_logger.info("🔧 Created user-friendly multi-turn error message for operation %s", operation_id)
+            
                 # Log error recovery attempt
                 try:
                     error_response = {"role": "assistant", "content": error_message}
-                    recovery_messages = updated_messages + [error_response]
-                    
-                    app_logger.info(f"🚑 Multi-turn error recovery successful - returning {len(recovery_messages)} messages")
+                    recovery_messages = Patch()
+                    recovery_messages.append(new_message)
+                    recovery_messages.append(error_response)
+                
+                    app_logger.info("🚑 Multi-turn error recovery successful - appending 2 messages (user turn + error reply)")
                     return recovery_messages
-                    
+                
                 except Exception as recovery_error:
-                    app_logger.critical(f"💀 Multi-turn error recovery failed: {str(recovery_error)}", exc_info=True)
+                    app_logger.critical("💀 Multi-turn error recovery failed: %s", recovery_error, exc_info=True)
                     # Last resort: return original messages
                     return messages
-        
-        else:
-            # Handle non-user messages (shouldn't normally happen)
-            app_logger.warning(f"⚠️ Received non-user message with role: {message_role}")
-            app_logger.debug("Returning messages unchanged for non-user message")
-            return updated_messages
 
+    finally:
+        CORRELATION_ID.reset(correlation_token)
 
 # Enhanced application startup logging with multi-turn support
 if __name__ == "__main__":
     
-    with LoggedOperation(app_logger, "application_startup_multiturn", session_id=SESSION_ID):
+    with LoggedOperation(app_logger, "application_startup_multiturn", base_extra=BASE_LOG_CONTEXT):
         
         app_logger.info("🎯 Starting Dash application server with Multi-Turn Function Calling")
-        app_logger.info(f"🌐 Server will be available at: http://localhost:3350")
-        app_logger.info(f"🔧 Debug mode: True")
-        app_logger.info(f"🔑 Session ID: {SESSION_ID}")
-        app_logger.info(f"✨ Multi-Turn Feature: ENABLED")
-        app_logger.info(f"🎨 2-Step Visualization Workflow: ACTIVE")
+        app_logger.info("🌐 Server will be available at: http://localhost:3350")
+        app_logger.info("🔧 Debug mode: True")
+        app_logger.info("🔑 Session ID: %s", SESSION_ID)
+        app_logger.info("✨ Multi-Turn Feature: ENABLED")
+        app_logger.info("🎨 2-Step Visualization Workflow: ACTIVE")
         
         # Log system information for debugging
-        try:
-            import platform
-            import sys
-            
-            app_logger.debug(f"🖥️ System: {platform.system()} {platform.release()}")
-            app_logger.debug(f"🐍 Python: {sys.version}")
-            app_logger.debug(f"📁 Working directory: {os.getcwd()}")
-            
-        except Exception as e:
-            app_logger.debug(f"Could not log system information: {e}")
+        app_logger.debug("🖥️ System: %s", SYSTEM_INFO)
+        app_logger.debug("🐍 Python: %s", PYTHON_VERSION)
         
         try:
             # Start the application with enhanced error handling
@@ -435,9 +438,9 @@ if __name__ == "__main__":
             app_logger.info("⏹️ Multi-turn application stopped by user (Ctrl+C)")
             
         except Exception as e:
-            app_logger.critical(f"💀 Multi-turn application startup failed: {str(e)}", exc_info=True)
+            app_logger.critical("💀 Multi-turn application startup failed: %s", e, exc_info=True)
             raise
             
         finally:
             app_logger.info("👋 Multi-turn application shutdown complete")
-            app_logger.info(f"📊 Multi-turn session {SESSION_ID} ended at {datetime.now().isoformat()}")
\ No newline at end of file
+            app_logger.info("📊 Multi-turn session %s ended at %s", SESSION_ID, datetime.now().isoformat())
\ No newline at end of file
@@ -10,12 +10,26 @@ Now implements multi-turn conversation to solve the 2-step workflow problem.
 Now includes deep debugging to inspect Gemini response structures.
 """
 
-from typing import Union, List, Dict, Any, Optional
-from app_llm import genai_client
+from typing import Union, List, Dict, Any, Generator, Optional, Sequence
+import asyncio
+import contextvars
+import itertools
+import os
+import re
+import tempfile
+import time
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+import orjson
+from app_llm import genai_client, get_data_heavy_config
 from google import genai
+from google.genai import types
+
+from function_declarations import TOOLS_FINGERPRINT
+from response_cache import LLMCache, RESPONSE_CACHE_SEMANTIC
+from data_store import create_data_store
 
 from app_helpers_utils import (
-    get_appropriate_config,
     build_completion_conversation,
     format_conversation_for_gemini,
     execute_function_manually,
@@ -30,7 +44,8 @@ from logger_config import (
     get_api_logger,           # low-level API traffic logger
     get_chart_logger,
     LoggedOperation,
-    FunctionCallTracker
+    FunctionCallTracker,
+    log_sampled_timing
 )
 
 # Initialize specialized loggers
@@ -40,27 +55,83 @@ api_logger = get_api_logger()  # ← used inside build_completion_conversation
 chart_logger = get_chart_logger()
 logger = helpers_logger  # For backward compatibility, used by generate_chat_response
 
+# ----------------------------------------------------------------------
+# Tool classification
+# ----------------------------------------------------------------------
+
+DATA_FUNCTION_NAMES = frozenset({
+    'generate_business_data', 'generate_time_series_data', 'generate_statistical_data',
+    'generate_comparison_data', 'generate_demographic_data', 'generate_performance_data',
+    'generate_financial_data'
+})
+CHART_FUNCTION_NAMES = frozenset({
+    'create_bar_chart', 'create_line_chart', 'create_scatter_plot', 'create_pie_chart',
+    'create_histogram', 'create_heatmap', 'create_box_plot', 'create_area_chart',
+    'create_violin_plot'
+})
+# function name → "data" | "chart"
+FUNC_KIND = {name: "data" for name in DATA_FUNCTION_NAMES} | {name: "chart" for name in CHART_FUNCTION_NAMES}
+
+# Workflow type of a processed turn; ints for comparisons, names for logs
+WF_TEXT_ONLY, WF_INCOMPLETE, WF_COMPLETE = 0, 1, 2
+WF_NAMES = ("text_only", "incomplete", "complete")
+
+# Phrases that mean Gemini stopped after generating data; one compiled
+# alternation scans the response text in a single pass
+INCOMPLETE_WORKFLOW_INDICATORS = (
+    "I generated the data",
+    "data you requested",
+    "⚠️ INCOMPLETE WORKFLOW",
+    "Let me know what type of chart",
+    "I need to create a visualization",
+)
+INCOMPLETE_WORKFLOW_RE = re.compile("|".join(map(re.escape, INCOMPLETE_WORKFLOW_INDICATORS)))
+
 # ----------------------------------------------------------------------
 # Phase-A utilities for large-data handling
 # ----------------------------------------------------------------------
 
 MAX_INLINE_TOKENS = 8_000           # ≈24 KB of JSON; tune as needed
-DATA_CACHE: dict[str, dict] = {}    # maps data_id → full result
+MAX_INLINE_BYTES = MAX_INLINE_TOKENS * 3   # ~3 bytes per token; checked directly on the payload size
+DATA_CACHE = create_data_store()    # maps data_id → orjson bytes of the full result; LRU + disk overflow
+# data_ids never leave the process; seeded from the clock so ids from an
+# earlier run (still in a persisted chat history) are never reused
+DATA_ID_COUNTER = itertools.count(int(time.time() * 1000) << 20)
+TOOL_POOL = ThreadPoolExecutor(max_workers=4, thread_name_prefix="tool")  # parallel data-generation calls
 
+# ----------------------------------------------------------------------
+# Response cache for tool-free turns
+# ----------------------------------------------------------------------
 
-def estimate_token_count(payload: str) -> int:
-    """
-    Very fast, coarse token estimator:
-    • Gemini tokens ~≈ 3-4 characters each for ASCII JSON.
-    • We divide the character count by 3 to stay on the safe side.
+EMBEDDING_MODEL = "gemini-embedding-001"
+TOOLS_SIGNATURE = TOOLS_FINGERPRINT  # changes with any tool schema or system instruction edit
 
-    Args:
-        payload: JSON-encoded string.
 
-    Returns:
-        Rough token count (int).
+def embed_text(text: str) -> list[float]:
+    """Embed a user message for the semantic tier of the response cache."""
+    result = genai_client.models.embed_content(model=EMBEDDING_MODEL, contents=text)
+    return result.embeddings[0].values
+
+
+RESPONSE_CACHE = LLMCache(embed_fn=embed_text if RESPONSE_CACHE_SEMANTIC else None)
+
+FALLBACK_REPLY = "I've processed your request, but encountered an issue generating the response."
+
+# (client id, cache key) → Future of the turn currently computing it
+INFLIGHT: dict[tuple[str, str], Future] = {}
+INFLIGHT_LOCK = threading.Lock()
+INFLIGHT_WAIT_TIMEOUT = 90  # seconds a duplicate waits before running the turn itself
+
+
+def cache_response_parts(response: types.GenerateContentResponse) -> types.GenerateContentResponse:
+    """
+    Read response.function_calls / response.text once and keep them on the
+    response; both properties walk the candidate parts on every access.
     """
-    return len(payload) // 3
+    if not hasattr(response, "_fc_cached"):
+        response._fc_cached = tuple(response.function_calls or ())
+        response._text_cached = response.text or ""
+    return response
 
 
 def attach_function_message(
@@ -72,51 +143,133 @@ def attach_function_message(
     Inject a 'function'-role message into the conversation that represents
     the output of a data-generation tool call.
 
-    * If the JSON is small enough (≤ MAX_INLINE_TOKENS) we inline it.
-    * Otherwise we store it in DATA_CACHE and send a lightweight
-      { "data_id": "<uuid>" } stub instead.
+    * If the JSON is small enough (< MAX_INLINE_BYTES) we inline it.
+    * Otherwise we store the encoded bytes in DATA_CACHE and send a lightweight
+      { "data_id": "d<hex>" } stub instead.
 
     Args:
         conv:       The conversation list to mutate.
         fn_name:    Name of the function that produced `result`.
         result:     Dict returned by manual execution.
     """
-    import json
-    import uuid
+    payload = orjson.dumps(result, option=orjson.OPT_SERIALIZE_NUMPY)   # compact UTF-8 bytes
 
-    payload = json.dumps(result, separators=(",", ":"))
-
-    if estimate_token_count(payload) < MAX_INLINE_TOKENS:
+    if len(payload) < MAX_INLINE_BYTES:
         conv.append({
             "role": "function",
             "name": fn_name,
-            "content": payload,
+            "content": payload.decode(),
         })
     else:
-        data_id = uuid.uuid4().hex
-        DATA_CACHE[data_id] = result
+        data_id = f"d{next(DATA_ID_COUNTER):x}"
+        DATA_CACHE.put(data_id, payload)
         conv.append({
             "role": "function",
             "name": fn_name,
-            "content": json.dumps({"data_id": data_id}),
+            "content": orjson.dumps({"data_id": data_id}).decode(),
         })
 
 
-def generate_chat_response(conversation: list, model: str = "gemini-2.5-flash") -> str:
+def generate_chat_response(
+    conversation: list,
+    model: str = "gemini-2.5-flash",
+    client_id: Optional[str] = None
+) -> Dict[str, Any]:
     """
     High-level orchestrator:
       1) send initial request
       2) process response + manual tool execution
       3) if workflow incomplete → build completion turn and call Gemini again
-      4) return final text (or chart response) to caller
+      4) return the final assistant message to caller
+
+    Args:
+        client_id: Browser/page id; identical requests from the same client
+                   are coalesced into one model turn. None disables coalescing.
+
+    Returns:
+        An assistant message dict tagged with its kind:
+        {"role": "assistant", "content": ..., "type": "mixed" | "text"}.
+        "mixed" content holds text + chart parts; "text" content is a str.
+    """
+    # ---- Cached answer for an identical / near-identical question ----------
+    cache_key, scope, query_text = LLMCache.request_keys(model, conversation, TOOLS_SIGNATURE)
+    cached, query_embedding = RESPONSE_CACHE.lookup(cache_key, model, query_text, scope)
+    if cached is not None:
+        logger.info("Returning cached response for model %s", model)
+        return cached
+
+    def run_and_store() -> Dict[str, Any]:
+        message, cacheable = run_chat_turns(conversation, model)
+        if cacheable:
+            RESPONSE_CACHE.put(cache_key, model, message, query_text, scope, query_embedding)
+        return message
+
+    if client_id is None:
+        return run_and_store()
+
+    # ---- Coalesce with an identical request that is already running -------
+    # (double-fired callbacks, repeated Send clicks from the same client)
+    inflight_key = (client_id, cache_key)
+    with INFLIGHT_LOCK:
+        pending = INFLIGHT.get(inflight_key)
+        is_leader = pending is None
+        if is_leader:
+            pending = INFLIGHT[inflight_key] = Future()
+
+    if not is_leader:
+        logger.info("Joining in-flight request for model %s", model)
+        try:
+            return dict(pending.result(timeout=INFLIGHT_WAIT_TIMEOUT))
+        except FutureTimeoutError:
+            logger.warning("In-flight request still running after %ss; running this one separately",
+                           INFLIGHT_WAIT_TIMEOUT)
+            return run_and_store()
+
+    try:
+        message = run_and_store()
+        pending.set_result(message)
+    except BaseException as e:
+        pending.set_exception(e)
+        raise
+    finally:
+        with INFLIGHT_LOCK:
+            INFLIGHT.pop(inflight_key, None)
+
+    # Callers may mutate what they get back (app.py pops "type"), so nobody
+    # receives the shared object
+    return dict(message)
+
+
+def run_chat_turns(conversation: list, model: str) -> tuple[Dict[str, Any], bool]:
+    """
+    The two-turn workflow behind generate_chat_response (no cache lookup, no
+    coalescing). Returns the tagged assistant message and whether it may be
+    cached: only tool-free answers are repeatable, generated data/charts are random.
+    """
+    # Private copies: formatting memoises onto the messages, and the caller's
+    # dicts go back to the browser
+    workflow = chat_workflow([dict(msg) for msg in conversation])
+    request = next(workflow)
+    try:
+        while True:
+            request = workflow.send(make_gemini_api_call(request, model))
+    except StopIteration as done:
+        return done.value
+
+
+def chat_workflow(conversation: list) -> Generator[list, types.GenerateContentResponse, tuple[Dict[str, Any], bool]]:
+    """
+    Turn logic shared by the interactive and batch paths, independent of how
+    Gemini is called: yields each conversation to send, is sent its response,
+    and returns (tagged assistant message, cacheable).
     """
     # ---- First turn --------------------------------------------------------
-    response_1 = make_gemini_api_call(conversation, model)
+    response_1 = yield conversation
     parsed_1   = process_gemini_response(response_1, workflow_logger=logger)
 
     # ---- Happy path: got chart in first turn ------------------------------
-    if parsed_1["workflow_type"] == "complete":
-        return parsed_1["text"]
+    if parsed_1["workflow_type_int"] == WF_COMPLETE:
+        return {**parsed_1["text"], "type": "mixed"}, False
 
     # ---- Second turn (completion) -----------------------------------------
     completion_conv = build_completion_conversation(
@@ -125,15 +278,166 @@ def generate_chat_response(conversation: list, model: str = "gemini-2.5-flash")
         function_messages = parsed_1["function_messages"],
         assistant_reply   = parsed_1["text"]
     )
-    response_2 = make_gemini_api_call(completion_conv, model)
+    response_2 = yield completion_conv
     parsed_2   = process_gemini_response(response_2, workflow_logger=logger)
 
     # ---- Fallback if still incomplete -------------------------------------
-    if parsed_2["workflow_type"] == "complete":
-        return parsed_2["text"]
+    if parsed_2["workflow_type_int"] == WF_COMPLETE:
+        return {**parsed_2["text"], "type": "mixed"}, False
 
     # Final fallback – text only
-    return parsed_2["text"] or "I've processed your request, but encountered an issue generating the response."
+    text = parsed_2["text"] or FALLBACK_REPLY
+    message = {"role": "assistant", "content": text, "type": "text"}
+    cacheable = (parsed_1["workflow_type_int"] == WF_TEXT_ONLY
+                 and parsed_2["workflow_type_int"] == WF_TEXT_ONLY
+                 and bool(parsed_2["text"]))
+    return message, cacheable
+
+
+async def generate_chat_response_async(
+    conversation: list,
+    model: str = "gemini-2.5-flash",
+    client_id: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Async counterpart of generate_chat_response for asyncio callers.
+    Runs the sync orchestrator in a worker thread so the event loop is never
+    blocked; cache lookup, coalescing and both turns are shared with it.
+    """
+    return await asyncio.to_thread(generate_chat_response, conversation, model, client_id)
+
+
+# ----------------------------------------------------------------------
+# Batch mode for non-interactive callers (evaluations, bulk refreshes)
+# ----------------------------------------------------------------------
+
+BATCH_POLL_INTERVAL = 30   # seconds between batch job status checks
+BATCH_MAX_WAIT = 24 * 3600  # seconds before an unfinished batch job is cancelled
+BATCH_DONE_STATES = frozenset({
+    "JOB_STATE_SUCCEEDED", "JOB_STATE_FAILED", "JOB_STATE_CANCELLED", "JOB_STATE_EXPIRED"
+})
+
+
+def build_batch_request(messages: List[Dict], config: types.GenerateContentConfig) -> Dict[str, Any]:
+    """Translate a conversation + generation config into a Batch API request body."""
+    request = {
+        "contents": format_conversation_for_gemini(messages),
+        "generationConfig": {
+            "temperature": config.temperature,
+            "maxOutputTokens": config.max_output_tokens,
+        },
+    }
+    if config.tools:
+        request["tools"] = [tool.model_dump(mode="json", exclude_none=True, by_alias=True) for tool in config.tools]
+    if config.system_instruction:
+        request["systemInstruction"] = {"parts": [{"text": config.system_instruction}]}
+    if config.cached_content:
+        request["cachedContent"] = config.cached_content
+    return request
+
+
+def run_gemini_batch(
+    requests: List[Dict],
+    model_name: str,
+    max_wait: float = BATCH_MAX_WAIT
+) -> List[Optional[types.GenerateContentResponse]]:
+    """
+    Submit `requests` as one file-backed batch job, wait for it and return the
+    responses in input order (None where the individual request failed).
+    A job still running after `max_wait` seconds is cancelled and TimeoutError raised.
+    """
+    with LoggedOperation(api_logger, "gemini_batch_call",
+                        model_name=model_name,
+                        request_count=len(requests)):
+
+        with tempfile.NamedTemporaryFile("wb", suffix=".jsonl", delete=False) as fh:
+            for i, request in enumerate(requests):
+                fh.write(orjson.dumps({"key": f"req_{i}", "request": request}))
+                fh.write(b"\n")
+        try:
+            uploaded = genai_client.files.upload(
+                file=fh.name,
+                config=types.UploadFileConfig(display_name="chat-batch", mime_type="jsonl")
+            )
+        finally:
+            os.unlink(fh.name)
+
+        batch_job = genai_client.batches.create(model=model_name, src={"file_name": uploaded.name})
+        api_logger.info("Submitted batch job %s with %d requests", batch_job.name, len(requests))
+
+        deadline = time.monotonic() + max_wait
+        while batch_job.state.name not in BATCH_DONE_STATES:
+            if time.monotonic() >= deadline:
+                genai_client.batches.cancel(name=batch_job.name)
+                raise TimeoutError(f"Batch job {batch_job.name} not done after {max_wait}s; cancelled")
+            time.sleep(BATCH_POLL_INTERVAL)
+            batch_job = genai_client.batches.get(name=batch_job.name)
+
+        if batch_job.state.name != "JOB_STATE_SUCCEEDED":
+            raise RuntimeError(f"Batch job {batch_job.name} ended in state {batch_job.state.name}")
+
+        responses: List[Optional[types.GenerateContentResponse]] = [None] * len(requests)
+        raw = genai_client.files.download(file=batch_job.dest.file_name)
+        for line in raw.splitlines():
+            if not line.strip():
+                continue
+            item = orjson.loads(line)
+            index = int(item["key"].removeprefix("req_"))
+            if "response" in item:
+                responses[index] = cache_response_parts(
+                    types.GenerateContentResponse.model_validate(item["response"])
+                )
+            else:
+                api_logger.warning("Batch request %s failed: %s", item["key"], item.get("error"))
+
+        api_logger.info("Batch job %s completed", batch_job.name)
+        return responses
+
+
+def generate_chat_response_batch(
+    conversations: List[List[Dict]],
+    model: str = "gemini-2.5-flash",
+    max_wait: float = BATCH_MAX_WAIT
+) -> List[Dict[str, Any]]:
+    """
+    Batch counterpart of generate_chat_response for non-interactive callers.
+    Each workflow turn goes through the Gemini Batch API (cheaper, higher rate
+    limits, minutes-to-hours latency) as one job for every conversation still
+    running; the turn logic is chat_workflow, shared with the interactive path.
+
+    Args:
+        max_wait: Seconds each batch job may run before it is cancelled.
+
+    Returns:
+        One assistant message per conversation, tagged like generate_chat_response.
+    """
+    workflows = [chat_workflow([dict(msg) for msg in conv]) for conv in conversations]
+    pending = {i: next(workflow) for i, workflow in enumerate(workflows)}
+    results: List[Optional[Dict[str, Any]]] = [None] * len(workflows)
+
+    while pending:
+        config = get_data_heavy_config(model)
+        indices = list(pending)
+        responses = run_gemini_batch(
+            [build_batch_request(pending[i], config) for i in indices], model, max_wait
+        )
+        pending = {}
+        for i, response in zip(indices, responses):
+            if response is None:
+                workflows[i].close()
+                continue
+            try:
+                pending[i] = workflows[i].send(response)
+            except StopIteration as done:
+                results[i] = done.value[0]
+
+    return [
+        message if message is not None else {"role": "assistant", "content": FALLBACK_REPLY, "type": "text"}
+        for message in results
+    ]
+
+
+EMPTY_PARTS = ({},)   # shared default for formatted messages without parts
 
 
 def make_gemini_api_call(
@@ -146,136 +450,131 @@ def make_gemini_api_call(
     ENHANCED: Now includes deep debugging for completion calls.
     """
     
-    with LoggedOperation(api_logger, "gemini_api_call",
-                        model_name=model_name,
-                        message_count=len(messages),
-                        call_type="completion" if is_completion_call else "initial"):
+    start_ns = time.perf_counter_ns()
+    
+    try:
+        # Log request details
+        latest_message = messages[-1]["content"] if messages else ""
+        helpers_logger.info("Processing request: %.200s...", latest_message)
         
-        try:
-            # Log request details
-            latest_message = messages[-1]["content"] if messages else ""
-            helpers_logger.info(f"Processing request: {latest_message[:200]}...")
-            
-            # Format the conversation history for Gemini
-            helpers_logger.debug("Formatting conversation for Gemini API")
-            formatted_messages = format_conversation_for_gemini(messages)
-            
-            # Choose appropriate configuration
-            config = get_appropriate_config(messages, is_completion_call)
-            
-            # ENHANCED DEBUGGING: Log what we're sending to Gemini in completion calls
-            if is_completion_call:
-                api_logger.debug(f"🔍 COMPLETION CALL - Request details:")
-                api_logger.debug(f"🔍 Model: {model_name}")
-                api_logger.debug(f"🔍 Messages count: {len(formatted_messages) if len(messages) > 1 else 1}")
-                
-                if len(messages) > 1:
-                    # Multi-turn - log the conversation we're sending
-                    for i, msg in enumerate(formatted_messages):
-                        msg_role = msg.get('role', 'unknown')
-                        msg_content = str(msg.get('parts', [{}])[0].get('text', ''))[:200]
-                        api_logger.debug(f"🔍 Message {i+1} ({msg_role}): {msg_content}...")
-                else:
-                    # Single message
-                    api_logger.debug(f"🔍 Single message content: {messages[0]['content'][:200]}...")
-                
-                # Log the config being used
-                api_logger.debug(f"🔍 Config tools count: {len(config.tools) if hasattr(config, 'tools') and config.tools else 0}")
-                api_logger.debug(f"🔍 Config max calls: {config.automatic_function_calling.maximum_remote_calls if hasattr(config, 'automatic_function_calling') else 'Unknown'}")
-                api_logger.debug(f"🔍 Config system instruction length: {len(config.system_instruction) if hasattr(config, 'system_instruction') and config.system_instruction else 0}")
-            
-            api_logger.info(f"Making {'completion' if is_completion_call else 'initial'} API call")
+        # Format the conversation history for Gemini
+        helpers_logger.debug("Formatting conversation for Gemini API")
+        formatted_messages = format_conversation_for_gemini(messages)
+        
+        # Choose appropriate configuration
+        config = get_data_heavy_config(model_name)
+        
+        # Debug output is only assembled when someone will read it
+        debug_enabled = is_completion_call and api_logger.isEnabledFor(logging.DEBUG)
+        
+        # ENHANCED DEBUGGING: Log what we're sending to Gemini in completion calls
+        if debug_enabled:
+            api_logger.debug("🔍 COMPLETION CALL - Request details:")
+            api_logger.debug("🔍 Model: %s", model_name)
+            api_logger.debug("🔍 Messages count: %d", len(formatted_messages) if len(messages) > 1 else 1)
             
-            if len(messages) == 1:
-                # Single message - use simple content format
-                api_logger.debug("Using single message format")
-                response = genai_client.models.generate_content(
-                    model=model_name,
-                    contents=messages[0]["content"],
-                    config=config
-                )
+            if len(messages) > 1:
+                # Multi-turn - log the conversation we're sending
+                for i, msg in enumerate(formatted_messages, 1):
+                    msg_role = msg.get('role', 'unknown')
+                    msg_content = (msg.get('parts') or EMPTY_PARTS)[0].get('text', '')
+                    api_logger.debug("🔍 Message %d (%s): %.200s...", i, msg_role, msg_content)
             else:
-                # Multi-turn conversation - use formatted conversation history
-                api_logger.debug(f"Using multi-turn format with {len(formatted_messages)} messages")
-                response = genai_client.models.generate_content(
-                    model=model_name,
-                    contents=formatted_messages,
-                    config=config
-                )
+                # Single message
+                api_logger.debug("🔍 Single message content: %.200s...", messages[0]['content'])
             
-            api_logger.info("API call completed successfully")
+            # Log the config being used
+            api_logger.debug("🔍 Config tools count: %d", len(config.tools) if getattr(config, 'tools', None) else 0)
+            api_logger.debug("🔍 Config max calls: %s", config.automatic_function_calling.maximum_remote_calls if getattr(config, 'automatic_function_calling', None) else 'Unknown')
+            api_logger.debug("🔍 Config system instruction length: %d", len(config.system_instruction) if getattr(config, 'system_instruction', None) else 0)
+        
+        api_logger.info("Making %s API call", 'completion' if is_completion_call else 'initial')
+        
+        if len(messages) == 1:
+            # Single message - use simple content format
+            api_logger.debug("Using single message format")
+            response = genai_client.models.generate_content(
+                model=model_name,
+                contents=messages[0]["content"],
+                config=config
+            )
+        else:
+            # Multi-turn conversation - use formatted conversation history
+            api_logger.debug("Using multi-turn format with %d messages", len(formatted_messages))
+            response = genai_client.models.generate_content(
+                model=model_name,
+                contents=formatted_messages,
+                config=config
+            )
+        
+        api_logger.info("API call completed successfully")
+        cache_response_parts(response)
+        
+        # ENHANCED DEBUGGING: Inspect response structure for completion calls
+        if debug_enabled:
+            api_logger.debug("🔍 COMPLETION CALL - Response inspection:")
+            api_logger.debug("🔍 Response type: %s", type(response))
+            api_logger.debug("🔍 Has text: %s", hasattr(response, 'text'))
+            api_logger.debug("🔍 Has function_calls: %s", hasattr(response, 'function_calls'))
             
-            # ENHANCED DEBUGGING: Inspect response structure for completion calls
-            if is_completion_call:
-                api_logger.debug(f"🔍 COMPLETION CALL - Response inspection:")
-                api_logger.debug(f"🔍 Response type: {type(response)}")
-                api_logger.debug(f"🔍 Has text: {hasattr(response, 'text')}")
-                api_logger.debug(f"🔍 Has function_calls: {hasattr(response, 'function_calls')}")
-                
-                if hasattr(response, 'function_calls'):
-                    fc = response.function_calls
-                    api_logger.debug(f"🔍 function_calls object: {fc}")
-                    api_logger.debug(f"🔍 function_calls bool value: {bool(fc)}")
-                    
-                # Check SDK HTTP response for raw data
-                if hasattr(response, 'sdk_http_response'):
-                    sdk_resp = response.sdk_http_response
-                    api_logger.debug(f"🔍 SDK HTTP status: {sdk_resp.status_code if hasattr(sdk_resp, 'status_code') else 'Unknown'}")
-                    api_logger.debug(f"🔍 SDK HTTP headers: {dict(sdk_resp.headers) if hasattr(sdk_resp, 'headers') else 'Unknown'}")
+            fc = response._fc_cached
+            api_logger.debug("🔍 function_calls object: %s", fc)
+            api_logger.debug("🔍 function_calls bool value: %s", bool(fc))
                 
-                # Check usage metadata
-                if hasattr(response, 'usage_metadata'):
-                    usage = response.usage_metadata
-                    api_logger.debug(f"🔍 Usage metadata: {usage}")
-            
-            return response
+            # Check SDK HTTP response for raw data
+            sdk_resp = getattr(response, 'sdk_http_response', None)
+            if sdk_resp is not None:
+                api_logger.debug("🔍 SDK HTTP status: %s", getattr(sdk_resp, 'status_code', 'Unknown'))
+                api_logger.debug("🔍 SDK HTTP headers: %s", getattr(sdk_resp, 'headers', 'Unknown'))
             
-        except Exception as e:
-            api_logger.error(f"API call failed: {str(e)}", exc_info=True)
-            raise
+            # Check usage metadata
+            if hasattr(response, 'usage_metadata'):
+                api_logger.debug("🔍 Usage metadata: %s", response.usage_metadata)
+        
+        log_sampled_timing(api_logger, "gemini_api_call", start_ns,
+                           model_name=model_name,
+                           message_count=len(messages),
+                           call_type="completion" if is_completion_call else "initial")
+        return response
+        
+    except Exception as e:
+        api_logger.error("API call failed: %s", e, exc_info=True,
+                         extra={'model_name': model_name, 'duration_ns': time.perf_counter_ns() - start_ns})
+        raise
 
-def is_incomplete_visualization_workflow(processed_response, gemini_response) -> bool:
+def is_incomplete_visualization_workflow(processed_response, function_calls: Sequence[types.FunctionCall]) -> bool:
     """
     Detect if response has data but no visualization.
+    `function_calls` is parsed["function_calls_cached"] from process_gemini_response.
     """
     
-    with LoggedOperation(function_logger, "detect_incomplete_workflow"):
+    # Check if response is text-only and indicates incomplete workflow
+    if isinstance(processed_response, str):
+        has_incomplete_text = INCOMPLETE_WORKFLOW_RE.search(processed_response) is not None
         
-        # Check if response is text-only and indicates incomplete workflow
-        if isinstance(processed_response, str):
-            incomplete_indicators = [
-                "I generated the data",
-                "data you requested", 
-                "⚠️ INCOMPLETE WORKFLOW",
-                "Let me know what type of chart",
-                "I need to create a visualization"
-            ]
-            
-            has_incomplete_text = any(indicator in processed_response for indicator in incomplete_indicators)
-            
-            if has_incomplete_text:
-                function_logger.info("🚨 Incomplete workflow detected from response text")
-                return True
+        if has_incomplete_text:
+            function_logger.info("🚨 Incomplete workflow detected from response text")
+            return True
+    
+    # Check if we have data generation function calls but no chart function calls
+    if function_calls:
+        data_functions = 0
+        chart_functions = 0
         
-        # Check if we have data generation function calls but no chart function calls
-        if hasattr(gemini_response, 'function_calls') and gemini_response.function_calls:
-            data_functions = 0
-            chart_functions = 0
+        for func_call in function_calls:
+            kind = FUNC_KIND.get(getattr(func_call, 'name', ''))
             
-            for func_call in gemini_response.function_calls:
-                function_name = getattr(func_call, 'name', '')
-                
-                if is_data_generation_function(function_name):
-                    data_functions += 1
-                elif is_chart_creation_function(function_name):
-                    chart_functions += 1
-            
-            if data_functions > 0 and chart_functions == 0:
-                function_logger.info(f"🚨 Incomplete workflow: {data_functions} data functions, {chart_functions} chart functions")
-                return True
+            if kind == "data":
+                data_functions += 1
+            elif kind == "chart":
+                chart_functions += 1
         
-        function_logger.debug("Workflow appears complete")
-        return False
+        if data_functions > 0 and chart_functions == 0:
+            function_logger.info("🚨 Incomplete workflow: %d data functions, %d chart functions", data_functions, chart_functions)
+            return True
+    
+    function_logger.debug("Workflow appears complete")
+    return False
 
 def process_gemini_response(
     response: "genai.GenerateContentResponse",
@@ -287,82 +586,86 @@ def process_gemini_response(
         • 'data_results'         – list of data-gen payloads
         • 'chart_results'        – list of Plotly figure dicts
         • 'workflow_type'        – 'complete' | 'incomplete' | 'text_only'
+        • 'workflow_type_int'    – the same as WF_COMPLETE | WF_INCOMPLETE | WF_TEXT_ONLY
         • 'function_messages'    – conversation snippets to expose tool output
+        • 'function_calls_cached'– the response's function calls, read once
     """
-    from google.genai.types import FunctionCall  # local import
-    import json
-
-    _log = (lambda m: workflow_logger.debug(m)) if workflow_logger else (lambda *_: None)
+    debug_log = workflow_logger if workflow_logger and workflow_logger.isEnabledFor(logging.DEBUG) else None
 
-    text_content        = response.text or ""
+    cache_response_parts(response)
+    function_calls      = response._fc_cached
+    text_content        = response._text_cached
     data_results        : list = []
     chart_results       : list = []
     function_messages   : list = []
 
+    has_data  = False
+    has_chart = False
+
     # ------------------------------------------------------------
-    # 1.  Execute any function calls that Gemini returned
+    # 1.  Execute any function calls that Gemini returned,
+    #     classifying each result as it comes back.
+    #     Data generators are independent of each other, so several
+    #     of them run on TOOL_POOL; chart calls stay serial after them.
     # ------------------------------------------------------------
-    for call in (response.function_calls or []):
-        if not isinstance(call, FunctionCall):
+    data_calls  = []
+    other_calls = []
+    for call in function_calls:
+        if not isinstance(call, types.FunctionCall):
             continue
+        if debug_log:
+            debug_log.debug("⇢ executing %s(%s)", call.name, call.args or {})
+        (data_calls if FUNC_KIND.get(call.name) == "data" else other_calls).append(call)
+
+    if len(data_calls) > 1:
+        futures = [
+            (TOOL_POOL.submit(contextvars.copy_context().run, execute_function_manually, call.name, call.args or {}),
+             call.name)
+            for call in data_calls
+        ]
+        data_outputs = [(fn_name, future.result()) for future, fn_name in futures]
+    else:
+        data_outputs = [(call.name, execute_function_manually(call.name, call.args or {})) for call in data_calls]
 
-        fn_name  = call.name
-        fn_args  = call.args or {}
-        _log(f"⇢ executing {fn_name}({fn_args})")
-
-        result = execute_function_manually(fn_name, fn_args)
+    for fn_name, result in data_outputs:
+        has_data = True
+        data_results.append(result)
+        attach_function_message(function_messages, fn_name, result)
 
-        if is_data_generation_function(fn_name):
-            data_results.append(result)
-            attach_function_message(function_messages, fn_name, result)
-        elif is_chart_creation_function(fn_name):
+    for call in other_calls:
+        result = execute_function_manually(call.name, call.args or {})
+        if FUNC_KIND.get(call.name) == "chart":
+            has_chart = True
             chart_results.append(result)
 
     # ------------------------------------------------------------
-    # 2.  Decide what kind of turn we just processed
+    # 2.  Decide the turn type and build the payload in one step
     #     (Fix A – chart ⇒ complete even without data repetition)
     # ------------------------------------------------------------
-    if chart_results:               # at least one visualisation created
-        workflow_type = "complete"
-    elif data_results:              # only data so far
-        workflow_type = "incomplete"
-    else:                           # text only
-        workflow_type = "text_only"
-
-    # ------------------------------------------------------------
-    # 3.  Build the payload that the caller should send back
-    # ------------------------------------------------------------
-    if chart_results:                                             # Fix B
-        if not text_content.strip():
+    if has_chart:                   # at least one visualisation created
+        workflow_int = WF_COMPLETE
+        if not text_content.strip():                              # Fix B
             text_content = "Here’s the visualisation you requested:"
-        mixed_msg = create_mixed_content_message(text_content, chart_results)
-        text_field = mixed_msg                                    # Fix C
+        text_field = create_mixed_content_message(text_content, chart_results)  # Fix C
     else:
+        workflow_int = WF_INCOMPLETE if has_data else WF_TEXT_ONLY
         text_field = text_content.strip()
 
     return {
         "text"             : text_field,
         "data_results"     : data_results,
         "chart_results"    : chart_results,
-        "workflow_type"    : workflow_type,
+        "workflow_type"    : WF_NAMES[workflow_int],
+        "workflow_type_int": workflow_int,
         "function_messages": function_messages,
+        "function_calls_cached": function_calls,
     }
 
 # Helper functions...
 def is_data_generation_function(function_name: str) -> bool:
     """Check if a function is a data generation function."""
-    data_functions = [
-        'generate_business_data', 'generate_time_series_data', 'generate_statistical_data',
-        'generate_comparison_data', 'generate_demographic_data', 'generate_performance_data',
-        'generate_financial_data'
-    ]
-    return function_name in data_functions
+    return function_name in DATA_FUNCTION_NAMES
 
 def is_chart_creation_function(function_name: str) -> bool:
     """Check if a function is a chart creation function."""
-    chart_functions_list = [
-        'create_bar_chart', 'create_line_chart', 'create_scatter_plot', 'create_pie_chart',
-        'create_histogram', 'create_heatmap', 'create_box_plot', 'create_area_chart',
-        'create_violin_plot'
-    ]
-    return function_name in chart_functions_list
+    return function_name in CHART_FUNCTION_NAMES
@@ -8,11 +8,14 @@ Enhanced with detailed logging and debugging capabilities.
 This module is designed to support app_helpers.py.
 """
 
-from typing import Union, List, Dict, Any, Optional
+from typing import Union, List, Dict, Any, Optional, Sequence
 from app_llm import GENERATION_CONFIG, DATA_HEAVY_CONFIG
-import chart_functions
+import logging
+import re
+from contextlib import nullcontext
 import data_generators
-import json
+from function_declarations import ARG_VALIDATORS, FUNCTION_MAP
+from pydantic import ValidationError
 
 # Enhanced logging imports
 from logger_config import (
@@ -30,20 +33,7 @@ function_logger = get_function_call_logger()
 api_logger = get_api_logger()
 chart_logger = get_chart_logger()
 
-def get_appropriate_config(messages: List[Dict], is_completion_call: bool):
-    """
-    Always returns the DATA_HEAVY_CONFIG configuration.
-    """
-    
-    return DATA_HEAVY_CONFIG
-
-def get_completion_system_instruction() -> str:
-    """
-    Get the system instruction for completion calls.
-    ENHANCED: More explicit about data structures and function requirements.
-    """
-    
-    return """You are in a completion step of a 2-step visualization workflow.
+COMPLETION_SYSTEM_INSTRUCTION = """You are in a completion step of a 2-step visualization workflow.
 
 CONTEXT: You have already generated data in a previous step. Now you MUST create a visualization using that data.
 
@@ -72,8 +62,16 @@ IMPORTANT DATA STRUCTURE NOTES:
 CRITICAL: You MUST call a chart creation function. Do not return only text.
 Look at the conversation context to understand what data is available and create an appropriate visualization."""
 
+def get_completion_system_instruction() -> str:
+    """
+    Get the system instruction for completion calls.
+    ENHANCED: More explicit about data structures and function requirements.
+    """
+    
+    return COMPLETION_SYSTEM_INSTRUCTION
+
 def build_completion_conversation(
-    conversation      : list,
+    conversation      : Sequence[Dict],
     workflow_type     : str,
     function_messages : list | None = None,
     assistant_reply   : str | None = None
@@ -86,22 +84,22 @@ def build_completion_conversation(
         • Reinsert Gemini's own step-1 reply (assistant role)
         • Expose the tool output via function-role messages
         • Finish with a user prompt that forces the chart call    
+    `conversation` (list or tuple) is never mutated; a fresh list is returned
+    that shares the existing message dicts (and their _formatted entries).
     """
-    import copy
-
-    conv = copy.deepcopy(conversation)
+    extras = []
 
     # 0)Re-add the assistant text so Gemini has continuity
     if assistant_reply:
-        conv.append({"role": "assistant", "content": assistant_reply.strip()})
+        extras.append({"role": "assistant", "content": assistant_reply.strip()})
 
     # 1) expose tool results, if any ----------------------------------------
     if function_messages:
-        conv.extend(function_messages)
+        extras.extend(function_messages)
 
     # 2) user prompt that forces the next step ------------------------------
     if workflow_type == "incomplete":
-        conv.append({
+        extras.append({
             "role": "user",
             "content": (
                 "You have generated the required dataset. "
@@ -111,136 +109,181 @@ def build_completion_conversation(
             )
         })
 
-    return conv
+    return [*conversation, *extras]
 
 
-def convert_gemini_response_to_message(gemini_response, processed_response) -> Dict:
+def extract_function_calls(gemini_response) -> tuple:
+    """
+    Read a response's function calls once as plain ((name, args), ...) pairs,
+    so the helpers below never touch the SDK objects themselves.
+    """
+    function_calls = getattr(gemini_response, '_fc_cached', None)
+    if function_calls is None:
+        function_calls = getattr(gemini_response, 'function_calls', None) or ()
+    return tuple((getattr(fc, 'name', '') or '', getattr(fc, 'args', None) or {}) for fc in function_calls)
+
+def convert_gemini_response_to_message(function_calls_info: tuple, processed_response) -> Dict:
     """
     Convert Gemini response to message format, preserving all attributes.
     ENHANCED: Better context building for statistical data.
+    `function_calls_info` comes from extract_function_calls(response).
     """
     
     # Start with the processed response text
     content = processed_response if isinstance(processed_response, str) else "I generated data for your request."
     
     # Add function call context if present
-    if hasattr(gemini_response, 'function_calls') and gemini_response.function_calls:
-        function_names = [getattr(fc, 'name', 'unknown') for fc in gemini_response.function_calls]
-        function_context = f" I executed the following functions: {', '.join(function_names)}."
+    if function_calls_info:
+        # One pass collects the names and the per-function data context
+        function_names = []
+        context_parts = []
 
         # ENHANCED: Add data context for better completion prompting
-        for func_call in gemini_response.function_calls:
-            function_name = getattr(func_call, 'name', '')
+        for function_name, function_args in function_calls_info:
+            function_names.append(function_name or 'unknown')
             
             # For statistical data, mention the data characteristics
             if function_name == 'generate_statistical_data':
-                if hasattr(func_call, 'args'):
-                    distribution = func_call.args.get('distribution', 'unknown')
-                    size = func_call.args.get('size', 'unknown')
-                    function_context += f" Generated {size} data points with {distribution} distribution. This data is ready for histogram visualization to show the distribution pattern. The data is stored in a 'data' field containing numerical values."
+                distribution = function_args.get('distribution', 'unknown')
+                size = function_args.get('size', 'unknown')
+                context_parts.append(f" Generated {size} data points with {distribution} distribution. This data is ready for histogram visualization to show the distribution pattern. The data is stored in a 'data' field containing numerical values.")
                     
             # For time series, mention temporal aspect  
             elif function_name == 'generate_time_series_data':
-                function_context += " Generated time series data for trend visualization."
+                context_parts.append(" Generated time series data for trend visualization.")
                 
             # For business data, mention categories
             elif function_name == 'generate_business_data':
-                if hasattr(func_call, 'args'):
-                    categories = func_call.args.get('categories', [])
-                    if categories:
-                        function_context += f" Generated data for {len(categories)} categories for comparison visualization."    
+                categories = function_args.get('categories', [])
+                if categories:
+                    context_parts.append(f" Generated data for {len(categories)} categories for comparison visualization.")
 
-        content = f"{content} {function_context}".strip()
+        content = f"{content}  I executed the following functions: {', '.join(function_names)}.{''.join(context_parts)}".strip()
     
     message = {
         "role": "assistant",
         "content": content
     }
     
-    helpers_logger.debug(f"Converted response to message: {len(content)} characters")
+    helpers_logger.debug("Converted response to message: %d characters", len(content))
     return message
 
-def create_completion_prompt(processed_response, gemini_response) -> str:
+# Completion prompt per visualization type; "distribution" also gets a
+# data_context prefix built in create_completion_prompt
+COMPLETION_PROMPTS = {
+    "time_series": "Now create a line chart to visualize this time series data with appropriate labels and formatting.",
+    "categorical": "Now create a bar chart to display this categorical data with clear labels and proper formatting.",
+    "comparison": "Now create an appropriate comparison chart using this data with clear visualization.",
+    "proportional": "Now create a pie chart to show the proportional breakdown of this data.",
+    "distribution": "Now you MUST call the create_histogram function to display the distribution of this numerical data. Use the 'data' field from the generated statistical data as the input to create_histogram.",
+    "correlation": "Now create a scatter plot to show the relationships in this data.",
+    "default": "Now create an appropriate visualization using the data you just generated. Choose the best chart type and format it properly for display."
+}
+
+def create_completion_prompt(
+    processed_response,
+    function_calls_info: tuple,
+    visualization_type: Optional[str] = None
+) -> str:
     """
     Create contextual prompt for visualization completion.
     ENHANCED: More explicit instructions for statistical data.
+    `function_calls_info` comes from extract_function_calls(response); callers
+    that already inferred the visualization type for this turn pass it in.
     """
     
     # Analyze what type of visualization is needed based on the previous response
-    visualization_type = infer_visualization_type_from_response(processed_response, gemini_response)
+    if visualization_type is None:
+        visualization_type = infer_visualization_type_from_response(processed_response, function_calls_info)
     
-    # Build enhanced context about the data that was generated
-    data_context = ""
-    if hasattr(gemini_response, 'function_calls') and gemini_response.function_calls:
-        for func_call in gemini_response.function_calls:
-            function_name = getattr(func_call, 'name', '')
-            
+    if visualization_type == "distribution":
+        # Only this prompt is dynamic: it is prefixed with what was generated
+        data_context = ""
+        for function_name, function_args in function_calls_info:
             if function_name == 'generate_statistical_data':
-                if hasattr(func_call, 'args'):
-                    size = func_call.args.get('size', 100)
-                    distribution = func_call.args.get('distribution', 'normal')
-                    data_context = f"You have generated {size} numerical data points following a {distribution} distribution. "
-    
-    prompts = {
-        "time_series": "Now create a line chart to visualize this time series data with appropriate labels and formatting.",
-        "categorical": "Now create a bar chart to display this categorical data with clear labels and proper formatting.",
-        "comparison": "Now create an appropriate comparison chart using this data with clear visualization.",
-        "proportional": "Now create a pie chart to show the proportional breakdown of this data.",
-        "distribution": f"{data_context}Now you MUST call the create_histogram function to display the distribution of this numerical data. Use the 'data' field from the generated statistical data as the input to create_histogram.",
-        "correlation": "Now create a scatter plot to show the relationships in this data.",
-        "default": "Now create an appropriate visualization using the data you just generated. Choose the best chart type and format it properly for display."
-    }
+                size = function_args.get('size', 100)
+                distribution = function_args.get('distribution', 'normal')
+                data_context = f"You have generated {size} numerical data points following a {distribution} distribution. "
+        prompt = data_context + COMPLETION_PROMPTS["distribution"]
+    else:
+        prompt = COMPLETION_PROMPTS.get(visualization_type, COMPLETION_PROMPTS["default"])
     
-    prompt = prompts.get(visualization_type, prompts["default"])
-    helpers_logger.info(f"Created completion prompt for {visualization_type} visualization")
+    helpers_logger.info("Created completion prompt for %s visualization", visualization_type)
     
     return prompt
 
-def infer_visualization_type_from_response(processed_response, gemini_response) -> str:
+# Keyword hints per visualization type, in priority order. Matching is by
+# substring (as with the old `word in text` checks), case-insensitive.
+VISUALIZATION_HINTS = {
+    "time_series": ["trend", "time", "timeline", "over time"],
+    "comparison": ["compare", "comparison", "vs", "versus"],
+    "proportional": ["proportion", "percentage", "share", "breakdown"],
+    "distribution": ["distribution", "frequency"],
+    "correlation": ["relationship", "correlation"],
+}
+VISUALIZATION_HINT_PRIORITY = tuple(VISUALIZATION_HINTS)
+VISUALIZATION_HINT_RE = re.compile(
+    "|".join(
+        f"(?P<{kind}>" + "|".join(map(re.escape, sorted(words, key=len, reverse=True))) + ")"
+        for kind, words in VISUALIZATION_HINTS.items()
+    ),
+    re.IGNORECASE
+)
+
+# Data generator → the visualization type its output calls for
+DATA_FUNCTION_VISUALIZATION = {
+    'generate_time_series_data': "time_series",
+    'generate_business_data': "categorical",
+    'generate_comparison_data': "comparison",
+    'generate_statistical_data': "distribution",
+    'generate_demographic_data': "proportional",
+}
+
+def infer_visualization_type_from_response(processed_response, function_calls_info: tuple) -> str:
     """
     Infer the appropriate visualization type from the previous response.
+    `function_calls_info` comes from extract_function_calls(response).
     """
     
-    # Check function calls for hints about data type
-    if hasattr(gemini_response, 'function_calls') and gemini_response.function_calls:
-        for func_call in gemini_response.function_calls:
-            function_name = getattr(func_call, 'name', '')
-            
-            if function_name == 'generate_time_series_data':
-                return "time_series"
-            elif function_name == 'generate_business_data':
-                return "categorical" 
-            elif function_name == 'generate_comparison_data':
-                return "comparison"
-            elif function_name == 'generate_statistical_data':
-                return "distribution"
-            elif function_name == 'generate_demographic_data':
-                return "proportional"
+    # Check function calls for hints about data type - the first data
+    # generator with a known visualization decides
+    for function_name, _ in function_calls_info:
+        visualization_type = DATA_FUNCTION_VISUALIZATION.get(function_name)
+        if visualization_type is not None:
+            return visualization_type
     
-    # Analyze response text for visualization clues
-    response_lower = processed_response.lower() if isinstance(processed_response, str) else ""
-    
-    if any(word in response_lower for word in ["trend", "time", "timeline", "over time"]):
-        return "time_series"
-    elif any(word in response_lower for word in ["compare", "comparison", "vs", "versus"]):
-        return "comparison"
-    elif any(word in response_lower for word in ["proportion", "percentage", "share", "breakdown"]):
-        return "proportional"
-    elif any(word in response_lower for word in ["distribution", "frequency"]):
-        return "distribution"
-    elif any(word in response_lower for word in ["relationship", "correlation"]):
-        return "correlation"
-    else:
+    # Analyze response text for visualization clues - one scan collects every
+    # category mentioned, then the first in priority order wins
+    if not isinstance(processed_response, str):
         return "default"
+    
+    found = set()
+    for match in VISUALIZATION_HINT_RE.finditer(processed_response):
+        found.add(match.lastgroup)
+        if match.lastgroup == VISUALIZATION_HINT_PRIORITY[0]:
+            break
+    
+    return next((kind for kind in VISUALIZATION_HINT_PRIORITY if kind in found), "default")
 
 # Keep all existing helper functions...
 
+# dcc.Graph props shared by every chart part (serialised as-is, never mutated)
+CHART_GRAPH_CONFIG = {
+    # "displayModeBar": True, 
+    "responsive": True,
+    "displaylogo": False,
+    "modeBarButtonsToRemove": ['pan2d', 'lasso2d']
+}
+CHART_GRAPH_STYLE = {"height": "400px", "width": "100%"}
+
 def create_mixed_content_message(text: str, charts: List[Dict]) -> Dict[str, Any]:
     """Create a dash-chat message with mixed content (text + graphs)."""
     
-    with LoggedOperation(chart_logger, "create_mixed_content", 
-                        text_length=len(text) if text else 0,
-                        chart_count=len(charts)):
+    # Span records are INFO; skip building the span when nobody would see them
+    span = LoggedOperation(chart_logger, "create_mixed_content", 
+                           text_length=len(text) if text else 0,
+                           chart_count=len(charts)) if chart_logger.isEnabledFor(logging.INFO) else nullcontext()
+    with span:
         
         content_parts = []
         
@@ -260,20 +303,15 @@ def create_mixed_content_message(text: str, charts: List[Dict]) -> Dict[str, Any
                     "type": "graph",
                     "props": {
                         "figure": chart,
-                        "config": {
-                            # "displayModeBar": True, 
-                            "responsive": True,
-                            "displaylogo": False,
-                            "modeBarButtonsToRemove": ['pan2d', 'lasso2d']
-                        },
+                        "config": CHART_GRAPH_CONFIG,
                         "responsive": True,
-                        "style": {"height": "400px", "width": "100%"}
+                        "style": CHART_GRAPH_STYLE
                     }
                 }
                 content_parts.append(chart_part)
-                chart_logger.info(f"Added chart {i+1} to mixed message")
+                chart_logger.info("Added chart %d to mixed message", i+1)
             else:
-                chart_logger.warning(f"Invalid chart data at index {i}: {type(chart)}")
+                chart_logger.warning("Invalid chart data at index %s: %s", i, type(chart))
         
         # Create final message structure for dash-chat
         if len(content_parts) == 0:
@@ -291,61 +329,44 @@ def create_mixed_content_message(text: str, charts: List[Dict]) -> Dict[str, Any
             "content": final_content
         }
         
-        chart_logger.info(f"Created mixed content message with {len(content_parts)} parts")
+        chart_logger.info("Created mixed content message with %d parts", len(content_parts))
         return message
 
+# Tool name → Python callable, built once at import instead of per call
+FUNC_DISPATCH = FUNCTION_MAP
+
+# Every tool whose arguments are rewritten before the call
+ARG_TRANSFORM_FUNCTIONS = frozenset({'generate_statistical_data', 'generate_comparison_data'})
+# Data generators hand back NumPy arrays (as_list=False): their results are only
+# ever serialised by orjson, which reads the array buffers directly
+ARRAY_RESULT_FUNCTIONS = frozenset(
+    name for name, function in FUNC_DISPATCH.items() if function.__module__ == data_generators.__name__
+)
+
 def execute_function_manually(function_name: str, args: Dict[str, Any]) -> Optional[Dict]:
     """Manually execute a function call if needed (fallback for automatic function calling)."""
     
-    with FunctionCallTracker(function_logger, function_name, args):
+    tracker = FunctionCallTracker(function_logger, function_name, args) if function_logger.isEnabledFor(logging.INFO) else nullcontext()
+    with tracker:
         
         try:
-            # Map function names to actual functions
-            function_map = {
-                # Chart functions
-                'create_bar_chart': chart_functions.create_bar_chart,
-                'create_line_chart': chart_functions.create_line_chart,
-                'create_scatter_plot': chart_functions.create_scatter_plot,
-                'create_pie_chart': chart_functions.create_pie_chart,
-                'create_histogram': chart_functions.create_histogram,
-                'create_heatmap': chart_functions.create_heatmap,
-                'create_box_plot': chart_functions.create_box_plot,
-                'create_area_chart': chart_functions.create_area_chart,
-                'create_violin_plot': chart_functions.create_violin_plot,
-                
-                # Data generation functions
-                'generate_business_data': data_generators.generate_business_data,
-                'generate_time_series_data': data_generators.generate_time_series_data,
-                'generate_statistical_data': data_generators.generate_statistical_data,
-                'generate_comparison_data': data_generators.generate_comparison_data,
-                'generate_demographic_data': data_generators.generate_demographic_data,
-                'generate_performance_data': data_generators.generate_performance_data,
-                'generate_financial_data': data_generators.generate_financial_data
-            }
-            
-            if function_name in function_map:
-                function = function_map[function_name]
-                function_logger.info(f"Executing function: {function_name}")
-                function_logger.debug(f"Function arguments: {args}")
+            function = FUNC_DISPATCH.get(function_name)
+            if function is not None:
+                function_logger.info("Executing function: %s", function_name)
+                function_logger.debug("Function arguments: %s", args)
                 
-                # Handle special parameter transformations for updated functions
-                processed_args = args.copy()
+                # Reject malformed model output before any transformation or dispatch
+                ARG_VALIDATORS[function_name].validate_python(args)
                 
-                # Handle box plot and violin plot - convert data_groups to data_groups_json
-                if function_name in ['create_box_plot', 'create_violin_plot']:
-                    if 'data_groups' in processed_args:
-                        # Convert dict to JSON string
-                        processed_args['data_groups_json'] = json.dumps(processed_args['data_groups'])
-                        del processed_args['data_groups']
-                        function_logger.debug(f"Converted data_groups to JSON string for {function_name}")
+                # Handle special parameter transformations for updated functions;
+                # only those tools get a private copy of the arguments to rewrite
+                processed_args = args.copy() if function_name in ARG_TRANSFORM_FUNCTIONS else args
                 
-                # Handle statistical data - convert parameters to parameters_json
-                elif function_name == 'generate_statistical_data':
+                # Handle statistical data - the generator takes the parameters dict as is
+                if function_name == 'generate_statistical_data':
                     if 'parameters' in processed_args:
-                        # Convert dict to JSON string
-                        processed_args['parameters_json'] = json.dumps(processed_args['parameters'])
-                        del processed_args['parameters']
-                        function_logger.debug(f"Converted parameters to JSON string for {function_name}")
+                        processed_args['parameters_json'] = processed_args.pop('parameters')
+                        function_logger.debug("Passed parameters dict through as parameters_json for %s", function_name)
                 
                 # Handle comparison data - convert data_range to min_value and max_value
                 elif function_name == 'generate_comparison_data':
@@ -355,134 +376,115 @@ def execute_function_manually(function_name: str, args: Dict[str, Any]) -> Optio
                             processed_args['min_value'] = data_range[0]
                             processed_args['max_value'] = data_range[1]
                             del processed_args['data_range']
-                            function_logger.debug(f"Converted data_range to min_value/max_value for {function_name}")
+                            function_logger.debug("Converted data_range to min_value/max_value for %s", function_name)
                 
                 # Execute the function with processed arguments
-                result = function(**processed_args)
+                if function_name in ARRAY_RESULT_FUNCTIONS:
+                    result = function(**processed_args, as_list=False)
+                else:
+                    result = function(**processed_args)
                 
-                function_logger.info(f"Function {function_name} executed successfully")
-                function_logger.debug(f"Result type: {type(result)}")
+                function_logger.info("Function %s executed successfully", function_name)
+                function_logger.debug("Result type: %s", type(result))
                 
                 return result
             else:
-                function_logger.error(f"Unknown function: {function_name}")
-                function_logger.debug(f"Available functions: {list(function_map.keys())}")
+                function_logger.error("Unknown function: %s", function_name)
+                function_logger.debug("Available functions: %s", list(FUNC_DISPATCH))
                 return None
                 
+        except ValidationError as e:
+            function_logger.error("Invalid arguments for function %s: %s", function_name, e)
+            return None
+            
         except Exception as e:
-            function_logger.error(f"Error executing function {function_name} manually: {str(e)}", exc_info=True)
+            function_logger.error("Error executing function %s manually: %s", function_name, e, exc_info=True)
             return None
 
 # Keep other existing helper functions...
+def text_of_part(part: dict) -> str:
+    """Text of one dash-chat content part, or a placeholder for non-text parts."""
+    if part.get("type") == "text":
+        return part.get("text", "")
+    if "text" in part:
+        return part["text"]
+    return f"[{part.get('type', 'unknown')} content displayed]"
+
+def text_of_parts(parts: list) -> str:
+    """Join the text of a list of content parts (dicts and plain strings)."""
+    return " ".join(
+        text_of_part(item) if type(item) is dict else item
+        for item in parts
+        if type(item) is dict or type(item) is str
+    )
+
+# Exact content type → text extractor; anything else falls through to a placeholder
+TEXT_EXTRACTORS = {
+    str: str,
+    dict: text_of_part,
+    list: text_of_parts,
+}
+
 def extract_text_from_content(content) -> str:
     """Extract text content from various dash-chat content structures."""
-    helpers_logger.debug(f"Extracting text from content type: {type(content)}")
+    helpers_logger.debug("Extracting text from content type: %s", type(content))
     
     try:
-        if isinstance(content, str):
-            return content
-        elif isinstance(content, dict):
-            if content.get("type") == "text":
-                return content.get("text", "")
-            elif "text" in content:
-                return content["text"]
-            else:
-                content_type = content.get("type", "unknown")
-                return f"[{content_type} content displayed]"
-        elif isinstance(content, list):
-            text_parts = []
-            for item in content:
-                if isinstance(item, dict):
-                    if item.get("type") == "text":
-                        text_parts.append(item.get("text", ""))
-                    elif "text" in item:
-                        text_parts.append(item["text"])
-                    else:
-                        content_type = item.get("type", "unknown")
-                        text_parts.append(f"[{content_type} content displayed]")
-                elif isinstance(item, str):
-                    text_parts.append(item)
-            return " ".join(text_parts)
-        else:
-            helpers_logger.warning(f"Unknown content type for text extraction: {type(content)}")
-            return f"[Content type: {type(content).__name__}]"
+        extractor = TEXT_EXTRACTORS.get(type(content))
+        if extractor is not None:
+            return extractor(content)
+        helpers_logger.warning("Unknown content type for text extraction: %s", type(content))
+        return f"[Content type: {type(content).__name__}]"
     except Exception as e:
-        helpers_logger.error(f"Error extracting text from content: {str(e)}", exc_info=True)
+        helpers_logger.error("Error extracting text from content: %s", e, exc_info=True)
         return "[Error extracting text content]"
 
 def format_conversation_for_gemini(messages: List[Dict]) -> List[Dict]:
-    """Format conversation history for Gemini API."""
+    """Format conversation history for Gemini API.
+    Each formatted entry is memoised on its message under "_formatted", so the
+    completion turn only formats the messages it added.
+    """
     
-    with LoggedOperation(helpers_logger, "format_conversation", 
-                        input_message_count=len(messages)):
+    span = LoggedOperation(helpers_logger, "format_conversation", 
+                           input_message_count=len(messages)) if helpers_logger.isEnabledFor(logging.INFO) else nullcontext()
+    with span:
         
         formatted = []
         
         for i, msg in enumerate(messages):
+            cached = msg.get("_formatted")
+            if cached is not None:
+                formatted.append(cached)
+                continue
             try:
-                if msg["role"] == "user":
-                    # User messages should always be simple text
-                    content = msg["content"]
-                    if isinstance(content, str):
-                        formatted.append({
-                            "role": "user",
-                            "parts": [{"text": content}]
-                        })
-                        helpers_logger.debug(f"Formatted user message {i+1}")
-                    else:
-                        helpers_logger.warning(f"User message {i+1} has non-string content: {type(content)}")
-                        # Try to extract text if it's a complex structure
-                        text_content = extract_text_from_content(content)
-                        formatted.append({
-                            "role": "user",
-                            "parts": [{"text": text_content}]
-                        })
+                # Gemini knows only "user" and "model"; assistant and function
+                # messages are both replayed as model turns
+                role = "user" if msg["role"] == "user" else "model"
+                content = msg["content"]
                 
-                else:  # assistant messages
-                    # Assistant messages might have mixed content (text + charts)
-                    content = msg["content"]
-                    
-                    if isinstance(content, str):
-                        # Simple text content
-                        formatted.append({
-                            "role": "model", 
-                            "parts": [{"text": content}]
-                        })
-                        helpers_logger.debug(f"Formatted assistant text message {i+1}")
-                        
-                    elif isinstance(content, dict):
-                        # Single content item (could be text, graph, etc.)
-                        text_content = extract_text_from_content(content)
-                        formatted.append({
-                            "role": "model", 
-                            "parts": [{"text": text_content}]
-                        })
-                        helpers_logger.debug(f"Formatted assistant mixed content message {i+1}")
-                        
-                    elif isinstance(content, list):
-                        # List of content items - extract all text parts
-                        text_content = extract_text_from_content(content)
-                        formatted.append({
-                            "role": "model", 
-                            "parts": [{"text": text_content}]
-                        })
-                        helpers_logger.debug(f"Formatted assistant multi-part message {i+1}")
-                        
-                    else:
-                        # Fallback for unknown content types
-                        helpers_logger.warning(f"Assistant message {i+1} has unknown content type: {type(content)}")
-                        formatted.append({
-                            "role": "model", 
-                            "parts": [{"text": "Previous message contained non-text content."}]
-                        })
+                if type(content) is str:
+                    text_content = content
+                elif role == "model" and type(content) not in TEXT_EXTRACTORS:
+                    # Fallback for unknown assistant content types
+                    helpers_logger.warning("Assistant message %d has unknown content type: %s", i+1, type(content))
+                    text_content = "Previous message contained non-text content."
+                else:
+                    # Mixed content (text + charts), or a complex user structure
+                    if role == "user":
+                        helpers_logger.warning("User message %d has non-string content: %s", i+1, type(content))
+                    text_content = extract_text_from_content(content)
+                
+                entry = {"role": role, "parts": [{"text": text_content}]}
+                formatted.append(entry)
+                msg["_formatted"] = entry
                         
             except Exception as e:
-                helpers_logger.error(f"Error formatting message {i+1}: {str(e)}", exc_info=True)
+                helpers_logger.error("Error formatting message %d: %s", i+1, e, exc_info=True)
                 # Add a placeholder message to keep conversation flow
                 formatted.append({
                     "role": msg["role"],
                     "parts": [{"text": f"[Error formatting message: {str(e)}]"}]
                 })
         
-        helpers_logger.info(f"Formatted {len(formatted)} messages for Gemini API")
+        helpers_logger.info("Formatted %d messages for Gemini API", len(formatted))
         return formatted
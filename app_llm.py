@@ -8,9 +8,14 @@ and provides comprehensive configuration for intelligent visualization creation.
 """
 
 import os
+import threading
+from datetime import datetime, timedelta, timezone
 from google import genai
 from google.genai import types
 from function_declarations import CHART_TOOLS, SYSTEM_INSTRUCTION
+from logger_config import get_api_logger
+
+api_logger = get_api_logger()
 
 # Load GCP Gemini API key from environment variables
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
@@ -61,12 +66,64 @@ DATA_HEAVY_CONFIG = types.GenerateContentConfig(
     )
 )
 
+# Gemini context caching for the static system instruction + tool schema.
+# Opt-in: caches are billed for storage and need a minimum prompt size.
+CONTEXT_CACHE_ENABLED = os.getenv("GEMINI_CONTEXT_CACHE", "false").lower() == "true"
+CONTEXT_CACHE_TTL = int(os.getenv("GEMINI_CONTEXT_CACHE_TTL", "3600"))  # seconds
+CONTEXT_CACHE_REFRESH_MARGIN = timedelta(minutes=5)  # recreate this long before expiry
+
+# model name → (refresh_at, config to use until then)
+CONTEXT_CACHES: dict = {}
+CONTEXT_CACHE_LOCK = threading.Lock()
+
+
+def get_data_heavy_config(model_name: str | None = None) -> types.GenerateContentConfig:
+    """
+    DATA_HEAVY_CONFIG, or - with GEMINI_CONTEXT_CACHE=true and a model name -
+    an equivalent config whose system instruction and tools come from a
+    per-model cached content that is recreated shortly before it expires.
+    Falls back to DATA_HEAVY_CONFIG (for one TTL) if the cache cannot be created.
+    """
+    if not CONTEXT_CACHE_ENABLED or not model_name:
+        return DATA_HEAVY_CONFIG
+
+    with CONTEXT_CACHE_LOCK:
+        entry = CONTEXT_CACHES.get(model_name)
+        now = datetime.now(timezone.utc)
+        if entry is not None and now < entry[0]:
+            return entry[1]
+
+        try:
+            cache = genai_client.caches.create(
+                model=model_name,
+                config=types.CreateCachedContentConfig(
+                    system_instruction=SYSTEM_INSTRUCTION,
+                    tools=CHART_TOOLS,
+                    ttl=f"{CONTEXT_CACHE_TTL}s",
+                )
+            )
+        except Exception as e:
+            # e.g. prompt below the model's minimum cacheable size - don't retry every call
+            api_logger.warning("⚠️ Context cache unavailable for %s, sending full prompt: %s", model_name, e)
+            CONTEXT_CACHES[model_name] = (now + timedelta(seconds=CONTEXT_CACHE_TTL), DATA_HEAVY_CONFIG)
+            return DATA_HEAVY_CONFIG
+
+        config = DATA_HEAVY_CONFIG.model_copy(
+            update={"system_instruction": None, "tools": None, "cached_content": cache.name}
+        )
+        expire_time = cache.expire_time or now + timedelta(seconds=CONTEXT_CACHE_TTL)
+        CONTEXT_CACHES[model_name] = (expire_time - CONTEXT_CACHE_REFRESH_MARGIN, config)
+        api_logger.info("🗄️ Created context cache %s for %s", cache.name, model_name)
+        return config
+
+
 # Export configurations for use in other modules
 __all__ = [
     'genai_client',
     'GENERATION_CONFIG', 
     'BASIC_CONFIG',
     'DATA_HEAVY_CONFIG',
+    'get_data_heavy_config',
     'MODELS',
     'CHART_TOOLS',
     'SYSTEM_INSTRUCTION'
@@ -4,16 +4,19 @@
 # chart_functions.py
 """Chart generation functions for Gemini function calling.
 Each function returns a Plotly figure dictionary compatible with dash-chat's graph renderer.
-Modified functions to handle JSON string parameters for complex data types.
+Figures are assembled as plain {"data": [...], "layout": {...}} dicts; building
+px/go Figure objects only to call to_dict() again cost far more than the chart.
+Box and violin plots take their groups as a dict (or, for older calls, a JSON string).
 Includes comprehensive logging for debugging chart generation issues.
 """
 
-import plotly.express as px
-import plotly.graph_objects as go
-import pandas as pd
+import logging
+import pkgutil
+from contextlib import nullcontext
 import numpy as np
-import json
-from typing import List, Dict, Any, Optional
+import base64
+import orjson
+from typing import List, Dict, Any, Optional, Union
 
 # Enhanced logging imports
 from logger_config import (
@@ -24,6 +27,73 @@ from logger_config import (
 # Initialize chart logger
 chart_logger = get_chart_logger()
 
+# plotly.js has no named templates, so the template is embedded as a dict.
+# Read straight from plotly's bundled JSON: no plotly.io / graph_objects import
+# or Template validation at startup
+PLOTLY_TEMPLATE = orjson.loads(pkgutil.get_data("plotly", "package_data/templates/plotly_white.json"))
+
+# Layout keys shared by every chart; builders merge their titles/axes on top.
+# The dicts are shared by reference, so nothing below may mutate them.
+BASE_MARGIN = {"l": 20, "r": 20, "t": 50, "b": 20}
+BASE_LAYOUT = {"template": PLOTLY_TEMPLATE, "margin": BASE_MARGIN}
+
+# Box groups at least this large are sent as precomputed quartiles/fences
+# instead of the raw sample (individual outlier points are not drawn then)
+BOX_STATS_MIN_POINTS = 5000
+
+# Arrays at least this large go over the wire as float32: half the base64 and
+# browser memory, ~7 significant digits (plenty for dense plots; small charts
+# stay float64 so hover labels show the exact values)
+DISPLAY_DTYPE = np.float32
+DISPLAY_DTYPE_MIN_POINTS = 1000
+
+
+def float_array(values) -> np.ndarray:
+    """1D float64 array; plain lists (parsed JSON) go through the tighter np.fromiter loop."""
+    if type(values) is list:
+        return np.fromiter(values, dtype=np.float64, count=len(values))
+    return np.ascontiguousarray(values, dtype=np.float64)
+
+
+def typed_array(values) -> Dict[str, str]:
+    """
+    Convert numbers once to a contiguous float64 array and encode it as a
+    plotly.js typed-array spec (base64), the same wire format plotly.py emits.
+    Large arrays are downcast to DISPLAY_DTYPE first.
+    Raises ValueError/TypeError for non-numeric input.
+    """
+    array = np.ascontiguousarray(values, dtype=np.float64)
+    if array.size >= DISPLAY_DTYPE_MIN_POINTS:
+        array = array.astype(DISPLAY_DTYPE)
+    spec = {"dtype": array.dtype.str[1:], "bdata": base64.b64encode(array).decode("ascii")}
+    if array.ndim > 1:
+        spec["shape"] = ", ".join(map(str, array.shape))
+    return spec
+
+def error_figure(message: str, title: str = "Chart Generation Error") -> Dict[str, Any]:
+    """Empty figure with a centred annotation, returned by builders that fail."""
+    return {
+        "data": [],
+        "layout": {
+            **BASE_LAYOUT,
+            "title": {"text": title},
+            "annotations": [{
+                "text": message,
+                "xref": "paper", "yref": "paper",
+                "x": 0.5, "y": 0.5,
+                "showarrow": False,
+                "font": {"size": 14}
+            }]
+        }
+    }
+
+
+def check_same_length(a, b, label_a: str, label_b: str) -> None:
+    """Raise ValueError when two parallel inputs differ in length (logged by the caller's handler)."""
+    if len(a) != len(b):
+        raise ValueError(f"{label_a} and {label_b} must have same length: {len(a)} vs {len(b)}")
+
+
 def create_bar_chart(
     categories: List[str], 
     values: List[float], 
@@ -37,91 +107,50 @@ def create_bar_chart(
     FIXED: Color scheme handling and error prevention.
     ENHANCED: Comprehensive logging and error handling.
     """
-    with LoggedOperation(chart_logger, "create_bar_chart", 
-                        categories_count=len(categories),
-                        values_count=len(values),
-                        title=title):
+    span = LoggedOperation(chart_logger, "create_bar_chart",
+                           categories_count=len(categories),
+                           values_count=len(values),
+                           title=title) if chart_logger.isEnabledFor(logging.INFO) else nullcontext()
+    with span:
         
         try:
             # Input validation with logging
-            chart_logger.info(f"Creating bar chart: '{title}'")
-            chart_logger.debug(f"Categories: {categories[:5]}{'...' if len(categories) > 5 else ''}")
-            chart_logger.debug(f"Values: {values[:5]}{'...' if len(values) > 5 else ''}")
-            chart_logger.debug(f"Color scheme: {color_scheme}")
+            chart_logger.info("Creating bar chart: '%s'", title)
+            if chart_logger.isEnabledFor(logging.DEBUG):
+                chart_logger.debug("Categories: %s%s", categories[:5], '...' if len(categories) > 5 else '')
+                chart_logger.debug("Values: %s%s", values[:5], '...' if len(values) > 5 else '')
+                chart_logger.debug("Color scheme: %s", color_scheme)
             
             # Validate inputs
-            if len(categories) != len(values):
-                chart_logger.error(f"Length mismatch: {len(categories)} categories vs {len(values)} values")
-                raise ValueError(f"Categories and values must have same length: {len(categories)} vs {len(values)}")
-            
+            check_same_length(categories, values, "Categories", "values")
             if len(categories) == 0:
-                chart_logger.warning("Empty categories list provided")
                 raise ValueError("Categories list cannot be empty")
             
-            # Create DataFrame
-            chart_logger.debug("Creating pandas DataFrame")
-            df = pd.DataFrame({
-                'categories': categories,
-                'values': values
-            })
-            chart_logger.debug(f"DataFrame created with shape: {df.shape}")
-            
-            # Create the bar chart
-            chart_logger.debug("Creating Plotly bar chart")
-            fig = px.bar(
-                df, 
-                x='categories', 
-                y='values', 
-                title=title,
-                labels={'categories': x_title, 'values': y_title}
-            )
-            chart_logger.debug("Bar chart figure created successfully")
-            
-            # Update layout
-            chart_logger.debug("Updating chart layout")
-            fig.update_layout(
-                xaxis_title=x_title,
-                yaxis_title=y_title,
-                template="plotly_white",
-                margin=dict(l=20, r=20, t=50, b=20)
-            )
-            
-            # FIXED: Correct method name
-            chart_logger.debug("Updating x-axis configuration")
-            fig.update_xaxes(
-                categoryorder='array',
-                categoryarray=categories
-            )
-            
-            # Convert to dictionary
-            chart_logger.debug("Converting figure to dictionary")
-            chart_dict = fig.to_dict()
-            chart_logger.info(f"✅ Bar chart created successfully with {len(categories)} categories")
+            # Build the figure dictionary
+            chart_logger.debug("Building bar chart figure dictionary")
+            chart_dict = {
+                "data": [{"type": "bar", "x": categories, "y": typed_array(float_array(values))}],
+                "layout": {
+                    **BASE_LAYOUT,
+                    "title": {"text": title},
+                    # plotly.js keeps categories in trace order by default,
+                    # so no explicit categoryarray is needed
+                    "xaxis": {"title": {"text": x_title}},
+                    "yaxis": {"title": {"text": y_title}}
+                }
+            }
+            chart_logger.info("✅ Bar chart created successfully with %d categories", len(categories))
             
             return chart_dict
             
         except Exception as e:
-            chart_logger.error(f"❌ Bar chart creation failed: {str(e)}", exc_info=True)
-            chart_logger.error(f"Input details - Categories: {len(categories) if categories else 'None'}, Values: {len(values) if values else 'None'}")
+            chart_logger.error("❌ Bar chart creation failed: %s", e, exc_info=True)
+            chart_logger.error("Input details - Categories: %s, Values: %s",
+                               len(categories) if categories else 'None', len(values) if values else 'None')
             
             # Create error visualization
             chart_logger.debug("Creating error visualization")
-            fig = go.Figure()
-            fig.add_annotation(
-                text=f"Chart creation failed.<br>Error: {str(e)}",
-                xref="paper", yref="paper",
-                x=0.5, y=0.5, 
-                showarrow=False,
-                font=dict(size=14)
-            )
-            fig.update_layout(
-                title="Chart Generation Error",
-                template="plotly_white",
-                margin=dict(l=20, r=20, t=50, b=20)
-            )
-            
-            chart_logger.info("Error visualization created")
-            return fig.to_dict()
+            return error_figure(f"Chart creation failed.<br>Error: {str(e)}")
 
 
 def create_line_chart(
@@ -147,56 +176,43 @@ def create_line_chart(
     Returns:
         Dictionary containing Plotly figure data and layout
     """
-    with LoggedOperation(chart_logger, "create_line_chart",
-                        x_data_count=len(x_data),
-                        y_data_count=len(y_data),
-                        title=title):
+    span = LoggedOperation(chart_logger, "create_line_chart",
+                           x_data_count=len(x_data),
+                           y_data_count=len(y_data),
+                           title=title) if chart_logger.isEnabledFor(logging.INFO) else nullcontext()
+    with span:
         
         try:
-            chart_logger.info(f"Creating line chart: '{title}'")
-            chart_logger.debug(f"X data length: {len(x_data)}, Y data length: {len(y_data)}")
-            chart_logger.debug(f"Line color: {line_color}")
+            chart_logger.info("Creating line chart: '%s'", title)
+            chart_logger.debug("X data length: %d, Y data length: %d", len(x_data), len(y_data))
+            chart_logger.debug("Line color: %s", line_color)
             
             # Input validation
-            if len(x_data) != len(y_data):
-                chart_logger.error(f"Length mismatch: {len(x_data)} x_data vs {len(y_data)} y_data")
-                raise ValueError(f"X and Y data must have same length: {len(x_data)} vs {len(y_data)}")
-            
-            df = pd.DataFrame({
-                'x': x_data,
-                'y': y_data
-            })
+            check_same_length(x_data, y_data, "X", "Y data")
             
-            fig = px.line(
-                df, 
-                x='x', 
-                y='y', 
-                title=title,
-                line_shape='linear'
-            )
+            chart_dict = {
+                "data": [{
+                    "type": "scatter",
+                    "mode": "lines",
+                    "x": x_data,
+                    "y": typed_array(float_array(y_data)),
+                    "line": {"color": line_color, "shape": "linear"}
+                }],
+                "layout": {
+                    **BASE_LAYOUT,
+                    "title": {"text": title},
+                    "xaxis": {"title": {"text": x_title}},
+                    "yaxis": {"title": {"text": y_title}}
+                }
+            }
             
-            fig.update_traces(line_color=line_color)
-            fig.update_layout(
-                xaxis_title=x_title,
-                yaxis_title=y_title,
-                template="plotly_white",
-                margin=dict(l=20, r=20, t=50, b=20)
-            )
-            
-            chart_logger.info(f"✅ Line chart created successfully with {len(x_data)} data points")
-            return fig.to_dict()
+            chart_logger.info("✅ Line chart created successfully with %d data points", len(x_data))
+            return chart_dict
             
         except Exception as e:
-            chart_logger.error(f"❌ Line chart creation failed: {str(e)}", exc_info=True)
+            chart_logger.error("❌ Line chart creation failed: %s", e, exc_info=True)
             
-            fig = go.Figure()
-            fig.add_annotation(
-                text=f"Error creating line chart: {str(e)}",
-                xref="paper", yref="paper",
-                x=0.5, y=0.5, showarrow=False
-            )
-            fig.update_layout(title="Chart Generation Error")
-            return fig.to_dict()
+            return error_figure(f"Error creating line chart: {str(e)}")
 
 
 def create_scatter_plot(
@@ -224,42 +240,58 @@ def create_scatter_plot(
         Dictionary containing Plotly figure data and layout
     """
     try:
-        df_dict = {'x': x_data, 'y': y_data}
-        
+        check_same_length(x_data, y_data, "X", "Y data")
         if size_data:
-            df_dict['size'] = size_data
+            check_same_length(x_data, size_data, "X", "size data")
         if color_data:
-            df_dict['color'] = color_data
-            
-        df = pd.DataFrame(df_dict)
-        
-        fig = px.scatter(
-            df, 
-            x='x', 
-            y='y', 
-            title=title,
-            size='size' if size_data else None,
-            color='color' if color_data else None
-        )
+            check_same_length(x_data, color_data, "X", "color data")
         
-        fig.update_layout(
-            xaxis_title=x_title,
-            yaxis_title=y_title,
-            template="plotly_white",
-            margin=dict(l=20, r=20, t=50, b=20)
-        )
+        x = float_array(x_data)
+        y = float_array(y_data)
+        sizes = float_array(size_data) if size_data else None
         
-        return fig.to_dict()
+        # Point indices per color category (one trace each, like px.scatter)
+        if color_data:
+            groups = {}
+            for i, category in enumerate(color_data):
+                groups.setdefault(category, []).append(i)
+        else:
+            groups = {None: slice(None)}
+        
+        # Area-scaled marker sizes; sizeref = 2 * max / 20**2 makes the largest
+        # point 20px across (px.scatter's default size_max)
+        sizeref = float(sizes.max()) / 200 if sizes is not None else None
+        
+        traces = []
+        for category, indices in groups.items():
+            trace = {
+                "type": "scatter",
+                "mode": "markers",
+                "x": typed_array(x[indices]),
+                "y": typed_array(y[indices])
+            }
+            if category is not None:
+                trace["name"] = str(category)
+            if sizes is not None:
+                trace["marker"] = {
+                    "size": typed_array(sizes[indices]),
+                    "sizemode": "area",
+                    "sizeref": sizeref
+                }
+            traces.append(trace)
+        
+        return {
+            "data": traces,
+            "layout": {
+                **BASE_LAYOUT,
+                "title": {"text": title},
+                "xaxis": {"title": {"text": x_title}},
+                "yaxis": {"title": {"text": y_title}}
+            }
+        }
         
     except Exception as e:
-        fig = go.Figure()
-        fig.add_annotation(
-            text=f"Error creating scatter plot: {str(e)}",
-            xref="paper", yref="paper",
-            x=0.5, y=0.5, showarrow=False
-        )
-        fig.update_layout(title="Chart Generation Error")
-        return fig.to_dict()
+        return error_figure(f"Error creating scatter plot: {str(e)}")
 
 
 def create_pie_chart(
@@ -281,61 +313,48 @@ def create_pie_chart(
     Returns:
         Dictionary containing Plotly figure data and layout
     """
-    with LoggedOperation(chart_logger, "create_pie_chart",
-                        labels_count=len(labels),
-                        values_count=len(values),
-                        title=title):
+    span = LoggedOperation(chart_logger, "create_pie_chart",
+                           labels_count=len(labels),
+                           values_count=len(values),
+                           title=title) if chart_logger.isEnabledFor(logging.INFO) else nullcontext()
+    with span:
         
         try:
-            chart_logger.info(f"Creating pie chart: '{title}'")
-            chart_logger.debug(f"Labels: {labels[:5]}{'...' if len(labels) > 5 else ''}")
-            chart_logger.debug(f"Show percentages: {show_percentages}")
+            chart_logger.info("Creating pie chart: '%s'", title)
+            if chart_logger.isEnabledFor(logging.DEBUG):
+                chart_logger.debug("Labels: %s%s", labels[:5], '...' if len(labels) > 5 else '')
+                chart_logger.debug("Show percentages: %s", show_percentages)
             
             # Input validation
-            if len(labels) != len(values):
-                chart_logger.error(f"Length mismatch: {len(labels)} labels vs {len(values)} values")
-                raise ValueError(f"Labels and values must have same length: {len(labels)} vs {len(values)}")
+            check_same_length(labels, values, "Labels", "values")
+            
+            values = float_array(values)
             
             # Check for non-negative values
-            if any(v < 0 for v in values):
+            if (values < 0).any():
                 chart_logger.warning("Negative values found in pie chart data")
             
-            df = pd.DataFrame({
-                'labels': labels,
-                'values': values
-            })
-            
-            fig = px.pie(
-                df, 
-                names='labels', 
-                values='values', 
-                title=title
-            )
+            chart_dict = {
+                "data": [{
+                    "type": "pie",
+                    "labels": labels,
+                    "values": typed_array(values),
+                    "textposition": "inside",
+                    "textinfo": "percent+label" if show_percentages else "label"
+                }],
+                "layout": {
+                    **BASE_LAYOUT,
+                    "title": {"text": title}
+                }
+            }
             
-            if show_percentages:
-                fig.update_traces(textposition='inside', textinfo='percent+label')
-            else:
-                fig.update_traces(textposition='inside', textinfo='label')
-                
-            fig.update_layout(
-                template="plotly_white",
-                margin=dict(l=20, r=20, t=50, b=20)
-            )
-            
-            chart_logger.info(f"✅ Pie chart created successfully with {len(labels)} segments")
-            return fig.to_dict()
+            chart_logger.info("✅ Pie chart created successfully with %d segments", len(labels))
+            return chart_dict
             
         except Exception as e:
-            chart_logger.error(f"❌ Pie chart creation failed: {str(e)}", exc_info=True)
+            chart_logger.error("❌ Pie chart creation failed: %s", e, exc_info=True)
             
-            fig = go.Figure()
-            fig.add_annotation(
-                text=f"Error creating pie chart: {str(e)}",
-                xref="paper", yref="paper",
-                x=0.5, y=0.5, showarrow=False
-            )
-            fig.update_layout(title="Chart Generation Error")
-            return fig.to_dict()
+            return error_figure(f"Error creating pie chart: {str(e)}")
 
 
 def create_histogram(
@@ -359,33 +378,28 @@ def create_histogram(
         Dictionary containing Plotly figure data and layout
     """
     try:
-        df = pd.DataFrame({'values': data})
-        
-        fig = px.histogram(
-            df, 
-            x='values', 
-            nbins=bins,
-            title=title
-        )
-        
-        fig.update_layout(
-            xaxis_title=x_title,
-            yaxis_title=y_title,
-            template="plotly_white",
-            margin=dict(l=20, r=20, t=50, b=20)
-        )
-        
-        return fig.to_dict()
+        # Bin here (one C pass) and send counts as a bar trace, so neither
+        # plotly.js nor the wire sees the raw sample
+        counts, edges = np.histogram(float_array(data), bins=int(bins))
+        centers = (edges[:-1] + edges[1:]) * 0.5
+        
+        return {
+            "data": [{
+                "type": "bar",
+                "x": typed_array(centers),
+                "y": typed_array(counts),
+                "width": float(edges[1] - edges[0])
+            }],
+            "layout": {
+                **BASE_LAYOUT,
+                "title": {"text": title},
+                "xaxis": {"title": {"text": x_title}},
+                "yaxis": {"title": {"text": y_title}}
+            }
+        }
         
     except Exception as e:
-        fig = go.Figure()
-        fig.add_annotation(
-            text=f"Error creating histogram: {str(e)}",
-            xref="paper", yref="paper",
-            x=0.5, y=0.5, showarrow=False
-        )
-        fig.update_layout(title="Chart Generation Error")
-        return fig.to_dict()
+        return error_figure(f"Error creating histogram: {str(e)}")
 
 
 def create_heatmap(
@@ -409,44 +423,72 @@ def create_heatmap(
         Dictionary containing Plotly figure data and layout
     """
     try:
-        fig = go.Figure(data=go.Heatmap(
-            z=data,
-            x=x_labels,
-            y=y_labels,
-            colorscale=color_scale
-        ))
+        # Only the heatmap needs plotly.py itself, to resolve colour scale names
+        from plotly.colors import get_colorscale
         
-        fig.update_layout(
-            title=title,
-            template="plotly_white",
-            margin=dict(l=20, r=20, t=50, b=20)
-        )
-        
-        return fig.to_dict()
+        # One contiguous 2D array → a single base64 block with a shape,
+        # instead of a nested list of boxed floats
+        try:
+            z = typed_array(data)
+        except ValueError:
+            # Ragged rows cannot form a 2D array; plotly.js accepts them as lists
+            z = data
+        
+        return {
+            "data": [{
+                "type": "heatmap",
+                "z": z,
+                "x": x_labels,
+                "y": y_labels,
+                # Resolve the name here: plotly.js knows far fewer scales than plotly.py
+                "colorscale": get_colorscale(color_scale)
+            }],
+            "layout": {
+                **BASE_LAYOUT,
+                "title": {"text": title}
+            }
+        }
         
     except Exception as e:
-        fig = go.Figure()
-        fig.add_annotation(
-            text=f"Error creating heatmap: {str(e)}",
-            xref="paper", yref="paper",
-            x=0.5, y=0.5, showarrow=False
-        )
-        fig.update_layout(title="Chart Generation Error")
-        return fig.to_dict()
+        return error_figure(f"Error creating heatmap: {str(e)}")
+
+
+def box_trace(name: str, values) -> Dict[str, Any]:
+    """Box trace for one group; large groups get their statistics computed here."""
+    array = float_array(values)
+    if array.size < BOX_STATS_MIN_POINTS:
+        return {"type": "box", "name": name, "y": typed_array(array), "showlegend": False}
+    
+    # Same linear quartiles and 1.5 IQR whiskers plotly.js would compute
+    q1, median, q3 = np.percentile(array, (25, 50, 75))
+    iqr = q3 - q1
+    inside = array[(array >= q1 - 1.5 * iqr) & (array <= q3 + 1.5 * iqr)]
+    return {
+        "type": "box",
+        "name": name,
+        "x": [name],
+        "q1": [float(q1)],
+        "median": [float(median)],
+        "q3": [float(q3)],
+        "lowerfence": [float(inside.min())],
+        "upperfence": [float(inside.max())],
+        "mean": [float(array.mean())],
+        "showlegend": False
+    }
 
 
 def create_box_plot(
-    data_groups_json: str, 
+    data_groups_json: Union[Dict[str, List[float]], str], 
     title: str = "Box Plot",
     y_title: str = "Values"
 ) -> Dict[str, Any]:
     """
     Create a box plot for showing data distribution across categories.
-    UPDATED: Now accepts JSON string for data_groups to work with Gemini API.
+    Accepts the groups as a JSON string (what the tool declares) or as a dict.
     
     Args:
-        data_groups_json: JSON string representing dictionary where keys are group names 
-                         and values are lists of numbers
+        data_groups_json: JSON string (or the dictionary itself) where keys are
+                         group names and values are lists of numbers
         title: Chart title
         y_title: Y-axis label
     
@@ -454,52 +496,33 @@ def create_box_plot(
         Dictionary containing Plotly figure data and layout
     """
     try:
-        # Parse JSON string to dictionary
-        data_groups = json.loads(data_groups_json)
-        
-        # Convert data_groups to DataFrame format
-        data_list = []
-        for group_name, values in data_groups.items():
-            for value in values:
-                data_list.append({'group': group_name, 'value': value})
-        
-        df = pd.DataFrame(data_list)
-        
-        fig = px.box(
-            df, 
-            x='group', 
-            y='value', 
-            title=title
-        )
-        
-        fig.update_layout(
-            xaxis_title="Groups",
-            yaxis_title=y_title,
-            template="plotly_white",
-            margin=dict(l=20, r=20, t=50, b=20)
-        )
-        
-        return fig.to_dict()
-        
-    except json.JSONDecodeError as e:
-        fig = go.Figure()
-        fig.add_annotation(
-            text=f"Error parsing JSON data: {str(e)}",
-            xref="paper", yref="paper",
-            x=0.5, y=0.5, showarrow=False
-        )
-        fig.update_layout(title="JSON Parse Error")
-        return fig.to_dict()
+        # Tool calls send a JSON string; direct callers may pass the dict
+        if isinstance(data_groups_json, str):
+            data_groups = orjson.loads(data_groups_json)
+        else:
+            data_groups = data_groups_json
+        
+        # One trace per group; the trace name places it on the category axis
+        traces = [
+            box_trace(str(group_name), values)
+            for group_name, values in data_groups.items()
+        ]
+        
+        return {
+            "data": traces,
+            "layout": {
+                **BASE_LAYOUT,
+                "title": {"text": title},
+                "xaxis": {"title": {"text": "Groups"}},
+                "yaxis": {"title": {"text": y_title}}
+            }
+        }
+        
+    except orjson.JSONDecodeError as e:
+        return error_figure(f"Error parsing JSON data: {str(e)}", title="JSON Parse Error")
         
     except Exception as e:
-        fig = go.Figure()
-        fig.add_annotation(
-            text=f"Error creating box plot: {str(e)}",
-            xref="paper", yref="paper",
-            x=0.5, y=0.5, showarrow=False
-        )
-        fig.update_layout(title="Chart Generation Error")
-        return fig.to_dict()
+        return error_figure(f"Error creating box plot: {str(e)}")
 
 
 def create_area_chart(
@@ -525,51 +548,40 @@ def create_area_chart(
         Dictionary containing Plotly figure data and layout
     """
     try:
-        df = pd.DataFrame({
-            'x': x_data,
-            'y': y_data
-        })
-        
-        fig = px.area(
-            df, 
-            x='x', 
-            y='y', 
-            title=title
-        )
-        
-        fig.update_traces(fill='tonexty', fillcolor=fill_color)
-        fig.update_layout(
-            xaxis_title=x_title,
-            yaxis_title=y_title,
-            template="plotly_white",
-            margin=dict(l=20, r=20, t=50, b=20)
-        )
-        
-        return fig.to_dict()
+        return {
+            "data": [{
+                "type": "scatter",
+                "mode": "lines",
+                "x": x_data,
+                "y": typed_array(float_array(y_data)),
+                "stackgroup": "1",
+                "fill": "tonexty",
+                "fillcolor": fill_color
+            }],
+            "layout": {
+                **BASE_LAYOUT,
+                "title": {"text": title},
+                "xaxis": {"title": {"text": x_title}},
+                "yaxis": {"title": {"text": y_title}}
+            }
+        }
         
     except Exception as e:
-        fig = go.Figure()
-        fig.add_annotation(
-            text=f"Error creating area chart: {str(e)}",
-            xref="paper", yref="paper",
-            x=0.5, y=0.5, showarrow=False
-        )
-        fig.update_layout(title="Chart Generation Error")
-        return fig.to_dict()
+        return error_figure(f"Error creating area chart: {str(e)}")
 
 
 def create_violin_plot(
-    data_groups_json: str, 
+    data_groups_json: Union[Dict[str, List[float]], str], 
     title: str = "Violin Plot",
     y_title: str = "Values"
 ) -> Dict[str, Any]:
     """
     Create a violin plot for showing data distribution shapes.
-    UPDATED: Now accepts JSON string for data_groups to work with Gemini API.
+    Accepts the groups as a JSON string (what the tool declares) or as a dict.
     
     Args:
-        data_groups_json: JSON string representing dictionary where keys are group names 
-                         and values are lists of numbers
+        data_groups_json: JSON string (or the dictionary itself) where keys are
+                         group names and values are lists of numbers
         title: Chart title
         y_title: Y-axis label
     
@@ -577,49 +589,30 @@ def create_violin_plot(
         Dictionary containing Plotly figure data and layout
     """
     try:
-        # Parse JSON string to dictionary
-        data_groups = json.loads(data_groups_json)
-        
-        # Convert data_groups to DataFrame format
-        data_list = []
-        for group_name, values in data_groups.items():
-            for value in values:
-                data_list.append({'group': group_name, 'value': value})
-        
-        df = pd.DataFrame(data_list)
-        
-        fig = px.violin(
-            df, 
-            x='group', 
-            y='value', 
-            title=title
-        )
-        
-        fig.update_layout(
-            xaxis_title="Groups",
-            yaxis_title=y_title,
-            template="plotly_white",
-            margin=dict(l=20, r=20, t=50, b=20)
-        )
-        
-        return fig.to_dict()
-        
-    except json.JSONDecodeError as e:
-        fig = go.Figure()
-        fig.add_annotation(
-            text=f"Error parsing JSON data: {str(e)}",
-            xref="paper", yref="paper",
-            x=0.5, y=0.5, showarrow=False
-        )
-        fig.update_layout(title="JSON Parse Error")
-        return fig.to_dict()
+        # Tool calls send a JSON string; direct callers may pass the dict
+        if isinstance(data_groups_json, str):
+            data_groups = orjson.loads(data_groups_json)
+        else:
+            data_groups = data_groups_json
+        
+        # One trace per group; the trace name places it on the category axis
+        traces = [
+            {"type": "violin", "name": str(group_name), "y": typed_array(float_array(values)), "showlegend": False}
+            for group_name, values in data_groups.items()
+        ]
+        
+        return {
+            "data": traces,
+            "layout": {
+                **BASE_LAYOUT,
+                "title": {"text": title},
+                "xaxis": {"title": {"text": "Groups"}},
+                "yaxis": {"title": {"text": y_title}}
+            }
+        }
+        
+    except orjson.JSONDecodeError as e:
+        return error_figure(f"Error parsing JSON data: {str(e)}", title="JSON Parse Error")
         
     except Exception as e:
-        fig = go.Figure()
-        fig.add_annotation(
-            text=f"Error creating violin plot: {str(e)}",
-            xref="paper", yref="paper",
-            x=0.5, y=0.5, showarrow=False
-        )
-        fig.update_layout(title="Chart Generation Error")
-        return fig.to_dict()
\ No newline at end of file
+        return error_figure(f"Error creating violin plot: {str(e)}")
\ No newline at end of file
@@ -7,13 +7,57 @@ These functions generate realistic data patterns based on user context and domai
 Modified functions to handle new parameter structures from fixed function declarations.
 """
 
+import functools
+import sys
 import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
 from typing import List, Dict, Any, Union, Optional
-import random
 import math
-import json
+import orjson
+
+
+@functools.lru_cache(maxsize=64)
+def unit_steps(n: int) -> np.ndarray:
+    """Read-only np.linspace(0, 1, n), cached per length."""
+    steps = np.linspace(0, 1, n)
+    steps.setflags(write=False)
+    return steps
+
+
+@functools.lru_cache(maxsize=64)
+def seasonal_wave(n: int, cycles: int) -> np.ndarray:
+    """Read-only sine with `cycles` full periods over n points, cached per (n, cycles)."""
+    wave = np.sin(2 * np.pi * cycles * unit_steps(n))
+    wave.setflags(write=False)
+    return wave
+
+
+@functools.lru_cache(maxsize=64)
+def interned_labels(labels: tuple) -> tuple:
+    """Tuple of interned label strings, shared by every call with the same labels."""
+    return tuple(sys.intern(label) if isinstance(label, str) else label for label in labels)
+
+
+def shared_labels(labels) -> tuple:
+    """Immutable copy of a caller's label list, so results never alias the input."""
+    labels = tuple(labels)
+    try:
+        return interned_labels(labels)
+    except TypeError:  # unhashable labels are copied but not shared
+        return labels
+
+
+@functools.lru_cache(maxsize=128)
+def date_labels(start_date: str, end_date: str, freq: str) -> tuple:
+    """'YYYY-MM-DD' labels of pd.date_range(start_date, end_date, freq), cached per range."""
+    dates = pd.date_range(start=pd.to_datetime(start_date), end=pd.to_datetime(end_date), freq=freq)
+    return tuple(dates.strftime('%Y-%m-%d'))
+
+
+def output_array(values: np.ndarray, as_list: bool):
+    """Numeric column as a list, or the array itself for NumPy-aware callers (as_list=False)."""
+    return values.tolist() if as_list else values
 
 
 def generate_business_data(
@@ -21,7 +65,8 @@ def generate_business_data(
     categories: List[str], 
     trend: str = "random",
     base_value: float = 100,
-    variation: float = 0.3
+    variation: float = 0.3,
+    as_list: bool = True
 ) -> Dict[str, List]:
     """
     Generate business-related data like sales, revenue, performance metrics.
@@ -32,12 +77,13 @@ def generate_business_data(
         trend: Overall trend ('increasing', 'decreasing', 'random', 'seasonal')
         base_value: Base value around which data is generated
         variation: Amount of variation (0.0 to 1.0)
+        as_list: Return numeric columns as lists; False keeps them as NumPy arrays
     
     Returns:
         Dictionary with 'categories' and 'values' keys
     """
     try:
-        np.random.seed(42)  # For consistent results
+        rng = np.random.default_rng(42)  # For consistent results
         n_categories = len(categories)
         
         # Generate base values
@@ -47,37 +93,39 @@ def generate_business_data(
             base_values = np.linspace(base_value * 1.3, base_value * 0.7, n_categories)
         elif trend == "seasonal":
             # Create a seasonal pattern
-            x = np.linspace(0, 2 * np.pi, n_categories)
-            base_values = base_value + (base_value * 0.3 * np.sin(x))
+            base_values = base_value + (base_value * 0.3 * seasonal_wave(n_categories, 1))
         else:  # random
             base_values = np.full(n_categories, base_value)
         
-        # Add variation
-        noise = np.random.normal(0, base_value * variation, n_categories)
-        values = base_values + noise
+        # Add variation; the noise draw doubles as the output buffer, and the
+        # steps below update it in place instead of allocating temporaries
+        values = rng.normal(0, base_value * variation, n_categories)
+        values += base_values
         
         # Ensure positive values for business data
-        values = np.maximum(values, base_value * 0.1)
+        np.maximum(values, base_value * 0.1, out=values)
         
         # Apply data type specific adjustments
         if data_type.lower() in ['sales', 'revenue']:
-            values = np.round(values, 2)
+            np.round(values, 2, out=values)
         elif data_type.lower() == 'customers':
             values = np.round(values).astype(int)
         elif data_type.lower() == 'growth':
             # Convert to percentage
-            values = ((values / base_value) - 1) * 100
-            values = np.round(values, 1)
+            values /= base_value
+            values -= 1
+            values *= 100
+            np.round(values, 1, out=values)
         
         return {
-            'categories': categories,
-            'values': values.tolist()
+            'categories': shared_labels(categories),
+            'values': output_array(values, as_list)
         }
         
     except Exception as e:
         # Return simple default data on error
         return {
-            'categories': categories,
+            'categories': shared_labels(categories),
             'values': [100] * len(categories)
         }
 
@@ -88,7 +136,8 @@ def generate_time_series_data(
     pattern: str = "linear",
     frequency: str = "daily",
     base_value: float = 100,
-    noise_level: float = 0.1
+    noise_level: float = 0.1,
+    as_list: bool = True
 ) -> Dict[str, List]:
     """
     Generate time series data with various patterns.
@@ -100,26 +149,24 @@ def generate_time_series_data(
         frequency: Data frequency ('daily', 'weekly', 'monthly')
         base_value: Base value for the series
         noise_level: Amount of random noise (0.0 to 1.0)
+        as_list: Return numeric columns as lists; False keeps them as NumPy arrays
     
     Returns:
         Dictionary with 'dates' and 'values' keys
     """
     try:
-        start = pd.to_datetime(start_date)
-        end = pd.to_datetime(end_date)
-        
         # Generate date range
         if frequency == "daily":
-            dates = pd.date_range(start=start, end=end, freq='D')
+            dates = date_labels(start_date, end_date, 'D')
         elif frequency == "weekly":
-            dates = pd.date_range(start=start, end=end, freq='W')
+            dates = date_labels(start_date, end_date, 'W')
         elif frequency == "monthly":
-            dates = pd.date_range(start=start, end=end, freq='M')
+            dates = date_labels(start_date, end_date, 'M')
         else:
-            dates = pd.date_range(start=start, end=end, freq='D')
+            dates = date_labels(start_date, end_date, 'D')
         
         n_points = len(dates)
-        x = np.linspace(0, 1, n_points)
+        x = unit_steps(n_points)
         
         # Generate base pattern
         if pattern == "linear":
@@ -127,43 +174,58 @@ def generate_time_series_data(
         elif pattern == "exponential":
             values = base_value * np.exp(x * 0.5)
         elif pattern == "seasonal":
-            values = base_value + (base_value * 0.3 * np.sin(2 * np.pi * x * 4))
+            values = base_value + (base_value * 0.3 * seasonal_wave(n_points, 4))
         elif pattern == "trend_seasonal":
             trend = base_value + (base_value * 0.3 * x)
-            seasonal = base_value * 0.2 * np.sin(2 * np.pi * x * 4)
+            seasonal = base_value * 0.2 * seasonal_wave(n_points, 4)
             values = trend + seasonal
         else:
-            values = np.full(n_points, base_value)
+            values = np.full(n_points, base_value, dtype=np.float64)
         
-        # Add noise
+        # Add noise, floor and round in place on the pattern array
         if noise_level > 0:
-            noise = np.random.normal(0, base_value * noise_level, n_points)
-            values += noise
+            values += np.random.default_rng().normal(0, base_value * noise_level, n_points)
         
         # Ensure positive values
-        values = np.maximum(values, base_value * 0.1)
+        np.maximum(values, base_value * 0.1, out=values)
+        np.round(values, 2, out=values)
         
         return {
-            'dates': [d.strftime('%Y-%m-%d') for d in dates],
-            'values': np.round(values, 2).tolist()
+            'dates': list(dates),
+            'values': output_array(values, as_list)
         }
         
     except Exception as e:
         # Return simple default data on error
         default_dates = pd.date_range(start='2024-01-01', periods=30, freq='D')
         return {
-            'dates': [d.strftime('%Y-%m-%d') for d in default_dates],
+            'dates': default_dates.strftime('%Y-%m-%d').tolist(),
             'values': [100] * 30
         }
 
 
+def uniform_fallback_data(size: int) -> Dict[str, Any]:
+    """Uniform 0-100 sample in the generate_statistical_data result shape, for when generation fails."""
+    values = np.random.default_rng(42).random(max(int(size), 0))
+    values *= 100
+    np.round(values, 2, out=values)
+    return {
+        'data': values.tolist(),
+        'distribution': 'uniform',
+        'size': size,
+        'parameters': {'min': 0, 'max': 100},
+        'type': 'statistical'
+    }
+
+
 # Updated generate_statistical_data function in data_generators.py
 # Replace the existing function with this version
 
 def generate_statistical_data(
     distribution: str, 
     size: int, 
-    parameters_json: str
+    parameters_json: Union[Dict[str, Any], str],
+    as_list: bool = True
 ) -> Dict[str, Any]:
     """
     Generate data following specific statistical distributions.
@@ -172,75 +234,69 @@ def generate_statistical_data(
     Args:
         distribution: Type of distribution ('normal', 'uniform', 'exponential', 'gamma')
         size: Number of data points to generate
-        parameters_json: JSON string of distribution parameters (mean, std, min, max, etc.)
+        parameters_json: Distribution parameters (mean, std, min, max, etc.), as a dict
+            or as the JSON string the model sends
+        as_list: Return numeric columns as lists; False keeps them as NumPy arrays
     
     Returns:
         Dict with consistent structure: {'data': List[float], 'distribution': str, 'size': int, 'parameters': dict}
     """
     try:
-        np.random.seed(42)
+        rng = np.random.default_rng(42)
         
-        # Parse JSON string to dictionary
-        parameters = json.loads(parameters_json)
+        # Only tool calls hand over a JSON string; Python callers pass the dict itself
+        if isinstance(parameters_json, str):
+            parameters = orjson.loads(parameters_json)
+        else:
+            parameters = parameters_json or {}
         
         if distribution == "normal":
             mean = parameters.get('mean', 0)
             std = parameters.get('std', 1)
-            values = np.random.normal(mean, std, size)
+            values = rng.normal(mean, std, size)
             
         elif distribution == "uniform":
             min_val = parameters.get('min', 0)
             max_val = parameters.get('max', 1)
-            values = np.random.uniform(min_val, max_val, size)
+            values = rng.uniform(min_val, max_val, size)
             
         elif distribution == "exponential":
             scale = parameters.get('scale', 1)
-            values = np.random.exponential(scale, size)
+            values = rng.exponential(scale, size)
             
         elif distribution == "gamma":
             shape = parameters.get('shape', 2)
             scale = parameters.get('scale', 1)
-            values = np.random.gamma(shape, scale, size)
+            values = rng.gamma(shape, scale, size)
             
         else:
             # Default to normal distribution
-            values = np.random.normal(0, 1, size)
+            values = rng.normal(0, 1, size)
         
         # FIXED: Return consistent Dict structure like other data generation functions
         return {
-            'data': np.round(values, 3).tolist(),
+            'data': output_array(np.round(values, 3, out=values), as_list),
             'distribution': distribution,
             'size': size,
             'parameters': parameters,
             'type': 'statistical'  # Helps with visualization type detection
         }
         
-    except json.JSONDecodeError as e:
+    except orjson.JSONDecodeError as e:
         # Return simple random data on JSON parse error with consistent structure
-        return {
-            'data': [round(random.random() * 100, 2) for _ in range(size)],
-            'distribution': 'uniform',
-            'size': size,
-            'parameters': {'min': 0, 'max': 100},
-            'type': 'statistical'
-        }
+        return uniform_fallback_data(size)
         
     except Exception as e:
         # Return simple random data on error with consistent structure
-        return {
-            'data': [round(random.random() * 100, 2) for _ in range(size)],
-            'distribution': 'uniform', 
-            'size': size,
-            'parameters': {'min': 0, 'max': 100},
-            'type': 'statistical'
-        }
+        return uniform_fallback_data(size)
 
 
 def generate_comparison_data(
     items: List[str], 
     metrics: List[str],
     min_value: float = 50,
-    max_value: float = 150
+    max_value: float = 150,
+    as_list: bool = True
 ) -> Dict[str, Any]:
     """
     Generate comparison data for multiple items across multiple metrics.
@@ -251,39 +307,38 @@ def generate_comparison_data(
         metrics: List of metrics to compare (performance, cost, quality, etc.)
         min_value: Minimum value for generated data
         max_value: Maximum value for generated data
+        as_list: Return numeric columns as lists; False keeps them as NumPy arrays
     
     Returns:
         Dictionary with structured comparison data
     """
     try:
-        np.random.seed(42)
-        
-        data = {}
-        
-        # Generate data for each metric
-        for metric in metrics:
-            # Add some realistic variation per metric
-            if 'cost' in metric.lower():
-                # Cost metrics might be inversely related to quality
-                base_values = np.random.uniform(min_value, max_value, len(items))
-            elif 'quality' in metric.lower() or 'performance' in metric.lower():
-                # Quality/performance might be normally distributed
-                base_values = np.random.normal((min_value + max_value) / 2, 
-                                             (max_value - min_value) / 6, len(items))
-                base_values = np.clip(base_values, min_value, max_value)
-            else:
-                # Default random distribution
-                base_values = np.random.uniform(min_value, max_value, len(items))
-            
-            data[metric] = np.round(base_values, 2).tolist()
-        
-        data['items'] = items
+        rng = np.random.default_rng(42)
+        
+        # Every metric row is uniform by default (cost included); quality and
+        # performance metrics are normally distributed instead
+        normal_rows = np.array([
+            'cost' not in metric and ('quality' in metric or 'performance' in metric)
+            for metric in (m.lower() for m in metrics)
+        ], dtype=bool)
+        
+        # One (metrics, items) draw for all metrics
+        values = rng.uniform(min_value, max_value, (len(metrics), len(items)))
+        if normal_rows.any():
+            normal_values = rng.normal((min_value + max_value) / 2,
+                                       (max_value - min_value) / 6,
+                                       (int(normal_rows.sum()), len(items)))
+            values[normal_rows] = np.clip(normal_values, min_value, max_value, out=normal_values)
+        np.round(values, 2, out=values)
+        
+        data = dict(zip(metrics, output_array(values, as_list)))
+        data['items'] = shared_labels(items)
         return data
         
     except Exception as e:
         # Return simple default data on error
         return {
-            'items': items,
+            'items': shared_labels(items),
             metrics[0] if metrics else 'value': [100] * len(items)
         }
 
@@ -292,7 +347,8 @@ def generate_comparison_data(
 def generate_demographic_data(
     categories: List[str], 
     total_population: int = 10000,
-    distribution: str = "realistic"
+    distribution: str = "realistic",
+    as_list: bool = True
 ) -> Dict[str, List]:
     """
     Generate demographic data with realistic distributions.
@@ -301,53 +357,53 @@ def generate_demographic_data(
         categories: Demographic categories (age groups, regions, etc.)
         total_population: Total population to distribute
         distribution: Type of distribution ('uniform', 'realistic', 'skewed')
+        as_list: Return numeric columns as lists; False keeps them as NumPy arrays
     
     Returns:
         Dictionary with categories and population counts
     """
     try:
-        np.random.seed(42)
+        rng = np.random.default_rng(42)
         n_categories = len(categories)
         
         if distribution == "uniform":
             # Equal distribution
-            values = [total_population // n_categories] * n_categories
+            share, remainder = divmod(total_population, n_categories)
+            values = np.full(n_categories, share, dtype=np.int64)
             # Handle remainder
-            remainder = total_population % n_categories
-            for i in range(remainder):
-                values[i] += 1
+            values[:remainder] += 1
                 
         elif distribution == "realistic":
             # More realistic demographic distribution (some categories larger)
-            weights = np.random.dirichlet(np.ones(n_categories) * 2)  # Somewhat even but varied
-            values = (weights * total_population).astype(int)
+            weights = rng.dirichlet(np.ones(n_categories) * 2)  # Somewhat even but varied
+            values = np.rint(weights * total_population).astype(np.int64)
             
         elif distribution == "skewed":
             # Heavily skewed distribution
-            weights = np.random.power(2, n_categories)
+            weights = rng.power(2, n_categories)
             weights = weights / weights.sum()
-            values = (weights * total_population).astype(int)
+            values = np.rint(weights * total_population).astype(np.int64)
             
         else:
             # Default to uniform
-            values = [total_population // n_categories] * n_categories
+            values = np.full(n_categories, total_population // n_categories, dtype=np.int64)
         
-        # Ensure total adds up
-        values = values.tolist()
-        difference = total_population - sum(values)
+        # Ensure total adds up; rounding can overshoot, so settle the difference
+        # on the largest category where it can never go negative
+        difference = total_population - int(values.sum())
         if difference != 0:
-            values[0] += difference
+            values[values.argmax()] += difference
         
         return {
-            'categories': categories,
-            'values': values
+            'categories': shared_labels(categories),
+            'values': output_array(values, as_list)
         }
         
     except Exception as e:
         # Return simple default data on error
         equal_share = total_population // len(categories)
         return {
-            'categories': categories,
+            'categories': shared_labels(categories),
             'values': [equal_share] * len(categories)
         }
 
@@ -356,7 +412,8 @@ def generate_performance_data(
     entities: List[str],
     time_periods: List[str],
     metric_type: str = "score",
-    trend: str = "mixed"
+    trend: str = "mixed",
+    as_list: bool = True
 ) -> Dict[str, Any]:
     """
     Generate performance data across entities and time periods.
@@ -366,12 +423,13 @@ def generate_performance_data(
         time_periods: List of time periods (months, quarters, etc.)
         metric_type: Type of metric ('score', 'percentage', 'rating')
         trend: Overall trend ('improving', 'declining', 'mixed', 'stable')
+        as_list: Return numeric columns as lists; False keeps them as NumPy arrays
     
     Returns:
         Dictionary with performance matrix data
     """
     try:
-        np.random.seed(42)
+        rng = np.random.default_rng(42)
         n_entities = len(entities)
         n_periods = len(time_periods)
         
@@ -386,49 +444,43 @@ def generate_performance_data(
             base_range = (50, 100)
         
         min_val, max_val = base_range
-        data_matrix = []
         
-        for i, entity in enumerate(entities):
-            entity_data = []
-            
-            # Generate trend for this entity
-            if trend == "improving":
-                base_values = np.linspace(min_val + random.uniform(0, 10), 
-                                        max_val - random.uniform(0, 5), n_periods)
-            elif trend == "declining":
-                base_values = np.linspace(max_val - random.uniform(0, 5), 
-                                        min_val + random.uniform(0, 10), n_periods)
-            elif trend == "stable":
-                base_val = random.uniform(min_val + 10, max_val - 10)
-                base_values = np.full(n_periods, base_val)
-            else:  # mixed
-                # Random trend for each entity
-                if random.random() < 0.33:
-                    base_values = np.linspace(min_val + random.uniform(0, 10), 
-                                            max_val - random.uniform(0, 5), n_periods)
-                elif random.random() < 0.66:
-                    base_values = np.linspace(max_val - random.uniform(0, 5), 
-                                            min_val + random.uniform(0, 10), n_periods)
-                else:
-                    base_val = random.uniform(min_val + 10, max_val - 10)
-                    base_values = np.full(n_periods, base_val)
-            
-            # Add noise
-            noise = np.random.normal(0, (max_val - min_val) * 0.05, n_periods)
-            values = base_values + noise
-            values = np.clip(values, min_val, max_val)
-            
-            if metric_type == "rating":
-                values = np.round(values, 1)
-            else:
-                values = np.round(values, 2)
-            
-            entity_data = values.tolist()
-            data_matrix.append(entity_data)
+        # Offsets from the range edges; capped at a quarter of the range so
+        # narrow ranges such as ratings (3-5) keep valid, ordered bounds
+        margin = min(10, (max_val - min_val) / 4)
+        
+        # Start/end level of every entity's trend line, drawn for all entities at once
+        low = min_val + rng.uniform(0, margin, n_entities)
+        high = max_val - rng.uniform(0, margin / 2, n_entities)
+        level = rng.uniform(min_val + margin, max_val - margin, n_entities)
+        
+        if trend == "improving":
+            start, end = low, high
+        elif trend == "declining":
+            start, end = high, low
+        elif trend == "stable":
+            start = end = level
+        else:  # mixed
+            # Random trend for each entity: improving, else declining, else stable
+            improving = rng.random(n_entities) < 0.33
+            declining = ~improving & (rng.random(n_entities) < 0.66)
+            start = np.where(improving, low, np.where(declining, high, level))
+            end = np.where(improving, high, np.where(declining, low, level))
+        
+        # (n_entities, n_periods) matrix: one linspace per row by broadcasting
+        steps = unit_steps(n_periods)
+        values = start[:, None] + (end - start)[:, None] * steps
+        
+        # Add noise
+        values += rng.normal(0, (max_val - min_val) * 0.05, values.shape)
+        np.clip(values, min_val, max_val, out=values)
+        np.round(values, 1 if metric_type == "rating" else 2, out=values)
+        
+        data_matrix = output_array(values, as_list)
         
         return {
-            'entities': entities,
-            'time_periods': time_periods,
+            'entities': shared_labels(entities),
+            'time_periods': shared_labels(time_periods),
             'data_matrix': data_matrix,
             'metric_type': metric_type
         }
@@ -437,8 +489,8 @@ def generate_performance_data(
         # Return simple default data on error
         default_value = 85 if metric_type == "score" else 4.0
         return {
-            'entities': entities,
-            'time_periods': time_periods,
+            'entities': shared_labels(entities),
+            'time_periods': shared_labels(time_periods),
             'data_matrix': [[default_value] * len(time_periods) for _ in entities],
             'metric_type': metric_type
         }
@@ -448,7 +500,8 @@ def generate_financial_data(
     securities: List[str],
     start_date: str,
     end_date: str,
-    volatility: float = 0.02
+    volatility: float = 0.02,
+    as_list: bool = True
 ) -> Dict[str, Any]:
     """
     Generate financial time series data (stock prices, returns, etc.).
@@ -458,36 +511,37 @@ def generate_financial_data(
         start_date: Start date in 'YYYY-MM-DD' format
         end_date: End date in 'YYYY-MM-DD' format
         volatility: Daily volatility (standard deviation of returns)
+        as_list: Return numeric columns as lists; False keeps them as NumPy arrays
     
     Returns:
         Dictionary with financial time series data
     """
     try:
-        np.random.seed(42)
-        dates = pd.date_range(start=start_date, end=end_date, freq='D')
+        rng = np.random.default_rng(42)
+        dates = date_labels(start_date, end_date, 'D')
         n_days = len(dates)
         
-        financial_data = {}
+        # Random walk for every security at once: one row of returns each
+        initial_prices = rng.uniform(50, 200, len(securities))
+        returns = rng.normal(0, volatility, (len(securities), n_days))
         
-        for security in securities:
-            # Generate random walk for stock price
-            initial_price = random.uniform(50, 200)
-            returns = np.random.normal(0, volatility, n_days)
-            
-            # Convert returns to prices using cumulative product
-            price_ratios = np.exp(np.cumsum(returns))
-            prices = initial_price * price_ratios
-            
-            financial_data[security] = np.round(prices, 2).tolist()
+        # Convert returns to prices using cumulative product, reusing the
+        # returns buffer for every step instead of allocating intermediates
+        prices = np.cumsum(returns, axis=1, out=returns)
+        np.exp(prices, out=prices)
+        prices *= initial_prices[:, None]
+        np.round(prices, 2, out=prices)
+        
+        financial_data = dict(zip(securities, output_array(prices, as_list)))
         
-        financial_data['dates'] = [d.strftime('%Y-%m-%d') for d in dates]
+        financial_data['dates'] = list(dates)
         
         return financial_data
         
     except Exception as e:
         # Return simple default data on error
         default_dates = pd.date_range(start='2024-01-01', periods=30, freq='D')
-        result = {'dates': [d.strftime('%Y-%m-%d') for d in default_dates]}
+        result = {'dates': default_dates.strftime('%Y-%m-%d').tolist()}
         
         for security in securities:
             result[security] = [100.0] * 30
@@ -0,0 +1,160 @@
+# SPDX-License-Identifier: MIT
+# Copyright © 2025 github.com/dtiberio
+
+# data_store.py
+"""Bounded store for large tool results referenced by data_id.
+Results are kept as the orjson bytes that were produced for the stub check:
+  • hot  – a small in-memory LRU of the most recent payloads
+  • cold – a SQLite file that receives whatever falls out of the LRU
+Entries older than DATA_STORE_TTL are dropped from both tiers by a
+background janitor thread, so memory stays flat however long a session runs.
+The SQLite file and the janitor only come into being once something spills
+or is stored, so an unused store costs nothing.
+"""
+
+import atexit
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from logger_config import get_logger
+
+store_logger = get_logger('gemini_chatbot.data_store')
+
+DATA_STORE_HOT_SIZE = int(os.getenv('DATA_STORE_HOT_SIZE', '16'))
+DATA_STORE_TTL = float(os.getenv('DATA_STORE_TTL', '3600'))  # seconds
+DATA_STORE_PATH = os.getenv('DATA_STORE_PATH')  # None → per-process temp file, removed on close
+JANITOR_INTERVAL = 300  # seconds between TTL sweeps
+
+
+class DataStore:
+    """Thread-safe LRU of raw payload bytes with SQLite overflow and TTL eviction."""
+
+    def __init__(
+        self,
+        path: Optional[str] = DATA_STORE_PATH,
+        hot_size: int = DATA_STORE_HOT_SIZE,
+        auto_janitor: bool = False,
+    ):
+        # A caller-supplied path is never deleted; only the default temp file is
+        self.path = path
+        self._owns_file = path is None
+        self.hot_size = hot_size
+        self.auto_janitor = auto_janitor
+        # data_id → (stored_at, payload)
+        self._hot: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self._janitor: Optional[threading.Thread] = None
+
+    def _connection(self) -> sqlite3.Connection:
+        """Open the overflow database on first spill (caller holds the lock)."""
+        if self._db is None:
+            if self.path is None:
+                # Resolved here, not at import, so forked workers get their own file
+                self.path = os.path.join(tempfile.gettempdir(), f"gemini_chatbot_data_{os.getpid()}.sqlite3")
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS payloads (data_id TEXT PRIMARY KEY, stored_at REAL, payload BLOB)"
+            )
+        return self._db
+
+    def put(self, data_id: str, payload: bytes) -> None:
+        """Store encoded payload bytes; the least recently used entry spills to disk."""
+        with self._lock:
+            if self.auto_janitor and self._janitor is None:
+                self.start_janitor()
+            self._hot[data_id] = (time.time(), payload)
+            self._hot.move_to_end(data_id)
+            if len(self._hot) > self.hot_size:
+                db = self._connection()
+                while len(self._hot) > self.hot_size:
+                    cold_id, (stored_at, cold_payload) = self._hot.popitem(last=False)
+                    db.execute(
+                        "INSERT OR REPLACE INTO payloads VALUES (?, ?, ?)", (cold_id, stored_at, cold_payload)
+                    )
+                db.commit()
+
+    def get(self, data_id: str) -> Optional[bytes]:
+        """Return the stored bytes for `data_id` (no re-encoding), or None."""
+        with self._lock:
+            entry = self._hot.get(data_id)
+            if entry is not None:
+                self._hot.move_to_end(data_id)
+                return entry[1]
+            if self._db is None:
+                return None
+            row = self._db.execute(
+                "SELECT payload FROM payloads WHERE data_id = ?", (data_id,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def evict_older_than(self, ttl: float) -> int:
+        """Drop entries stored more than `ttl` seconds ago; returns how many went."""
+        cutoff = time.time() - ttl
+        with self._lock:
+            stale = [data_id for data_id, (stored_at, _) in self._hot.items() if stored_at < cutoff]
+            for data_id in stale:
+                del self._hot[data_id]
+            removed = 0
+            if self._db is not None:
+                removed = self._db.execute("DELETE FROM payloads WHERE stored_at < ?", (cutoff,)).rowcount
+                self._db.commit()
+        if stale or removed:
+            store_logger.debug("🧹 Evicted %d stored payloads", len(stale) + removed)
+        return len(stale) + removed
+
+    def start_janitor(self, ttl: float = DATA_STORE_TTL, interval: float = JANITOR_INTERVAL) -> None:
+        """Run evict_older_than(ttl) every `interval` seconds in a daemon thread."""
+        if self._janitor is not None:
+            return
+
+        def sweep():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.evict_older_than(ttl)
+                except Exception as e:
+                    store_logger.warning("Data store eviction failed: %s", e)
+
+        self._janitor = threading.Thread(target=sweep, name="data-store-janitor", daemon=True)
+        self._janitor.start()
+
+    def close(self) -> None:
+        """Close the SQLite connection; remove the overflow file only if the store created it."""
+        with self._lock:
+            self._hot.clear()
+            if self._db is None:
+                return
+            self._db.close()
+            self._db = None
+        if self._owns_file:
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+
+    def __contains__(self, data_id: str) -> bool:
+        return self.get(data_id) is not None
+
+    def __len__(self) -> int:
+        with self._lock:
+            cold = self._db.execute("SELECT COUNT(*) FROM payloads").fetchone()[0] if self._db is not None else 0
+            return len(self._hot) + cold
+
+
+def create_data_store() -> DataStore:
+    """Process-wide store: janitor started by the first put, own overflow file removed at exit."""
+    store = DataStore(auto_janitor=True)
+    atexit.register(store.close)
+    return store
+
+
+__all__ = [
+    'DataStore',
+    'create_data_store',
+]
@@ -7,565 +7,293 @@ This module defines all the functions that Gemini can call for chart generation
 System instruction enforces proper 2-step workflow (data generation → visualization).
 """
 
-from google.genai import types
-from typing import Dict, List, Any
-
-# Chart function declarations
-BAR_CHART_FUNCTION = types.FunctionDeclaration(
-    name='create_bar_chart',
-    description='Create a bar chart for comparing categories or discrete values',
-    parameters=types.Schema(
-        type='OBJECT',
-        properties={
-            'categories': types.Schema(
-                type='ARRAY',
-                items=types.Schema(type='STRING'),
-                description='List of category names for the x-axis'
-            ),
-            'values': types.Schema(
-                type='ARRAY',
-                items=types.Schema(type='NUMBER'),
-                description='List of numerical values corresponding to each category'
-            ),
-            'title': types.Schema(
-                type='STRING',
-                description='Title for the chart'
-            ),
-            'x_title': types.Schema(
-                type='STRING',
-                description='Label for the x-axis'
-            ),
-            'y_title': types.Schema(
-                type='STRING',
-                description='Label for the y-axis'
-            ),
-            'color_scheme': types.Schema(
-                type='STRING',
-                description='Color scheme for the chart (plotly, viridis, blues, etc.)'
-            )
-        },
-        required=['categories', 'values']
-    )
-)
-
-LINE_CHART_FUNCTION = types.FunctionDeclaration(
-    name='create_line_chart',
-    description='Create a line chart for showing trends over time or continuous data',
-    parameters=types.Schema(
-        type='OBJECT',
-        properties={
-            'x_data': types.Schema(
-                type='ARRAY',
-                items=types.Schema(type='STRING'),
-                description='List of x-axis values (dates, numbers, or categories)'
-            ),
-            'y_data': types.Schema(
-                type='ARRAY',
-                items=types.Schema(type='NUMBER'),
-                description='List of y-axis numerical values'
-            ),
-            'title': types.Schema(
-                type='STRING',
-                description='Title for the chart'
-            ),
-            'x_title': types.Schema(
-                type='STRING',
-                description='Label for the x-axis'
-            ),
-            'y_title': types.Schema(
-                type='STRING',
-                description='Label for the y-axis'
-            ),
-            'line_color': types.Schema(
-                type='STRING',
-                description='Color of the line'
-            )
-        },
-        required=['x_data', 'y_data']
-    )
-)
+import functools
+import hashlib
+import re
+from typing import Dict, List, Any, Optional, Sequence
 
-SCATTER_PLOT_FUNCTION = types.FunctionDeclaration(
-    name='create_scatter_plot',
-    description='Create a scatter plot for showing relationships between two numerical variables',
-    parameters=types.Schema(
-        type='OBJECT',
-        properties={
-            'x_data': types.Schema(
-                type='ARRAY',
-                items=types.Schema(type='NUMBER'),
-                description='List of x-axis numerical values'
-            ),
-            'y_data': types.Schema(
-                type='ARRAY',
-                items=types.Schema(type='NUMBER'),
-                description='List of y-axis numerical values'
-            ),
-            'title': types.Schema(
-                type='STRING',
-                description='Title for the chart'
-            ),
-            'x_title': types.Schema(
-                type='STRING',
-                description='Label for the x-axis'
-            ),
-            'y_title': types.Schema(
-                type='STRING',
-                description='Label for the y-axis'
-            ),
-            'size_data': types.Schema(
-                type='ARRAY',
-                items=types.Schema(type='NUMBER'),
-                description='Optional list of values for point sizes'
-            ),
-            'color_data': types.Schema(
-                type='ARRAY',
-                items=types.Schema(type='STRING'),
-                description='Optional list of categories for point colors'
-            )
-        },
-        required=['x_data', 'y_data']
-    )
+import orjson
+from google.genai import types
+from pydantic import ConfigDict, TypeAdapter
+from typing_extensions import NotRequired, Required, TypedDict  # pydantic needs these on < 3.12
+
+import chart_functions
+import data_generators
+from function_descriptions import DESCRIPTIONS
+
+
+class SharedFunctionDeclaration(types.FunctionDeclaration):
+    """types.FunctionDeclaration whose wire dict is dumped once.
+    The SDK serialises every declaration with model_dump(exclude_none=True) on each
+    request; these declarations are never mutated, so that dict is reused.
+    """
+
+    @functools.cached_property
+    def wire_dict(self) -> Dict[str, Any]:
+        return super().model_dump(exclude_none=True)
+
+    def model_dump(self, **kwargs) -> Dict[str, Any]:
+        if kwargs == {'exclude_none': True}:
+            return self.wire_dict
+        return super().model_dump(**kwargs)
+
+
+# Schema builders: every distinct (type, description) is built once and the same
+# instance is shared by all declarations that use it (they are never mutated)
+@functools.lru_cache(maxsize=None)
+def item_schema(item_type: str) -> types.Schema:
+    """Bare element schema, e.g. the NUMBER inside an array of numbers."""
+    return types.Schema(type=item_type)
+
+
+@functools.lru_cache(maxsize=None)
+def array_schema(item_type: str, description: Optional[str] = None) -> types.Schema:
+    """ARRAY of `item_type` elements, or of nested arrays for 'ARRAY:NUMBER'-style types."""
+    if item_type.startswith('ARRAY:'):
+        items = array_schema(item_type.split(':', 1)[1])
+    else:
+        items = item_schema(item_type)
+    return types.Schema(type='ARRAY', items=items, description=description)
+
+
+@functools.lru_cache(maxsize=None)
+def field_schema(field_type: str, description: str) -> types.Schema:
+    """Scalar STRING/NUMBER/INTEGER/BOOLEAN parameter."""
+    return types.Schema(type=field_type, description=description)
+
+
+@functools.lru_cache(maxsize=None)
+def enum_schema(description: str, *values: str) -> types.Schema:
+    """STRING restricted to `values`, which are also listed in the description."""
+    return types.Schema(type='STRING', enum=list(values), description=f"{description}: {', '.join(values)}")
+
+
+def parameter_schema(kind: Any, description: str, descriptions: Dict[str, str], path: str) -> types.Schema:
+    """Schema for one parameter from its kind in the spec table:
+    'STRING'/'NUMBER'/'INTEGER'/'BOOLEAN', 'ARRAY:<item>', a tuple of allowed strings (enum), or a dict of nested OBJECT properties.
+    """
+    if isinstance(kind, tuple):
+        return enum_schema(description, *kind)
+    if isinstance(kind, dict):
+        return types.Schema(
+            type='OBJECT',
+            properties={
+                key: parameter_schema(sub_kind, descriptions[f"{path}.{key}"], descriptions, f"{path}.{key}")
+                for key, sub_kind in kind.items()
+            },
+            description=description
+        )
+    if kind.startswith('ARRAY:'):
+        return array_schema(kind.split(':', 1)[1], description)
+    return field_schema(kind, description)
+
+
+# Declarations as data: (name, parameter kinds, required parameters). The wording
+# comes from function_descriptions.DESCRIPTIONS; declaration() joins the two
+CHART_SPECS = (
+    ('create_bar_chart', {
+        'categories': 'ARRAY:STRING', 'values': 'ARRAY:NUMBER',
+        'title': 'STRING', 'x_title': 'STRING', 'y_title': 'STRING', 'color_scheme': 'STRING'
+    }, ('categories', 'values')),
+    ('create_line_chart', {
+        'x_data': 'ARRAY:STRING', 'y_data': 'ARRAY:NUMBER',
+        'title': 'STRING', 'x_title': 'STRING', 'y_title': 'STRING', 'line_color': 'STRING'
+    }, ('x_data', 'y_data')),
+    ('create_scatter_plot', {
+        'x_data': 'ARRAY:NUMBER', 'y_data': 'ARRAY:NUMBER',
+        'title': 'STRING', 'x_title': 'STRING', 'y_title': 'STRING',
+        'size_data': 'ARRAY:NUMBER', 'color_data': 'ARRAY:STRING'
+    }, ('x_data', 'y_data')),
+    ('create_pie_chart', {
+        'labels': 'ARRAY:STRING', 'values': 'ARRAY:NUMBER',
+        'title': 'STRING', 'show_percentages': 'BOOLEAN'
+    }, ('labels', 'values')),
+    ('create_histogram', {
+        'data': 'ARRAY:NUMBER', 'bins': 'INTEGER',
+        'title': 'STRING', 'x_title': 'STRING', 'y_title': 'STRING'
+    }, ('data',)),
+    ('create_heatmap', {
+        'data': 'ARRAY:ARRAY:NUMBER', 'x_labels': 'ARRAY:STRING', 'y_labels': 'ARRAY:STRING',
+        'title': 'STRING', 'color_scale': 'STRING'
+    }, ('data', 'x_labels', 'y_labels')),
+    ('create_box_plot', {
+        'data_groups_json': 'STRING', 'title': 'STRING', 'y_title': 'STRING'
+    }, ('data_groups_json',)),
+    ('create_area_chart', {
+        'x_data': 'ARRAY:STRING', 'y_data': 'ARRAY:NUMBER',
+        'title': 'STRING', 'x_title': 'STRING', 'y_title': 'STRING', 'fill_color': 'STRING'
+    }, ('x_data', 'y_data')),
+    ('create_violin_plot', {
+        'data_groups_json': 'STRING', 'title': 'STRING', 'y_title': 'STRING'
+    }, ('data_groups_json',)),
 )
 
-PIE_CHART_FUNCTION = types.FunctionDeclaration(
-    name='create_pie_chart',
-    description='Create a pie chart for showing proportions or percentages of a whole',
-    parameters=types.Schema(
-        type='OBJECT',
-        properties={
-            'labels': types.Schema(
-                type='ARRAY',
-                items=types.Schema(type='STRING'),
-                description='List of category labels'
-            ),
-            'values': types.Schema(
-                type='ARRAY',
-                items=types.Schema(type='NUMBER'),
-                description='List of numerical values for each category'
-            ),
-            'title': types.Schema(
-                type='STRING',
-                description='Title for the chart'
-            ),
-            'show_percentages': types.Schema(
-                type='BOOLEAN',
-                description='Whether to display percentages on the chart'
-            )
-        },
-        required=['labels', 'values']
-    )
+DATA_GENERATION_SPECS = (
+    ('generate_business_data', {
+        'data_type': 'STRING', 'categories': 'ARRAY:STRING',
+        'trend': ('increasing', 'decreasing', 'random', 'seasonal'),
+        'base_value': 'NUMBER', 'variation': 'NUMBER'
+    }, ('data_type', 'categories')),
+    ('generate_time_series_data', {
+        'start_date': 'STRING', 'end_date': 'STRING',
+        'pattern': ('linear', 'exponential', 'seasonal', 'trend_seasonal'),
+        'frequency': ('daily', 'weekly', 'monthly'),
+        'base_value': 'NUMBER', 'noise_level': 'NUMBER'
+    }, ('start_date', 'end_date')),
+    ('generate_statistical_data', {
+        'distribution': ('normal', 'uniform', 'exponential', 'gamma'),
+        'size': 'INTEGER',
+        'parameters': {
+            'mean': 'NUMBER', 'std': 'NUMBER', 'min': 'NUMBER',
+            'max': 'NUMBER', 'scale': 'NUMBER', 'shape': 'NUMBER'
+        }
+    }, ('distribution', 'size', 'parameters')),
+    ('generate_comparison_data', {
+        'items': 'ARRAY:STRING', 'metrics': 'ARRAY:STRING',
+        'min_value': 'NUMBER', 'max_value': 'NUMBER'
+    }, ('items', 'metrics')),
+    ('generate_demographic_data', {
+        'categories': 'ARRAY:STRING', 'total_population': 'INTEGER',
+        'distribution': ('uniform', 'realistic', 'skewed')
+    }, ('categories',)),
+    ('generate_performance_data', {
+        'entities': 'ARRAY:STRING', 'time_periods': 'ARRAY:STRING',
+        'metric_type': ('score', 'percentage', 'rating'),
+        'trend': ('improving', 'declining', 'mixed', 'stable')
+    }, ('entities', 'time_periods')),
+    ('generate_financial_data', {
+        'securities': 'ARRAY:STRING', 'start_date': 'STRING', 'end_date': 'STRING',
+        'volatility': 'NUMBER'
+    }, ('securities', 'start_date', 'end_date')),
 )
 
-HISTOGRAM_FUNCTION = types.FunctionDeclaration(
-    name='create_histogram',
-    description='Create a histogram for showing data distribution and frequency',
-    parameters=types.Schema(
-        type='OBJECT',
-        properties={
-            'data': types.Schema(
-                type='ARRAY',
-                items=types.Schema(type='NUMBER'),
-                description='List of numerical values to create histogram from'
-            ),
-            'bins': types.Schema(
-                type='INTEGER',
-                description='Number of bins for the histogram'
-            ),
-            'title': types.Schema(
-                type='STRING',
-                description='Title for the chart'
-            ),
-            'x_title': types.Schema(
-                type='STRING',
-                description='Label for the x-axis'
-            ),
-            'y_title': types.Schema(
-                type='STRING',
-                description='Label for the y-axis'
-            )
-        },
-        required=['data']
-    )
-)
 
-HEATMAP_FUNCTION = types.FunctionDeclaration(
-    name='create_heatmap',
-    description='Create a heatmap for showing relationships in matrix data or correlation',
-    parameters=types.Schema(
-        type='OBJECT',
-        properties={
-            'data': types.Schema(
-                type='ARRAY',
-                items=types.Schema(
-                    type='ARRAY',
-                    items=types.Schema(type='NUMBER')
-                ),
-                description='2D array of numerical values for the heatmap'
-            ),
-            'x_labels': types.Schema(
-                type='ARRAY',
-                items=types.Schema(type='STRING'),
-                description='List of labels for x-axis'
-            ),
-            'y_labels': types.Schema(
-                type='ARRAY',
-                items=types.Schema(type='STRING'),
-                description='List of labels for y-axis'
-            ),
-            'title': types.Schema(
-                type='STRING',
-                description='Title for the chart'
-            ),
-            'color_scale': types.Schema(
-                type='STRING',
-                description='Color scale for the heatmap (Viridis, Blues, Reds, etc.)'
-            )
-        },
-        required=['data', 'x_labels', 'y_labels']
+def declaration(name: str, kinds: Dict[str, Any], required: tuple) -> SharedFunctionDeclaration:
+    """One FunctionDeclaration taking an OBJECT parameter, worded from DESCRIPTIONS[name]."""
+    descriptions = DESCRIPTIONS[name]
+    return SharedFunctionDeclaration(
+        name=name,
+        description=descriptions['_doc'],
+        parameters=types.Schema(
+            type='OBJECT',
+            properties={
+                key: parameter_schema(kind, descriptions[key], descriptions, key)
+                for key, kind in kinds.items()
+            },
+            required=list(required)
+        )
     )
-)
 
-BOX_PLOT_FUNCTION = types.FunctionDeclaration(
-    name='create_box_plot',
-    description='Create a box plot for showing data distribution and outliers across categories',
-    parameters=types.Schema(
-        type='OBJECT',
-        properties={
-            'data_groups_json': types.Schema(
-                type='STRING',
-                description='JSON string representing dictionary where keys are group names and values are arrays of numbers. Example: {"Group A": [1,2,3], "Group B": [4,5,6]}'
-            ),
-            'title': types.Schema(
-                type='STRING',
-                description='Title for the chart'
-            ),
-            'y_title': types.Schema(
-                type='STRING',
-                description='Label for the y-axis'
-            )
-        },
-        required=['data_groups_json']
-    )
-)
 
-AREA_CHART_FUNCTION = types.FunctionDeclaration(
-    name='create_area_chart',
-    description='Create an area chart for showing filled trends or cumulative data',
-    parameters=types.Schema(
-        type='OBJECT',
-        properties={
-            'x_data': types.Schema(
-                type='ARRAY',
-                items=types.Schema(type='STRING'),
-                description='List of x-axis values (dates, categories, etc.)'
-            ),
-            'y_data': types.Schema(
-                type='ARRAY',
-                items=types.Schema(type='NUMBER'),
-                description='List of y-axis numerical values'
-            ),
-            'title': types.Schema(
-                type='STRING',
-                description='Title for the chart'
-            ),
-            'x_title': types.Schema(
-                type='STRING',
-                description='Label for the x-axis'
-            ),
-            'y_title': types.Schema(
-                type='STRING',
-                description='Label for the y-axis'
-            ),
-            'fill_color': types.Schema(
-                type='STRING',
-                description='Color for the filled area'
-            )
-        },
-        required=['x_data', 'y_data']
-    )
-)
+# Collect all chart functions
+CHART_FUNCTIONS = tuple(declaration(*spec) for spec in CHART_SPECS)
 
-VIOLIN_PLOT_FUNCTION = types.FunctionDeclaration(
-    name='create_violin_plot',
-    description='Create a violin plot for showing data distribution shapes and density',
-    parameters=types.Schema(
-        type='OBJECT',
-        properties={
-            'data_groups_json': types.Schema(
-                type='STRING',
-                description='JSON string representing dictionary where keys are group names and values are arrays of numbers. Example: {"Group A": [1,2,3], "Group B": [4,5,6]}'
-            ),
-            'title': types.Schema(
-                type='STRING',
-                description='Title for the chart'
-            ),
-            'y_title': types.Schema(
-                type='STRING',
-                description='Label for the y-axis'
-            )
-        },
-        required=['data_groups_json']
-    )
-)
+# Collect all data generation functions
+DATA_GENERATION_FUNCTIONS = tuple(declaration(*spec) for spec in DATA_GENERATION_SPECS)
 
-# Data generation function declarations
-BUSINESS_DATA_FUNCTION = types.FunctionDeclaration(
-    name='generate_business_data',
-    description='Generate business-related data like sales, revenue, or performance metrics',
-    parameters=types.Schema(
-        type='OBJECT',
-        properties={
-            'data_type': types.Schema(
-                type='STRING',
-                description='Type of business data: sales, revenue, customers, growth, etc.'
-            ),
-            'categories': types.Schema(
-                type='ARRAY',
-                items=types.Schema(type='STRING'),
-                description='List of categories (products, regions, departments, etc.)'
-            ),
-            'trend': types.Schema(
-                type='STRING',
-                description='Overall trend: increasing, decreasing, random, seasonal'
-            ),
-            'base_value': types.Schema(
-                type='NUMBER',
-                description='Base value around which data is generated'
-            ),
-            'variation': types.Schema(
-                type='NUMBER',
-                description='Amount of variation (0.0 to 1.0)'
-            )
-        },
-        required=['data_type', 'categories']
-    )
-)
+# Combine all functions (tuples: shared by identity, never mutated)
+ALL_FUNCTIONS = CHART_FUNCTIONS + DATA_GENERATION_FUNCTIONS
 
-TIME_SERIES_DATA_FUNCTION = types.FunctionDeclaration(
-    name='generate_time_series_data',
-    description='Generate time series data with various patterns over time',
-    parameters=types.Schema(
-        type='OBJECT',
-        properties={
-            'start_date': types.Schema(
-                type='STRING',
-                description='Start date in YYYY-MM-DD format'
-            ),
-            'end_date': types.Schema(
-                type='STRING',
-                description='End date in YYYY-MM-DD format'
-            ),
-            'pattern': types.Schema(
-                type='STRING',
-                description='Pattern type: linear, exponential, seasonal, trend_seasonal'
-            ),
-            'frequency': types.Schema(
-                type='STRING',
-                description='Data frequency: daily, weekly, monthly'
-            ),
-            'base_value': types.Schema(
-                type='NUMBER',
-                description='Base value for the series'
-            ),
-            'noise_level': types.Schema(
-                type='NUMBER',
-                description='Amount of random noise (0.0 to 1.0)'
-            )
-        },
-        required=['start_date', 'end_date']
-    )
-)
+# Gemini rejects the whole request (HTTP 400) if any declaration breaks these rules
+FUNCTION_NAME_PATTERN = re.compile(r'[A-Za-z_][A-Za-z0-9_.:-]{0,63}')
+
+
+def validate_declarations(declarations: Sequence[types.FunctionDeclaration]) -> None:
+    """Raise ValueError on invalid names, duplicates or required params missing from properties."""
+    seen = set()
+    for declaration in declarations:
+        name = declaration.name or ''
+        if not FUNCTION_NAME_PATTERN.fullmatch(name):
+            raise ValueError(f"Invalid function name for Gemini: {name!r}")
+        if name in seen:
+            raise ValueError(f"Duplicate function declaration: {name!r}")
+        seen.add(name)
+        schema = declaration.parameters
+        if schema is not None and schema.required:
+            missing = set(schema.required) - set(schema.properties or {})
+            if missing:
+                raise ValueError(f"{name}: required parameters not declared: {sorted(missing)}")
+
+
+# Checked once at import so a bad declaration fails at startup, not mid-chat
+validate_declarations(ALL_FUNCTIONS)
+
+SCHEMA_PYTHON_TYPES = {'STRING': str, 'NUMBER': float, 'INTEGER': int, 'BOOLEAN': bool}
+
+
+def schema_python_type(schema: Optional[types.Schema], name: str = 'Args') -> Any:
+    """Python type equivalent of a declaration schema, for pydantic validation."""
+    if schema is None or schema.type is None:
+        return Any
+    kind = schema.type.value
+    if kind == 'ARRAY':
+        return List[schema_python_type(schema.items, name)]
+    if kind == 'OBJECT':
+        if schema.properties:
+            required = set(schema.required or ())
+            fields = {
+                key: Required[value] if key in required else NotRequired[value]
+                for key, value in (
+                    (key, schema_python_type(prop, f"{name}_{key}"))
+                    for key, prop in schema.properties.items()
+                )
+            }
+            args_type = TypedDict(name, fields)
+            # The model often sends years or codes as numbers where strings are declared
+            args_type.__pydantic_config__ = ConfigDict(coerce_numbers_to_str=True)
+            return args_type
+        return Dict[str, Any]
+    return SCHEMA_PYTHON_TYPES.get(kind, Any)
+
+
+# Tool name → argument validator compiled once from the declaration (pydantic-core);
+# checked before dispatch so bad model output fails with a clear message
+ARG_VALIDATORS = {
+    function.name: TypeAdapter(schema_python_type(function.parameters, function.name))
+    for function in ALL_FUNCTIONS
+}
 
-STATISTICAL_DATA_FUNCTION = types.FunctionDeclaration(
-    name='generate_statistical_data',
-    description='Generate data following specific statistical distributions',
-    parameters=types.Schema(
-        type='OBJECT',
-        properties={
-            'distribution': types.Schema(
-                type='STRING',
-                description='Type of distribution: normal, uniform, exponential, gamma'
-            ),
-            'size': types.Schema(
-                type='INTEGER',
-                description='Number of data points to generate'
-            ),
-            'parameters_json': types.Schema(
-                type='STRING',
-                description='JSON string of distribution parameters (mean, std, min, max, scale, shape, etc.). Example: {"mean": 0, "std": 1}'
-            )
-        },
-        required=['distribution', 'size', 'parameters_json']
-    )
-)
 
-COMPARISON_DATA_FUNCTION = types.FunctionDeclaration(
-    name='generate_comparison_data',
-    description='Generate comparison data for multiple items across multiple metrics',
-    parameters=types.Schema(
-        type='OBJECT',
-        properties={
-            'items': types.Schema(
-                type='ARRAY',
-                items=types.Schema(type='STRING'),
-                description='List of items to compare (products, companies, etc.)'
-            ),
-            'metrics': types.Schema(
-                type='ARRAY',
-                items=types.Schema(type='STRING'),
-                description='List of metrics to compare (performance, cost, quality, etc.)'
-            ),
-            'min_value': types.Schema(
-                type='NUMBER',
-                description='Minimum value for generated data'
-            ),
-            'max_value': types.Schema(
-                type='NUMBER', 
-                description='Maximum value for generated data'
-            )
-        },
-        required=['items', 'metrics']
-    )
-)
+# Create tool configuration for Gemini
+CHART_TOOLS = (types.Tool(function_declarations=list(ALL_FUNCTIONS)),)
 
-# Additional data generation functions (keeping existing ones)
-DEMOGRAPHIC_DATA_FUNCTION = types.FunctionDeclaration(
-    name='generate_demographic_data',
-    description='Generate demographic data with realistic distributions',
-    parameters=types.Schema(
-        type='OBJECT',
-        properties={
-            'categories': types.Schema(
-                type='ARRAY',
-                items=types.Schema(type='STRING'),
-                description='Demographic categories (age groups, regions, etc.)'
-            ),
-            'total_population': types.Schema(
-                type='INTEGER',
-                description='Total population to distribute'
-            ),
-            'distribution': types.Schema(
-                type='STRING',
-                description='Type of distribution: uniform, realistic, skewed'
-            )
-        },
-        required=['categories']
-    )
-)
+# Configuration for different use cases: every request ships the one CHART_TOOLS
+# tree and is narrowed with allowed_function_names instead of a second tool list
+CHART_FUNCTION_NAMES = tuple(function.name for function in CHART_FUNCTIONS)
+DATA_FUNCTION_NAMES = tuple(function.name for function in DATA_GENERATION_FUNCTIONS)
 
-PERFORMANCE_DATA_FUNCTION = types.FunctionDeclaration(
-    name='generate_performance_data',
-    description='Generate performance data across entities and time periods',
-    parameters=types.Schema(
-        type='OBJECT',
-        properties={
-            'entities': types.Schema(
-                type='ARRAY',
-                items=types.Schema(type='STRING'),
-                description='List of entities (employees, teams, products, etc.)'
-            ),
-            'time_periods': types.Schema(
-                type='ARRAY',
-                items=types.Schema(type='STRING'),
-                description='List of time periods (months, quarters, etc.)'
-            ),
-            'metric_type': types.Schema(
-                type='STRING',
-                description='Type of metric: score, percentage, rating'
-            ),
-            'trend': types.Schema(
-                type='STRING',
-                description='Overall trend: improving, declining, mixed, stable'
-            )
-        },
-        required=['entities', 'time_periods']
-    )
-)
 
-FINANCIAL_DATA_FUNCTION = types.FunctionDeclaration(
-    name='generate_financial_data',
-    description='Generate financial time series data (stock prices, returns, etc.)',
-    parameters=types.Schema(
-        type='OBJECT',
-        properties={
-            'securities': types.Schema(
-                type='ARRAY',
-                items=types.Schema(type='STRING'),
-                description='List of security names/tickers'
-            ),
-            'start_date': types.Schema(
-                type='STRING',
-                description='Start date in YYYY-MM-DD format'
-            ),
-            'end_date': types.Schema(
-                type='STRING',
-                description='End date in YYYY-MM-DD format'
-            ),
-            'volatility': types.Schema(
-                type='NUMBER',
-                description='Daily volatility (standard deviation of returns)'
-            )
-        },
-        required=['securities', 'start_date', 'end_date']
+def restricted_tool_config(function_names: tuple) -> types.ToolConfig:
+    """tool_config that makes the model call only `function_names` from CHART_TOOLS."""
+    return types.ToolConfig(
+        function_calling_config=types.FunctionCallingConfig(
+            mode='ANY',
+            allowed_function_names=list(function_names)
+        )
     )
-)
 
-# Collect all chart functions
-CHART_FUNCTIONS = [
-    BAR_CHART_FUNCTION,
-    LINE_CHART_FUNCTION,
-    SCATTER_PLOT_FUNCTION,
-    PIE_CHART_FUNCTION,
-    HISTOGRAM_FUNCTION,
-    HEATMAP_FUNCTION,
-    BOX_PLOT_FUNCTION,
-    AREA_CHART_FUNCTION,
-    VIOLIN_PLOT_FUNCTION
-]
 
-# Collect all data generation functions
-DATA_GENERATION_FUNCTIONS = [
-    BUSINESS_DATA_FUNCTION,
-    TIME_SERIES_DATA_FUNCTION,
-    STATISTICAL_DATA_FUNCTION,
-    COMPARISON_DATA_FUNCTION,
-    DEMOGRAPHIC_DATA_FUNCTION,
-    PERFORMANCE_DATA_FUNCTION,
-    FINANCIAL_DATA_FUNCTION
-]
-
-# Combine all functions
-ALL_FUNCTIONS = CHART_FUNCTIONS + DATA_GENERATION_FUNCTIONS
-
-# Create tool configuration for Gemini
-CHART_TOOLS = [types.Tool(function_declarations=ALL_FUNCTIONS)]
-
-# Configuration for different use cases
-CHART_ONLY_TOOLS = [types.Tool(function_declarations=CHART_FUNCTIONS)]
-DATA_ONLY_TOOLS = [types.Tool(function_declarations=DATA_GENERATION_FUNCTIONS)]
-
-# Function mapping for execution (to be used in helper functions)
+# Function mapping for execution: tool name → callable, resolved once at import
 FUNCTION_MAP = {
-    # Chart functions - these will be imported from chart_functions.py
-    'create_bar_chart': 'chart_functions.create_bar_chart',
-    'create_line_chart': 'chart_functions.create_line_chart',
-    'create_scatter_plot': 'chart_functions.create_scatter_plot',
-    'create_pie_chart': 'chart_functions.create_pie_chart',
-    'create_histogram': 'chart_functions.create_histogram',
-    'create_heatmap': 'chart_functions.create_heatmap',
-    'create_box_plot': 'chart_functions.create_box_plot',
-    'create_area_chart': 'chart_functions.create_area_chart',
-    'create_violin_plot': 'chart_functions.create_violin_plot',
+    # Chart functions
+    'create_bar_chart': chart_functions.create_bar_chart,
+    'create_line_chart': chart_functions.create_line_chart,
+    'create_scatter_plot': chart_functions.create_scatter_plot,
+    'create_pie_chart': chart_functions.create_pie_chart,
+    'create_histogram': chart_functions.create_histogram,
+    'create_heatmap': chart_functions.create_heatmap,
+    'create_box_plot': chart_functions.create_box_plot,
+    'create_area_chart': chart_functions.create_area_chart,
+    'create_violin_plot': chart_functions.create_violin_plot,
     
-    # Data generation functions - these will be imported from data_generators.py
-    'generate_business_data': 'data_generators.generate_business_data',
-    'generate_time_series_data': 'data_generators.generate_time_series_data',
-    'generate_statistical_data': 'data_generators.generate_statistical_data',
-    'generate_comparison_data': 'data_generators.generate_comparison_data',
-    'generate_demographic_data': 'data_generators.generate_demographic_data',
-    'generate_performance_data': 'data_generators.generate_performance_data',
-    'generate_financial_data': 'data_generators.generate_financial_data'
+    # Data generation functions
+    'generate_business_data': data_generators.generate_business_data,
+    'generate_time_series_data': data_generators.generate_time_series_data,
+    'generate_statistical_data': data_generators.generate_statistical_data,
+    'generate_comparison_data': data_generators.generate_comparison_data,
+    'generate_demographic_data': data_generators.generate_demographic_data,
+    'generate_performance_data': data_generators.generate_performance_data,
+    'generate_financial_data': data_generators.generate_financial_data
 }
 
 # UPDATED SYSTEM INSTRUCTION - ENFORCES 2-STEP WORKFLOW
@@ -573,16 +301,16 @@ SYSTEM_INSTRUCTION = """You are a data visualization assistant that creates char
 
 CRITICAL WORKFLOW - ALWAYS FOLLOW THESE STEPS:
 
-**STEP 1: ANALYZE THE REQUEST**
+STEP 1: ANALYZE THE REQUEST
 For every user request, first determine:
 1. What type of data is needed? (business, time series, statistical, comparison, demographic, performance, financial)
 2. What type of visualization is most appropriate? (bar, line, scatter, pie, histogram, heatmap, box, area, violin)
 3. What parameters are needed for both data generation and visualization?
 
-**STEP 2: EXECUTE 2-FUNCTION WORKFLOW**
+STEP 2: EXECUTE 2-FUNCTION WORKFLOW
 For ALL visualization requests, you MUST make exactly TWO function calls in sequence:
 
-1. **FIRST CALL**: Use appropriate data generation function to create realistic data
+1. FIRST CALL: Use appropriate data generation function to create realistic data
    - generate_business_data: for sales, revenue, performance metrics
    - generate_time_series_data: for trends over time, temporal patterns
    - generate_statistical_data: for distributions, statistical analysis
@@ -591,7 +319,7 @@ For ALL visualization requests, you MUST make exactly TWO function calls in sequ
    - generate_performance_data: for performance across entities/time
    - generate_financial_data: for financial time series, securities data
 
-2. **SECOND CALL**: Use appropriate chart creation function with the generated data
+2. SECOND CALL: Use appropriate chart creation function with the generated data
    - create_bar_chart: for comparing categories, discrete values
    - create_line_chart: for trends over time, continuous data
    - create_scatter_plot: for relationships between two variables
@@ -602,7 +330,7 @@ For ALL visualization requests, you MUST make exactly TWO function calls in sequ
    - create_area_chart: for filled trend visualizations
    - create_violin_plot: for distribution shapes, density
 
-**ONE-SHOT EXAMPLE:**
+ONE-SHOT EXAMPLE:
 
 User Request: "Show me a bar chart of sales performance across different product categories"
 
@@ -634,7 +362,7 @@ create_bar_chart(
 )
 ```
 
-**IMPORTANT RULES:**
+IMPORTANT RULES:
 - NEVER create charts with hardcoded sample data
 - NEVER skip the data generation step for visualizations
 - ALWAYS use realistic parameters that match the user's context
@@ -643,32 +371,44 @@ create_bar_chart(
 - Match data generation parameters to user's specific domain (business context, time periods, etc.)
 - Ensure data generation parameters create appropriate scale and variety for the visualization
 
-**EXAMPLE REQUEST PATTERNS:**
+EXAMPLE REQUEST PATTERNS:
 
 "Show me quarterly revenue trends" →
-1. generate_time_series_data(quarterly data, revenue pattern)  
+1. generate_time_series_data(quarterly data, revenue pattern)
 2. create_line_chart(with generated time series data)
 
-"Compare employee performance across departments" →  
+"Compare employee performance across departments" →
 1. generate_comparison_data(departments, performance metrics)
 2. create_bar_chart(with generated comparison data)
 
 "Create a scatter plot of marketing spend vs sales" →
-1. generate_business_data(marketing and sales data)  
+1. generate_business_data(marketing and sales data)
 2. create_scatter_plot(with generated business data)
 
-"Generate sales data for Q4" → 
+"Generate sales data for Q4" →
 Only: generate_business_data(Q4 sales parameters) - NO chart since no visualization requested
 
 Always provide clear explanations of what data you're generating and why you chose the specific visualization type."""
 
+# Content hash of the static part of every request (tool schema + system
+# instruction), computed once: a cheap cache key that changes whenever either is edited
+TOOLS_FINGERPRINT = hashlib.blake2b(
+    orjson.dumps(
+        [function.model_dump(mode='json', exclude_none=True) for function in ALL_FUNCTIONS],
+        option=orjson.OPT_SORT_KEYS
+    ) + SYSTEM_INSTRUCTION.encode('utf-8'),
+    digest_size=16
+).hexdigest()
+
 # Export configurations for use in other modules
 __all__ = [
-    'genai_client',
-    'GENERATION_CONFIG', 
-    'BASIC_CONFIG',
-    'DATA_HEAVY_CONFIG',
-    'MODELS',
+    'ALL_FUNCTIONS',
+    'ARG_VALIDATORS',
+    'CHART_FUNCTION_NAMES',
     'CHART_TOOLS',
-    'SYSTEM_INSTRUCTION'
+    'DATA_FUNCTION_NAMES',
+    'FUNCTION_MAP',
+    'SYSTEM_INSTRUCTION',
+    'TOOLS_FINGERPRINT',
+    'restricted_tool_config'
 ]
\ No newline at end of file
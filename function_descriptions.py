@@ -0,0 +1,150 @@
+# SPDX-License-Identifier: MIT
+# Copyright © 2025 github.com/dtiberio
+
+# function_descriptions.py
+"""Descriptions sent to Gemini with every function declaration.
+Kept apart from the schema structure in function_declarations.py so the wording
+can be edited (or a shorter set swapped in) without touching the declarations.
+Keyed by function name: '_doc' is the function description, every other key a
+parameter ('parent.child' for a property of an OBJECT parameter). Enum
+descriptions get their allowed values appended by the schema builder.
+"""
+
+DESCRIPTIONS = {
+    # Chart functions
+    'create_bar_chart': {
+        '_doc': 'Create a bar chart for comparing categories or discrete values',
+        'categories': 'List of category names for the x-axis',
+        'values': 'List of numerical values corresponding to each category',
+        'title': 'Title for the chart',
+        'x_title': 'Label for the x-axis',
+        'y_title': 'Label for the y-axis',
+        'color_scheme': 'Color scheme for the chart (plotly, viridis, blues, etc.)'
+    },
+    'create_line_chart': {
+        '_doc': 'Create a line chart for showing trends over time or continuous data',
+        'x_data': 'List of x-axis values (dates, numbers, or categories)',
+        'y_data': 'List of y-axis numerical values',
+        'title': 'Title for the chart',
+        'x_title': 'Label for the x-axis',
+        'y_title': 'Label for the y-axis',
+        'line_color': 'Color of the line'
+    },
+    'create_scatter_plot': {
+        '_doc': 'Create a scatter plot for showing relationships between two numerical variables',
+        'x_data': 'List of x-axis numerical values',
+        'y_data': 'List of y-axis numerical values',
+        'title': 'Title for the chart',
+        'x_title': 'Label for the x-axis',
+        'y_title': 'Label for the y-axis',
+        'size_data': 'Optional list of values for point sizes',
+        'color_data': 'Optional list of categories for point colors'
+    },
+    'create_pie_chart': {
+        '_doc': 'Create a pie chart for showing proportions or percentages of a whole',
+        'labels': 'List of category labels',
+        'values': 'List of numerical values for each category',
+        'title': 'Title for the chart',
+        'show_percentages': 'Whether to display percentages on the chart'
+    },
+    'create_histogram': {
+        '_doc': 'Create a histogram for showing data distribution and frequency',
+        'data': 'List of numerical values to create histogram from',
+        'bins': 'Number of bins for the histogram',
+        'title': 'Title for the chart',
+        'x_title': 'Label for the x-axis',
+        'y_title': 'Label for the y-axis'
+    },
+    'create_heatmap': {
+        '_doc': 'Create a heatmap for showing relationships in matrix data or correlation',
+        'data': '2D array of numerical values for the heatmap',
+        'x_labels': 'List of labels for x-axis',
+        'y_labels': 'List of labels for y-axis',
+        'title': 'Title for the chart',
+        'color_scale': 'Color scale for the heatmap (Viridis, Blues, Reds, etc.)'
+    },
+    'create_box_plot': {
+        '_doc': 'Create a box plot for showing data distribution and outliers across categories',
+        'data_groups_json': 'JSON string representing dictionary where keys are group names and values are arrays of numbers. Example: {"Group A": [1,2,3], "Group B": [4,5,6]}',
+        'title': 'Title for the chart',
+        'y_title': 'Label for the y-axis'
+    },
+    'create_area_chart': {
+        '_doc': 'Create an area chart for showing filled trends or cumulative data',
+        'x_data': 'List of x-axis values (dates, categories, etc.)',
+        'y_data': 'List of y-axis numerical values',
+        'title': 'Title for the chart',
+        'x_title': 'Label for the x-axis',
+        'y_title': 'Label for the y-axis',
+        'fill_color': 'Color for the filled area'
+    },
+    'create_violin_plot': {
+        '_doc': 'Create a violin plot for showing data distribution shapes and density',
+        'data_groups_json': 'JSON string representing dictionary where keys are group names and values are arrays of numbers. Example: {"Group A": [1,2,3], "Group B": [4,5,6]}',
+        'title': 'Title for the chart',
+        'y_title': 'Label for the y-axis'
+    },
+
+    # Data generation functions
+    'generate_business_data': {
+        '_doc': 'Generate business-related data like sales, revenue, or performance metrics',
+        'data_type': 'Type of business data: sales, revenue, customers, growth, etc.',
+        'categories': 'List of categories (products, regions, departments, etc.)',
+        'trend': 'Overall trend',
+        'base_value': 'Base value around which data is generated',
+        'variation': 'Amount of variation (0.0 to 1.0)'
+    },
+    'generate_time_series_data': {
+        '_doc': 'Generate time series data with various patterns over time',
+        'start_date': 'Start date in YYYY-MM-DD format',
+        'end_date': 'End date in YYYY-MM-DD format',
+        'pattern': 'Pattern type',
+        'frequency': 'Data frequency',
+        'base_value': 'Base value for the series',
+        'noise_level': 'Amount of random noise (0.0 to 1.0)'
+    },
+    'generate_statistical_data': {
+        '_doc': 'Generate data following specific statistical distributions',
+        'distribution': 'Type of distribution',
+        'size': 'Number of data points to generate',
+        'parameters': 'Distribution parameters; set the ones the chosen distribution uses. Example: {"mean": 0, "std": 1}',
+        'parameters.mean': 'Mean (normal)',
+        'parameters.std': 'Standard deviation (normal)',
+        'parameters.min': 'Lower bound (uniform)',
+        'parameters.max': 'Upper bound (uniform)',
+        'parameters.scale': 'Scale (exponential, gamma)',
+        'parameters.shape': 'Shape (gamma)'
+    },
+    'generate_comparison_data': {
+        '_doc': 'Generate comparison data for multiple items across multiple metrics',
+        'items': 'List of items to compare (products, companies, etc.)',
+        'metrics': 'List of metrics to compare (performance, cost, quality, etc.)',
+        'min_value': 'Minimum value for generated data',
+        'max_value': 'Maximum value for generated data'
+    },
+    'generate_demographic_data': {
+        '_doc': 'Generate demographic data with realistic distributions',
+        'categories': 'Demographic categories (age groups, regions, etc.)',
+        'total_population': 'Total population to distribute',
+        'distribution': 'Type of distribution'
+    },
+    'generate_performance_data': {
+        '_doc': 'Generate performance data across entities and time periods',
+        'entities': 'List of entities (employees, teams, products, etc.)',
+        'time_periods': 'List of time periods (months, quarters, etc.)',
+        'metric_type': 'Type of metric',
+        'trend': 'Overall trend'
+    },
+    'generate_financial_data': {
+        '_doc': 'Generate financial time series data (stock prices, returns, etc.)',
+        'securities': 'List of security names/tickers',
+        'start_date': 'Start date in YYYY-MM-DD format',
+        'end_date': 'End date in YYYY-MM-DD format',
+        'volatility': 'Daily volatility (standard deviation of returns)'
+    }
+}
+
+
+__all__ = [
+    'DESCRIPTIONS',
+]
@@ -6,27 +6,68 @@
 Centralized logging configuration for the Dash Gemini Chatbot application.
 This module provides structured logging with environment-based configuration,
 rotating file handlers, and contextual logging for debugging function calling issues.
+
+Importing it turns off logging.logThreads / logProcesses / logMultiprocessing /
+logAsyncioTasks for the whole process, so LogRecords from every library stop
+carrying thread, process and task fields (JSON records get `pid` from here).
 """
 
+import atexit
 import logging
 import logging.handlers
 import os
+import queue
+import random
+import socket
 import sys
-import json
+import time
+from contextvars import ContextVar
 from datetime import datetime
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Set
 from pathlib import Path
+import orjson
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
+# Correlation id of the chat turn being handled; stamped on every record
+# emitted while it is set (see _InProcessQueueHandler.prepare)
+CORRELATION_ID: ContextVar[str] = ContextVar("correlation_id", default="")
+
+# Fraction of hot-path operations that log their timing (1.0 = all of them)
+TIMING_SAMPLE_RATE = float(os.getenv('LOG_TIMING_SAMPLE_RATE', '0.1'))
+
+# None of our formatters print thread or process fields, so don't collect them per record
+logging.logThreads = False
+logging.logProcesses = False
+logging.logMultiprocessing = False
+logging.logAsyncioTasks = False  # Python 3.12+; a harmless attribute before that
+
+# Host identity for JSON records, looked up once instead of per record;
+# forked workers (e.g. gunicorn --preload) refresh the pid in the child
+HOSTNAME = socket.gethostname()
+PID = os.getpid()
+
+
+def _refresh_pid():
+    global PID
+    PID = os.getpid()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_refresh_pid)
+
 class ContextualLogger:
     """Enhanced logger with context tracking for function calls and API interactions."""
     
+    __slots__ = ('logger', 'context', '_is_enabled_for')
+    
     def __init__(self, name: str):
         self.logger = logging.getLogger(name)
         self.context: Dict[str, Any] = {}
+        # Bound once: checked first on every log call
+        self._is_enabled_for = self.logger.isEnabledFor
     
     def set_context(self, **kwargs):
         """Set context information for subsequent log messages."""
@@ -36,12 +77,23 @@ class ContextualLogger:
         """Clear all context information."""
         self.context.clear()
     
+    def isEnabledFor(self, level: int) -> bool:
+        """Check whether a message of this level would be processed."""
+        return self._is_enabled_for(level)
+    
     def _log_with_context(self, level: int, msg: str, *args, **kwargs):
-        """Log message with current context."""
+        """Log message with current context.
+        
+        `args` are forwarded untouched, so %-style messages are only
+        formatted for records that are actually emitted.
+        """
+        # Filtered records cost one cached level check - no extra dict, no dispatch
+        if not self._is_enabled_for(level):
+            return
         if self.context:
-            extra = kwargs.get('extra', {})
-            extra.update(self.context)
-            kwargs['extra'] = extra
+            # Merge into a new dict so caller-owned (possibly shared) extras are never mutated
+            extra = kwargs.get('extra')
+            kwargs['extra'] = {**extra, **self.context} if extra else self.context
         self.logger.log(level, msg, *args, **kwargs)
     
     def debug(self, msg: str, *args, **kwargs):
@@ -58,74 +110,160 @@ class ContextualLogger:
     
     def critical(self, msg: str, *args, **kwargs):
         self._log_with_context(logging.CRITICAL, msg, *args, **kwargs)
+    
+    def exception(self, msg: str, *args, **kwargs):
+        kwargs.setdefault('exc_info', True)
+        self._log_with_context(logging.ERROR, msg, *args, **kwargs)
+
+
+def _pruned_log(self, msg: str, *args, **kwargs):
+    """Stand-in for level methods below the configured LOG_LEVEL."""
+
+
+# ContextualLogger level methods and their levels; LoggingConfig swaps the
+# ones below LOG_LEVEL for _pruned_log, so e.g. debug() at INFO is one empty call
+LEVEL_METHODS = {
+    name: (level, getattr(ContextualLogger, name))
+    for name, level in (
+        ('debug', logging.DEBUG),
+        ('info', logging.INFO),
+        ('warning', logging.WARNING),
+        ('error', logging.ERROR),
+        ('exception', logging.ERROR),
+        ('critical', logging.CRITICAL),
+    )
+}
+
+
+# Attributes every LogRecord carries; anything else on a record came from
+# logger context or an `extra=` mapping
+_LOG_RECORD_ATTRS = frozenset(vars(logging.makeLogRecord({}))) | {'message', 'asctime', 'taskName'}
+
+# Extras may carry NumPy values or non-string keys; anything else falls back to str().
+# Deliberately no OPT_SORT_KEYS / OPT_INDENT_2: log_entry's insertion order is
+# already stable, and one compact line per record is what log shippers expect
+JSON_LOG_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
 
 
 class JSONFormatter(logging.Formatter):
     """JSON formatter for structured logging."""
     
     def format(self, record):
+        # ERROR records reach both the main and the error file handler;
+        # serialize them once and hand the same line to the second one
+        cached = record.__dict__.get('json_line')
+        if cached is not None:
+            return cached
+        
         log_entry = {
-            'timestamp': datetime.fromtimestamp(record.created).isoformat(),
+            'timestamp': datetime.fromtimestamp(record.created),  # orjson writes ISO 8601 itself
             'level': record.levelname,
             'logger': record.name,
             'message': record.getMessage(),
             'module': record.module,
             'function': record.funcName,
-            'line': record.lineno
+            'line': record.lineno,
+            'hostname': HOSTNAME,
+            'pid': PID
         }
         
-        # Add context information if available
-        if hasattr(record, 'user_id'):
-            log_entry['user_id'] = record.user_id
-        if hasattr(record, 'session_id'):
-            log_entry['session_id'] = record.session_id
-        if hasattr(record, 'model_name'):
-            log_entry['model_name'] = record.model_name
-        if hasattr(record, 'function_call'):
-            log_entry['function_call'] = record.function_call
-        if hasattr(record, 'response_time'):
-            log_entry['response_time'] = record.response_time
-        if hasattr(record, 'token_usage'):
-            log_entry['token_usage'] = record.token_usage
+        # Add context and structured `extra=` fields (anything that is not a
+        # standard LogRecord attribute), e.g. session_id, model_name, response_time
+        for key, value in record.__dict__.items():
+            if key not in _LOG_RECORD_ATTRS and key not in log_entry:
+                log_entry[key] = value
         
         # Add exception information if present
         if record.exc_info:
             log_entry['exception'] = self.formatException(record.exc_info)
         
-        return json.dumps(log_entry)
+        record.json_line = orjson.dumps(log_entry, default=str, option=JSON_LOG_OPTIONS).decode('utf-8')
+        return record.json_line
+
+
+# Record attributes shown in the console context suffix, in display order
+CONSOLE_CONTEXT_FIELDS = (
+    ('model_name', 'model={}'),
+    ('function_call', 'func={}'),
+    ('response_time', 'time={:.2f}s'),
+    ('correlation_id', 'corr={}'),
+)
+
+
+# ANSI color per level number, shared by every console formatter
+LEVEL_COLORS = {
+    logging.DEBUG: '\033[36m',     # Cyan
+    logging.INFO: '\033[32m',      # Green
+    logging.WARNING: '\033[33m',   # Yellow
+    logging.ERROR: '\033[31m',     # Red
+    logging.CRITICAL: '\033[35m',  # Magenta
+}
+RESET_COLOR = '\033[0m'
 
 
 class ColoredConsoleFormatter(logging.Formatter):
     """Colored console formatter for better readability."""
     
-    COLORS = {
-        'DEBUG': '\033[36m',    # Cyan
-        'INFO': '\033[32m',     # Green
-        'WARNING': '\033[33m',  # Yellow
-        'ERROR': '\033[31m',    # Red
-        'CRITICAL': '\033[35m', # Magenta
-        'ENDC': '\033[0m'       # End color
-    }
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Records arrive in bursts within the same second; reuse its HH:MM:SS
+        self._last_second = None
+        self._last_hhmmss = ''
+        # Color code and the padded, reset level column, built once per level
+        self._level_parts = {
+            levelno: (color, f" {logging.getLevelName(levelno):8s}{RESET_COLOR} ")
+            for levelno, color in LEVEL_COLORS.items()
+        }
     
     def format(self, record):
-        color = self.COLORS.get(record.levelname, '')
-        reset = self.COLORS['ENDC']
+        level_parts = self._level_parts.get(record.levelno)
+        if level_parts is None:
+            level_parts = ('', f" {record.levelname:8s}{RESET_COLOR} ")
+        color, level_column = level_parts
         
         # Format timestamp
-        timestamp = datetime.fromtimestamp(record.created).strftime('%H:%M:%S')
+        second = int(record.created)
+        if second != self._last_second:
+            self._last_second = second
+            self._last_hhmmss = time.strftime('%H:%M:%S', time.localtime(second))
+        
+        line = f"{color}{self._last_hhmmss}{level_column}{record.name:15s} {record.getMessage()}"
         
-        # Build context string
-        context_parts = []
-        if hasattr(record, 'model_name'):
-            context_parts.append(f"model={record.model_name}")
-        if hasattr(record, 'function_call'):
-            context_parts.append(f"func={record.function_call}")
-        if hasattr(record, 'response_time'):
-            context_parts.append(f"time={record.response_time:.2f}s")
+        # Context suffix only when the record carries any of the fields
+        fields = record.__dict__
+        context_parts = [
+            template.format(fields[name]) for name, template in CONSOLE_CONTEXT_FIELDS if name in fields
+        ]
+        if context_parts:
+            line = f"{line} [{', '.join(context_parts)}]"
         
-        context_str = f" [{', '.join(context_parts)}]" if context_parts else ""
+        # Render exc_info tracebacks so exc_info=True logs keep their stack trace
+        if record.exc_info:
+            line = f"{line}\n{self.formatException(record.exc_info)}"
         
-        return f"{color}{timestamp} {record.levelname:8s}{reset} {record.name:15s} {record.getMessage()}{context_str}"
+        return line
+
+
+class _InProcessQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler for a same-process listener.
+    
+    The stock prepare() pre-formats the whole record (traceback included) so it
+    can be pickled; our queue never leaves the process, so we only merge the
+    message arguments and leave exc_info for the real formatters to render.
+    """
+    
+    def prepare(self, record):
+        record.msg = record.getMessage()
+        record.args = None
+        # Runs on the emitting thread, so the caller's context is visible here
+        correlation_id = CORRELATION_ID.get()
+        if correlation_id:
+            record.correlation_id = correlation_id
+        return record
+
+
+# Log directories already created by a LoggingConfig in this process
+CREATED_LOG_DIRS: Set[str] = set()
 
 
 class LoggingConfig:
@@ -134,16 +272,24 @@ class LoggingConfig:
     def __init__(self):
         # Environment variables for logging configuration
         self.log_level = os.getenv('LOG_LEVEL', 'INFO').upper()
+        # Resolved once; unknown names fall back to INFO
+        level = logging.getLevelName(self.log_level)
+        self.level = level if isinstance(level, int) else logging.INFO
         self.log_to_console = os.getenv('LOG_TO_CONSOLE', 'true').lower() == 'true'
         self.log_to_file = os.getenv('LOG_TO_FILE', 'false').lower() == 'true'
         self.log_format = os.getenv('LOG_FORMAT', 'colored').lower()  # 'colored', 'json', 'simple'
         self.log_dir = os.getenv('LOG_DIR', 'logs')
         self.max_log_files = int(os.getenv('MAX_LOG_FILES', '7'))  # Keep last 7 days
         self.max_log_size = int(os.getenv('MAX_LOG_SIZE_MB', '10')) * 1024 * 1024  # 10MB default
+        self.log_file_buffer = int(os.getenv('LOG_FILE_BUFFER', '100'))  # records; 0 = unbuffered
+        self.listener: Optional[logging.handlers.QueueListener] = None
+        # One ContextualLogger per name, handed out again on repeat requests
+        self.loggers: Dict[str, ContextualLogger] = {}
         
-        # Create logs directory if needed
-        if self.log_to_file:
+        # Create logs directory if needed (once per process and directory)
+        if self.log_to_file and self.log_dir not in CREATED_LOG_DIRS:
             Path(self.log_dir).mkdir(exist_ok=True)
+            CREATED_LOG_DIRS.add(self.log_dir)
         
         self._setup_logging()
     
@@ -152,110 +298,151 @@ class LoggingConfig:
         
         # Set root logger level
         root_logger = logging.getLogger()
-        root_logger.setLevel(getattr(logging, self.log_level))
+        root_logger.setLevel(self.level)
         
         # Clear existing handlers
         root_logger.handlers.clear()
         
+        # Prune level methods that the root level would filter anyway. Loggers
+        # inherit the root level, so nothing below it can be emitted; running
+        # this again (new LoggingConfig) restores the real methods
+        for name, (level, method) in LEVEL_METHODS.items():
+            setattr(ContextualLogger, name, method if level >= self.level else _pruned_log)
+        
+        # Real output handlers - these are driven by the queue listener thread,
+        # never attached to a logger directly
+        handlers = []
+        
         # Console handler
         if self.log_to_console:
             console_handler = logging.StreamHandler(sys.stdout)
-            console_handler.setLevel(getattr(logging, self.log_level))
+            console_handler.setLevel(self.level)
             
             if self.log_format == 'json':
                 console_handler.setFormatter(JSONFormatter())
-            elif self.log_format == 'colored':
+            elif self.log_format == 'colored' and sys.stdout.isatty():
+                # Redirected output (files, containers, CI) gets the plain format:
+                # escape codes there are only wasted bytes
                 console_handler.setFormatter(ColoredConsoleFormatter())
             else:
                 console_handler.setFormatter(
                     logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
                 )
             
-            root_logger.addHandler(console_handler)
+            handlers.append(console_handler)
         
-        # File handler with rotation
+        # File handlers with daily rotation; both share one JSON formatter
+        # for better parsing, so ERROR records are serialized only once
         if self.log_to_file:
-            log_file = os.path.join(self.log_dir, 'gemini_chatbot.log')
-            
-            # Use TimedRotatingFileHandler for daily rotation
-            file_handler = logging.handlers.TimedRotatingFileHandler(
-                log_file,
-                when='midnight',
-                interval=1,
-                backupCount=self.max_log_files,
-                encoding='utf-8'
-            )
-            file_handler.setLevel(getattr(logging, self.log_level))
-            
-            # Always use JSON format for file logging for better parsing
-            file_handler.setFormatter(JSONFormatter())
-            root_logger.addHandler(file_handler)
-            
-            # Also create a separate error log file
-            error_file = os.path.join(self.log_dir, 'gemini_chatbot_errors.log')
-            error_handler = logging.handlers.TimedRotatingFileHandler(
-                error_file,
-                when='midnight',
-                interval=1,
-                backupCount=self.max_log_files,
-                encoding='utf-8'
+            json_formatter = JSONFormatter()
+            file_handler = self._rotating_file_handler('gemini_chatbot.log', self.level, json_formatter)
+            if self.log_file_buffer > 0:
+                # Hand routine records to the file in batches; ERROR and above
+                # flush the batch at once, and shutdown flushes what is left
+                file_handler = logging.handlers.MemoryHandler(
+                    self.log_file_buffer, flushLevel=logging.ERROR,
+                    target=file_handler, flushOnClose=True
+                )
+                file_handler.setLevel(self.level)
+            handlers.append(file_handler)
+            # Also keep a separate error log file
+            handlers.append(self._rotating_file_handler(
+                'gemini_chatbot_errors.log', logging.ERROR, json_formatter
+            ))
+        
+        # Hot path only enqueues records; a single background thread
+        # formats them and performs the actual console/file I/O
+        if handlers:
+            log_queue = queue.Queue(-1)
+            root_logger.addHandler(_InProcessQueueHandler(log_queue))
+            self.listener = logging.handlers.QueueListener(
+                log_queue, *handlers, respect_handler_level=True
             )
-            error_handler.setLevel(logging.ERROR)
-            error_handler.setFormatter(JSONFormatter())
-            root_logger.addHandler(error_handler)
+            self.listener.start()
+            atexit.register(self.stop)
         
         # Mute the late-shutdown library DEBUG logs during Python interpreter shutdown
         logging.getLogger("httpcore").setLevel(logging.WARNING)
         logging.getLogger("httpx").setLevel(logging.WARNING)
     
+    def _rotating_file_handler(self, filename: str, level: int,
+                               formatter: logging.Formatter) -> logging.Handler:
+        """Midnight-rotating file handler in the log directory."""
+        handler = logging.handlers.TimedRotatingFileHandler(
+            os.path.join(self.log_dir, filename),
+            when='midnight',
+            interval=1,
+            backupCount=self.max_log_files,
+            encoding='utf-8'
+        )
+        handler.setLevel(level)
+        handler.setFormatter(formatter)
+        return handler
+    
+    def stop(self):
+        """Flush queued records and stop the background listener thread."""
+        if self.listener is not None:
+            self.listener.stop()
+            # Write out anything still held by the buffered file handler; the
+            # console stream may already be closed at exit, so leave it alone
+            for handler in self.listener.handlers:
+                if isinstance(handler, logging.handlers.MemoryHandler):
+                    handler.flush()
+            self.listener = None
+    
     def get_logger(self, name: str) -> ContextualLogger:
         """Get a contextual logger for a specific module."""
-        return ContextualLogger(name)
+        logger = self.loggers.get(name)
+        if logger is None:
+            logger = self.loggers.setdefault(name, ContextualLogger(name))
+        return logger
     
     def get_function_call_logger(self) -> ContextualLogger:
         """Get a specialized logger for function calling operations."""
-        logger = ContextualLogger('gemini_chatbot.function_calls')
-        return logger
+        return self.get_logger('gemini_chatbot.function_calls')
     
     def get_api_logger(self) -> ContextualLogger:
         """Get a specialized logger for API operations."""
-        logger = ContextualLogger('gemini_chatbot.api')
-        return logger
+        return self.get_logger('gemini_chatbot.api')
     
     def get_chart_logger(self) -> ContextualLogger:
         """Get a specialized logger for chart generation."""
-        logger = ContextualLogger('gemini_chatbot.charts')
-        return logger
+        return self.get_logger('gemini_chatbot.charts')
 
 
 # Context managers for tracking operations
 class LoggedOperation:
-    """Context manager for logging operations with timing."""
+    """Context manager for logging operations with timing.
+    
+    `base_extra` is an optional precomputed mapping of context that does not
+    change between calls (e.g. session id); keyword context is overlaid on it.
+    """
     
-    def __init__(self, logger: ContextualLogger, operation_name: str, **context):
+    __slots__ = ('logger', 'operation_name', 'context', 'start_time')
+    
+    def __init__(self, logger: ContextualLogger, operation_name: str,
+                 base_extra: Optional[Dict[str, Any]] = None, **context):
         self.logger = logger
         self.operation_name = operation_name
-        self.context = context
+        self.context = {**base_extra, **context} if base_extra else context
         self.start_time = None
     
     def __enter__(self):
-        self.start_time = datetime.now()
-        self.logger.set_context(**self.context)
-        self.logger.info(f"Starting {self.operation_name}")
+        self.start_time = time.perf_counter()
+        # Context travels on the span's own records via `extra=`; the shared
+        # logger is never mutated, so concurrent requests can't clobber it
+        self.logger.info("Starting %s", self.operation_name, extra=self.context)
         return self
     
     def __exit__(self, exc_type, exc_val, exc_tb):
-        duration = (datetime.now() - self.start_time).total_seconds()
-        self.logger.set_context(response_time=duration)
+        duration = time.perf_counter() - self.start_time
+        extra = {**self.context, 'response_time': duration}
         
         if exc_type is None:
-            self.logger.info(f"Completed {self.operation_name} successfully", 
-                           extra={'response_time': duration})
+            self.logger.info("Completed %s successfully", self.operation_name, extra=extra)
         else:
-            self.logger.error(f"Failed {self.operation_name}: {exc_val}", 
-                            exc_info=True, extra={'response_time': duration})
-        
-        self.logger.clear_context()
+            self.logger.error("Failed %s: %s", self.operation_name, exc_val,
+                              exc_info=True, extra=extra)
         
         # Re-raise the exception if one occurred
         return False
@@ -264,6 +451,8 @@ class LoggedOperation:
 class FunctionCallTracker:
     """Context manager for tracking Gemini function calls."""
     
+    __slots__ = ('logger', 'function_name', 'args', 'start_time')
+    
     def __init__(self, logger: ContextualLogger, function_name: str, args: dict):
         self.logger = logger
         self.function_name = function_name
@@ -271,26 +460,35 @@ class FunctionCallTracker:
         self.start_time = None
     
     def __enter__(self):
-        self.start_time = datetime.now()
-        self.logger.set_context(function_call=self.function_name)
-        self.logger.info(f"Executing function call: {self.function_name}", 
-                        extra={'function_args': self.args})
+        self.start_time = time.perf_counter()
+        self.logger.info("Executing function call: %s", self.function_name,
+                         extra={'function_call': self.function_name, 'function_args': self.args})
         return self
     
     def __exit__(self, exc_type, exc_val, exc_tb):
-        duration = (datetime.now() - self.start_time).total_seconds()
+        duration = time.perf_counter() - self.start_time
+        extra = {'function_call': self.function_name, 'response_time': duration}
         
         if exc_type is None:
-            self.logger.info(f"Function call {self.function_name} completed successfully", 
-                           extra={'response_time': duration})
+            self.logger.info("Function call %s completed successfully", self.function_name,
+                             extra=extra)
         else:
-            self.logger.error(f"Function call {self.function_name} failed: {exc_val}", 
-                            exc_info=True, extra={'response_time': duration})
+            self.logger.error("Function call %s failed: %s", self.function_name, exc_val,
+                              exc_info=True, extra=extra)
         
-        self.logger.clear_context()
         return False
 
 
+def log_sampled_timing(logger: ContextualLogger, operation_name: str, start_ns: int, **extra):
+    """Log one timing record for an operation started at `start_ns`
+    (time.perf_counter_ns()), for a TIMING_SAMPLE_RATE fraction of calls.
+    A lightweight alternative to LoggedOperation for hot paths."""
+    if TIMING_SAMPLE_RATE >= 1.0 or random.random() < TIMING_SAMPLE_RATE:
+        duration_ns = time.perf_counter_ns() - start_ns
+        logger.info("⏱️ %s done in %.1f ms", operation_name, duration_ns / 1e6,
+                    extra={'duration_ns': duration_ns, **extra})
+
+
 # Global logging configuration instance
 logging_config = LoggingConfig()
 
@@ -319,5 +517,7 @@ __all__ = [
     'get_chart_logger',
     'LoggedOperation',
     'FunctionCallTracker',
-    'ContextualLogger'
+    'ContextualLogger',
+    'CORRELATION_ID',
+    'log_sampled_timing'
 ]
\ No newline at end of file
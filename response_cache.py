@@ -0,0 +1,163 @@
+# SPDX-License-Identifier: MIT
+# Copyright © 2025 github.com/dtiberio
+
+# response_cache.py
+"""Response cache for generate_chat_response.
+Two tiers, both bounded by an LRU + TTL:
+  • exact   – SHA-256 over (model, conversation, tools); always on
+  • semantic – cosine similarity of the last user message embedding against
+               cached entries for the same model and the same preceding turns;
+               opt-in because every miss costs an extra embedding round-trip
+Only deterministic turns should be stored (no tool calls - generated data and
+charts are random by design).
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from logger_config import get_logger
+
+cache_logger = get_logger('gemini_chatbot.cache')
+
+RESPONSE_CACHE_SIZE = int(os.getenv('RESPONSE_CACHE_SIZE', '256'))
+RESPONSE_CACHE_TTL = float(os.getenv('RESPONSE_CACHE_TTL', '3600'))  # seconds
+RESPONSE_CACHE_SEMANTIC = os.getenv('RESPONSE_CACHE_SEMANTIC', 'false').lower() == 'true'
+SIMILARITY_THRESHOLD = 0.92
+
+
+class LLMCache:
+    """Thread-safe LRU + TTL cache of assistant messages, with an optional semantic tier."""
+
+    def __init__(
+        self,
+        maxsize: int = RESPONSE_CACHE_SIZE,
+        ttl: float = RESPONSE_CACHE_TTL,
+        embed_fn: Optional[Callable[[str], np.ndarray]] = None,
+        similarity_threshold: float = SIMILARITY_THRESHOLD,
+    ):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.embed_fn = embed_fn
+        self.similarity_threshold = similarity_threshold
+        # key → (expires_at, model, scope, message, unit-norm embedding or None)
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def cache_key(model: str, messages: List[Dict], tools: Any) -> str:
+        """Exact-match key over the model, the conversation and the tool set."""
+        payload = json.dumps(
+            {"model": model, "messages": messages, "tools": tools},
+            sort_keys=True, default=str, separators=(",", ":"),
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    @classmethod
+    def request_keys(cls, model: str, messages: List[Dict], tools: Any) -> Tuple[str, str, Optional[str]]:
+        """
+        Everything get/put need for one conversation: the exact key, the scope
+        (hash of the turns before the last message; semantic matches must share
+        it) and the last user message text, or None when it is not plain text.
+        """
+        last_user = messages[-1].get("content") if messages else None
+        query_text = last_user if isinstance(last_user, str) else None
+        return cls.cache_key(model, messages, tools), cls.cache_key(model, messages[:-1], tools), query_text
+
+    def _embed(self, text: Optional[str]) -> Optional[np.ndarray]:
+        if self.embed_fn is None or not text:
+            return None
+        try:
+            vector = np.asarray(self.embed_fn(text), dtype=np.float32)
+        except Exception as e:
+            cache_logger.warning("Embedding failed, semantic cache skipped: %s", e)
+            return None
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else None
+
+    def _purge_expired(self, now: float) -> None:
+        expired = [key for key, entry in self._entries.items() if entry[0] <= now]
+        for key in expired:
+            del self._entries[key]
+
+    def lookup(
+        self, key: str, model: str, query_text: Optional[str] = None, scope: Optional[str] = None
+    ) -> Tuple[Optional[Dict], Optional[np.ndarray]]:
+        """
+        Return (copy of the cached message or None, query embedding or None).
+        The embedding computed for a semantic miss can be handed back to put()
+        so the same question is not embedded twice.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                cache_logger.debug("Response cache exact hit")
+                return dict(entry[3]), None
+
+        query = self._embed(query_text)
+        if query is None:
+            return None, None
+
+        with self._lock:
+            self._purge_expired(now)
+            candidates = [
+                (k, e) for k, e in self._entries.items()
+                if e[1] == model and e[2] == scope and e[4] is not None
+            ]
+            if not candidates:
+                return None, query
+            matrix = np.stack([e[4] for _, e in candidates])
+            scores = matrix @ query
+            best = int(np.argmax(scores))
+            if scores[best] < self.similarity_threshold:
+                return None, query
+            best_key, best_entry = candidates[best]
+            self._entries.move_to_end(best_key)
+            cache_logger.debug("Response cache semantic hit (similarity %.3f)", float(scores[best]))
+            return dict(best_entry[3]), query
+
+    def get(
+        self, key: str, model: str, query_text: Optional[str] = None, scope: Optional[str] = None
+    ) -> Optional[Dict]:
+        """Return a copy of the cached message for `key` (or a semantic match), else None."""
+        return self.lookup(key, model, query_text, scope)[0]
+
+    def put(
+        self,
+        key: str,
+        model: str,
+        message: Dict,
+        query_text: Optional[str] = None,
+        scope: Optional[str] = None,
+        embedding: Optional[np.ndarray] = None,
+    ) -> None:
+        """Store an assistant message; evicts the least recently used entry when full."""
+        if embedding is None:
+            embedding = self._embed(query_text)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, model, scope, dict(message), embedding)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+
+__all__ = [
+    'LLMCache',
+    'RESPONSE_CACHE_SEMANTIC',
+]
@@ -0,0 +1,146 @@
+# SPDX-License-Identifier: MIT
+# Copyright © 2025 github.com/dtiberio
+
+# test_app_helpers.py
+"""
+Tests for the chat orchestrators in app_helpers with the Gemini calls mocked out.
+"""
+
+import asyncio
+import threading
+from types import SimpleNamespace
+
+import orjson
+import pytest
+from google.genai import types
+
+import app_helpers
+
+MODEL = "gemini-2.5-flash"
+
+
+def text_response(text):
+    return types.GenerateContentResponse(candidates=[
+        types.Candidate(content=types.Content(role="model", parts=[types.Part(text=text)]))
+    ])
+
+
+def test_async_response_matches_the_sync_orchestrator(monkeypatch):
+    """generate_chat_response_async runs the same two-turn workflow and returns its message."""
+    calls = []
+
+    def fake_call(messages, model_name, is_completion_call=False):
+        calls.append(model_name)
+        return text_response("plain answer")
+
+    monkeypatch.setattr(app_helpers, "make_gemini_api_call", fake_call)
+    monkeypatch.setattr(app_helpers, "RESPONSE_CACHE", app_helpers.LLMCache())
+    conversation = [{"role": "user", "content": "what is a bar chart?"}]
+
+    message = asyncio.run(app_helpers.generate_chat_response_async(conversation, MODEL))
+
+    assert message == {"role": "assistant", "content": "plain answer", "type": "text"}
+    assert calls == [MODEL, MODEL]
+    assert conversation == [{"role": "user", "content": "what is a bar chart?"}]
+
+
+def test_duplicate_from_same_client_joins_and_times_out(monkeypatch):
+    """A same-client duplicate waits on the running turn, then runs its own once the wait expires."""
+    release = threading.Event()
+    started = threading.Event()
+    runs = []
+
+    def slow_turns(conversation, model):
+        runs.append(threading.current_thread().name)
+        if len(runs) == 1:
+            started.set()
+            release.wait(5)
+        return {"role": "assistant", "content": f"run {len(runs)}", "type": "text"}, False
+
+    monkeypatch.setattr(app_helpers, "run_chat_turns", slow_turns)
+    monkeypatch.setattr(app_helpers, "RESPONSE_CACHE", app_helpers.LLMCache())
+    monkeypatch.setattr(app_helpers, "INFLIGHT_WAIT_TIMEOUT", 0.05)
+    conversation = [{"role": "user", "content": "slow question"}]
+
+    leader = threading.Thread(target=app_helpers.generate_chat_response,
+                              args=(conversation, MODEL, "client-a"))
+    leader.start()
+    started.wait(5)
+
+    # Another client never joins the running turn
+    assert app_helpers.generate_chat_response(conversation, MODEL, "client-b")["content"] == "run 2"
+    # The same client joins, gives up after the timeout and computes its own answer
+    assert app_helpers.generate_chat_response(conversation, MODEL, "client-a")["content"] == "run 3"
+
+    release.set()
+    leader.join(5)
+    assert len(runs) == 3
+    assert app_helpers.INFLIGHT == {}
+
+
+class FakeBatchClient:
+    """Stands in for genai_client.files/.batches: one scripted output file per submitted job."""
+
+    def __init__(self, outputs, states=("JOB_STATE_SUCCEEDED",)):
+        self.outputs = list(outputs)
+        self.states = list(states)
+        self.submitted = []
+        self.cancelled = []
+        self.files = SimpleNamespace(upload=self.upload, download=self.download)
+        self.batches = SimpleNamespace(create=self.create, get=self.get, cancel=self.cancel)
+
+    def upload(self, file, config):
+        with open(file, "rb") as fh:
+            self.submitted.append([orjson.loads(line) for line in fh])
+        return SimpleNamespace(name=f"files/in-{len(self.submitted)}")
+
+    def job(self):
+        state = self.states.pop(0) if len(self.states) > 1 else self.states[0]
+        return types.BatchJob(name=f"batches/{len(self.submitted)}", state=state,
+                              dest=types.BatchJobDestination(file_name="files/out"))
+
+    def create(self, model, src):
+        return self.job()
+
+    def get(self, name):
+        return self.job()
+
+    def cancel(self, name):
+        self.cancelled.append(name)
+
+    def download(self, file):
+        return b"\n".join(orjson.dumps(line) for line in self.outputs.pop(0))
+
+
+def test_batch_runs_both_turns_and_falls_back_on_failed_requests(monkeypatch):
+    """Text-only conversations get a second batch turn; a failed request yields the fallback reply."""
+    answer = text_response("batched answer").model_dump(mode="json", exclude_none=True)
+    fake = FakeBatchClient(outputs=[
+        [{"key": "req_0", "response": answer}, {"key": "req_1", "error": {"code": 500}}],
+        [{"key": "req_0", "response": answer}],
+    ])
+    monkeypatch.setattr(app_helpers, "genai_client", fake)
+    monkeypatch.setattr(app_helpers, "BATCH_POLL_INTERVAL", 0)
+
+    results = app_helpers.generate_chat_response_batch(
+        [[{"role": "user", "content": "first"}], [{"role": "user", "content": "second"}]], MODEL
+    )
+
+    assert results == [
+        {"role": "assistant", "content": "batched answer", "type": "text"},
+        {"role": "assistant", "content": app_helpers.FALLBACK_REPLY, "type": "text"},
+    ]
+    assert [[item["key"] for item in job] for job in fake.submitted] == [["req_0", "req_1"], ["req_0"]]
+    assert "functionDeclarations" in fake.submitted[0][0]["request"]["tools"][0]
+
+
+def test_batch_job_is_cancelled_after_max_wait(monkeypatch):
+    """A job that is still running when max_wait expires is cancelled instead of polled forever."""
+    fake = FakeBatchClient(outputs=[], states=("JOB_STATE_RUNNING",))
+    monkeypatch.setattr(app_helpers, "genai_client", fake)
+    monkeypatch.setattr(app_helpers, "BATCH_POLL_INTERVAL", 0)
+
+    with pytest.raises(TimeoutError):
+        app_helpers.generate_chat_response_batch([[{"role": "user", "content": "slow"}]], MODEL, max_wait=0)
+
+    assert fake.cancelled == ["batches/1"]
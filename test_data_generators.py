@@ -0,0 +1,37 @@
+# SPDX-License-Identifier: MIT
+# Copyright © 2025 github.com/dtiberio
+
+# test_data_generators.py
+"""
+Tests for the synthetic data generators used by the function-calling tools.
+"""
+
+import pytest
+
+from data_generators import generate_performance_data
+
+
+@pytest.mark.parametrize("trend", ["improving", "declining", "mixed", "stable"])
+def test_rating_performance_data(trend):
+    """Ratings come from the generator itself (not the constant fallback) and stay in 1-5."""
+    result = generate_performance_data(
+        ["Alice", "Bob", "Carol"], ["Q1", "Q2", "Q3", "Q4"], metric_type="rating", trend=trend
+    )
+
+    values = [value for row in result["data_matrix"] for value in row]
+    assert len(values) == 12
+    assert all(1 <= value <= 5 for value in values)
+    assert len(set(values)) > 1
+
+
+def test_performance_data_does_not_alias_caller_lists():
+    """Mutating the caller's lists afterwards must not change a returned result."""
+    entities = ["Alice", "Bob"]
+    periods = ["Q1", "Q2"]
+    result = generate_performance_data(entities, periods, metric_type="score")
+
+    entities.append("Mallory")
+    periods[0] = "changed"
+
+    assert list(result["entities"]) == ["Alice", "Bob"]
+    assert list(result["time_periods"]) == ["Q1", "Q2"]
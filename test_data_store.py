@@ -0,0 +1,92 @@
+# SPDX-License-Identifier: MIT
+# Copyright © 2025 github.com/dtiberio
+
+# test_data_store.py
+"""
+Tests for the bounded tool-result store: LRU spill to SQLite, read-back, TTL eviction
+and overflow-file lifetime.
+"""
+
+import os
+
+import pytest
+
+import data_store
+from data_store import DataStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = DataStore(path=str(tmp_path / "payloads.sqlite3"), hot_size=2)
+    yield store
+    store.close()
+
+
+def test_overflow_spills_to_sqlite_and_reads_back(store):
+    """Entries pushed out of the hot LRU land in SQLite and are still returned unchanged."""
+    for i in range(4):
+        store.put(f"id{i}", f"payload{i}".encode())
+
+    assert list(store._hot) == ["id2", "id3"]
+    cold_ids = {row[0] for row in store._db.execute("SELECT data_id FROM payloads")}
+    assert cold_ids == {"id0", "id1"}
+
+    assert len(store) == 4
+    for i in range(4):
+        assert store.get(f"id{i}") == f"payload{i}".encode()
+    assert "missing" not in store
+
+
+def test_get_refreshes_recency(store):
+    """A hot entry that was just read is not the one evicted next."""
+    store.put("a", b"1")
+    store.put("b", b"2")
+    store.get("a")
+    store.put("c", b"3")
+
+    assert list(store._hot) == ["a", "c"]
+    assert store.get("b") == b"2"
+
+
+def test_ttl_eviction_covers_both_tiers(store, monkeypatch):
+    """evict_older_than drops stale entries from the LRU and from SQLite, keeping fresh ones."""
+    now = [1000.0]
+    monkeypatch.setattr(data_store.time, "time", lambda: now[0])
+
+    for i in range(3):
+        store.put(f"old{i}", b"stale")  # old0 spills to SQLite
+    now[0] += 100
+    store.put("fresh", b"new")
+
+    assert store.evict_older_than(50) == 3
+    assert len(store) == 1
+    assert store.get("fresh") == b"new"
+    assert store.get("old0") is None
+    assert store.get("old2") is None
+
+
+def test_close_keeps_a_caller_supplied_file(store):
+    """A DATA_STORE_PATH the user chose survives close()."""
+    for i in range(3):
+        store.put(f"id{i}", b"x")
+    store.close()
+
+    assert os.path.exists(store.path)
+
+
+def test_default_store_is_lazy_and_removes_its_own_file(tmp_path, monkeypatch):
+    """No file or janitor until used; the per-process temp file is removed on close."""
+    monkeypatch.setattr(data_store.tempfile, "gettempdir", lambda: str(tmp_path))
+    store = DataStore(path=None, hot_size=1, auto_janitor=True)
+    assert store._janitor is None and store._db is None
+
+    store.put("a", b"1")
+    assert store._janitor is not None
+    assert list(tmp_path.iterdir()) == []
+
+    store.put("b", b"2")  # "a" spills and creates the overflow file
+    assert store.get("a") == b"1"
+    assert len(list(tmp_path.iterdir())) == 1
+
+    store.close()
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,49 @@
+# SPDX-License-Identifier: MIT
+# Copyright © 2025 github.com/dtiberio
+
+# test_function_declarations.py
+"""
+Tests for the shared tool declarations and how the SDK treats them on a request.
+"""
+
+import copy
+import json
+
+from google.genai._api_client import SdkHttpResponse
+
+from app_llm import DATA_HEAVY_CONFIG, genai_client
+from function_declarations import ALL_FUNCTIONS, CHART_TOOLS
+
+REPLY = {"candidates": [{"content": {"role": "model", "parts": [{"text": "hi"}]}}]}
+
+
+def test_deepcopy_returns_an_independent_tool():
+    """A deep copy of the shared tool is a new tree, so mutating it leaves CHART_TOOLS alone."""
+    clone = copy.deepcopy(CHART_TOOLS[0])
+
+    assert clone is not CHART_TOOLS[0]
+    assert clone.function_declarations[0] is not CHART_TOOLS[0].function_declarations[0]
+
+    clone.function_declarations.clear()
+    assert len(CHART_TOOLS[0].function_declarations) == len(ALL_FUNCTIONS)
+
+
+def test_generate_content_sends_every_declaration_and_keeps_tools_intact(monkeypatch):
+    """The SDK request path serialises all declarations without mutating the shared tool."""
+    sent = []
+
+    def fake_request(http_method, path, request_dict, http_options=None):
+        sent.append(request_dict)
+        return SdkHttpResponse(headers={}, body=json.dumps(REPLY))
+
+    monkeypatch.setattr(genai_client.models._api_client, "request", fake_request)
+    before = CHART_TOOLS[0].model_dump()
+
+    response = genai_client.models.generate_content(
+        model="gemini-2.5-flash", contents="hello", config=DATA_HEAVY_CONFIG
+    )
+
+    assert response.text == "hi"
+    declarations = sent[0]["tools"][0]["functionDeclarations"]
+    assert [d["name"] for d in declarations] == [f.name for f in ALL_FUNCTIONS]
+    assert CHART_TOOLS[0].model_dump() == before
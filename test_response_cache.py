@@ -0,0 +1,98 @@
+# SPDX-License-Identifier: MIT
+# Copyright © 2025 github.com/dtiberio
+
+# test_response_cache.py
+"""
+Tests for the response cache: exact-key hits, LRU eviction, TTL expiry, copy-on-read
+and the history-scoped semantic tier.
+"""
+
+import response_cache
+from response_cache import LLMCache
+
+MODEL = "gemini-2.5-flash"
+
+
+def message(text):
+    return {"role": "assistant", "content": text}
+
+
+def test_cache_key_is_stable_and_specific():
+    """The key ignores dict ordering but changes with the model or the conversation."""
+    messages = [{"role": "user", "content": "hi"}]
+    key = LLMCache.cache_key(MODEL, messages, None)
+
+    assert key == LLMCache.cache_key(MODEL, [{"content": "hi", "role": "user"}], None)
+    assert key != LLMCache.cache_key("gemini-2.5-pro", messages, None)
+    assert key != LLMCache.cache_key(MODEL, [{"role": "user", "content": "hello"}], None)
+
+
+def test_get_returns_an_independent_copy():
+    """Mutating a returned message must not change what the cache serves next."""
+    cache = LLMCache(maxsize=4, ttl=60)
+    original = message("cached answer")
+    cache.put("k", MODEL, original)
+    original["content"] = "changed by caller after put"
+
+    first = cache.get("k", MODEL)
+    first["content"] = "changed by caller after get"
+
+    assert cache.get("k", MODEL) == message("cached answer")
+
+
+def test_lru_eviction_keeps_recently_used_entries():
+    """When full, the least recently used entry goes; a get() counts as use."""
+    cache = LLMCache(maxsize=2, ttl=60)
+    cache.put("a", MODEL, message("A"))
+    cache.put("b", MODEL, message("B"))
+    cache.get("a", MODEL)
+    cache.put("c", MODEL, message("C"))
+
+    assert len(cache) == 2
+    assert cache.get("b", MODEL) is None
+    assert cache.get("a", MODEL) == message("A")
+    assert cache.get("c", MODEL) == message("C")
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    """An entry is served until its TTL has passed and never after."""
+    now = [500.0]
+    monkeypatch.setattr(response_cache.time, "monotonic", lambda: now[0])
+    cache = LLMCache(maxsize=4, ttl=10)
+    cache.put("k", MODEL, message("fresh"))
+
+    now[0] += 9
+    assert cache.get("k", MODEL) == message("fresh")
+    now[0] += 2
+    assert cache.get("k", MODEL) is None
+
+
+def test_request_keys_scope_covers_the_preceding_turns():
+    """Conversations that differ only in the last message share a scope but not a key."""
+    history = [{"role": "user", "content": "hi"}, {"role": "assistant", "content": "hello"}]
+    key_a, scope_a, text_a = LLMCache.request_keys(MODEL, [*history, {"role": "user", "content": "a"}], None)
+    key_b, scope_b, _ = LLMCache.request_keys(MODEL, [*history, {"role": "user", "content": "b"}], None)
+    _, other_scope, _ = LLMCache.request_keys(MODEL, [{"role": "user", "content": "a"}], None)
+
+    assert key_a != key_b
+    assert scope_a == scope_b != other_scope
+    assert text_a == "a"
+
+
+def test_semantic_hit_requires_the_same_history_and_embeds_once():
+    """A near-duplicate only matches within its scope; a miss's embedding is reused by put()."""
+    embedded = []
+
+    def embed(text):
+        embedded.append(text)
+        return [1.0, 0.0] if "chart" in text else [0.0, 1.0]
+
+    cache = LLMCache(maxsize=4, ttl=60, embed_fn=embed)
+    cached, embedding = cache.lookup("k1", MODEL, "what is a chart", scope="history-1")
+    assert cached is None
+    cache.put("k1", MODEL, message("charts"), "what is a chart", scope="history-1", embedding=embedding)
+    assert embedded == ["what is a chart"]
+
+    assert cache.get("k2", MODEL, "what's a chart?", scope="history-1") == message("charts")
+    assert cache.get("k3", MODEL, "what's a chart?", scope="history-2") is None
+    assert cache.get("k4", MODEL, "unrelated", scope="history-1") is None